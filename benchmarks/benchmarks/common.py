@@ -0,0 +1,87 @@
+# SPDX-License-Identifier: BSD-3-Clause
+# Copyright (c) 2025 Scipp contributors (https://github.com/scipp)
+"""Synthetic inputs for the benchmarks."""
+
+import numpy as np
+import scipp as sc
+
+from ess.polarization import (
+    He3OpacityFunction,
+    He3PolarizationFunction,
+    He3TransmissionFunction,
+)
+
+EVENT_COUNTS = (10**4, 10**6, 10**8)
+LAYOUTS = ('dense', 'binned')
+
+
+def make_transmission_function() -> He3TransmissionFunction:
+    return He3TransmissionFunction(
+        opacity_function=He3OpacityFunction(sc.scalar(0.88, unit='1/angstrom')),
+        polarization_function=He3PolarizationFunction(
+            C=sc.scalar(0.7), T1=sc.scalar(123456.0, unit='s')
+        ),
+        transmission_empty_glass=sc.scalar(0.9),
+    )
+
+
+def make_events(n: int, seed: int = 0) -> sc.DataArray:
+    """Events with wavelength, time, Qx, and Qy coordinates."""
+    rng = np.random.default_rng(seed)
+    return sc.DataArray(
+        sc.ones(dims=['event'], shape=[n], unit='', dtype='float32'),
+        coords={
+            'wavelength': sc.array(
+                dims=['event'], values=rng.uniform(1.0, 10.0, n), unit='angstrom'
+            ),
+            # Event times are sorted, as in a real run.
+            'time': sc.linspace('event', 0.0, 100000.0, num=n, unit='s'),
+            'Qx': sc.array(
+                dims=['event'], values=rng.normal(0.0, 0.05, n), unit='1/angstrom'
+            ),
+            'Qy': sc.array(
+                dims=['event'], values=rng.normal(0.0, 0.05, n), unit='1/angstrom'
+            ),
+        },
+    )
+
+
+def make_binned(n: int, ntime: int = 10, nwavelength: int = 100) -> sc.DataArray:
+    """
+    Events binned in time and wavelength.
+
+    Bins are created directly from the event list with equal bin sizes, to keep the
+    setup fast for large inputs. The event coordinates are not consistent with the
+    bin edges, which does not matter for the benchmarked operations.
+    """
+    events = make_events(n)
+    nbins = ntime * nwavelength
+    begin = sc.array(
+        dims=['time', 'wavelength'],
+        values=(np.arange(nbins) * (n // nbins)).reshape(ntime, nwavelength),
+        unit=None,
+    )
+    binned = sc.DataArray(sc.bins(begin=begin, dim='event', data=events))
+    binned.coords['time'] = sc.linspace('time', 0.0, 100000.0, ntime + 1, unit='s')
+    binned.coords['wavelength'] = sc.linspace(
+        'wavelength', 1.0, 10.0, nwavelength + 1, unit='angstrom'
+    )
+    return binned
+
+
+def make_dense(n: int, nwavelength: int = 1000) -> sc.DataArray:
+    """Dense data with ``n`` elements, as a function of time and wavelength."""
+    ntime = max(n // nwavelength, 1)
+    return sc.DataArray(
+        sc.ones(dims=['time', 'wavelength'], shape=[ntime, nwavelength], unit=''),
+        coords={
+            'time': sc.linspace('time', 0.0, 100000.0, ntime, unit='s'),
+            'wavelength': sc.linspace(
+                'wavelength', 1.0, 10.0, nwavelength, unit='angstrom'
+            ),
+        },
+    )
+
+
+def make_data(n: int, layout: str) -> sc.DataArray:
+    return make_binned(n) if layout == 'binned' else make_dense(n)
@@ -0,0 +1,137 @@
+# SPDX-License-Identifier: BSD-3-Clause
+# Copyright (c) 2025 Scipp contributors (https://github.com/scipp)
+import scipp as sc
+
+from ess.polarization import CorrectionWorkflow
+from ess.polarization.correction import (
+    PolarizationCorrectedData,
+    compute_polarizing_element_correction,
+    sum_polarization_contributions,
+)
+from ess.polarization.types import (
+    Analyzer,
+    Down,
+    HistogramBins,
+    Polarizer,
+    ReducedSampleDataBySpinChannel,
+    TotalPolarizationCorrectedData,
+    TotalPolarizationCorrectedHistogram,
+    TransmissionFunction,
+    Up,
+)
+
+from .common import (
+    EVENT_COUNTS,
+    LAYOUTS,
+    make_binned,
+    make_data,
+    make_transmission_function,
+)
+
+
+class Correction:
+    params = (EVENT_COUNTS, LAYOUTS)
+    param_names = (
+        'events',
+        'layout',
+    )
+    timeout = 600
+
+    def setup(self, events: int, layout: str) -> None:
+        self.channel = make_data(events, layout)
+        self.transmission = make_transmission_function()
+
+    def time_compute_polarizing_element_correction(
+        self, events: int, layout: str
+    ) -> None:
+        compute_polarizing_element_correction(
+            channel=self.channel, transmission=self.transmission
+        )
+
+    def peakmem_compute_polarizing_element_correction(
+        self, events: int, layout: str
+    ) -> None:
+        compute_polarizing_element_correction(
+            channel=self.channel, transmission=self.transmission
+        )
+
+
+class CorrectionResolution:
+    """Correction of binned data, evaluated per event or per bin."""
+
+    params = (EVENT_COUNTS, ('event', 'bin-center', 'bin-mean', 'auto'))
+    param_names = ('events', 'resolution')
+    timeout = 600
+
+    def setup(self, events: int, resolution: str) -> None:
+        self.channel = make_binned(events)
+        self.transmission = make_transmission_function()
+
+    def time_compute_polarizing_element_correction(
+        self, events: int, resolution: str
+    ) -> None:
+        compute_polarizing_element_correction(
+            channel=self.channel,
+            transmission=self.transmission,
+            resolution=resolution,
+        )
+
+
+class SumContributions:
+    params = (EVENT_COUNTS, LAYOUTS)
+    param_names = (
+        'events',
+        'layout',
+    )
+    timeout = 600
+
+    def setup(self, events: int, layout: str) -> None:
+        # The inputs are not modified, so all spin channels can share one buffer.
+        data = make_data(events, layout)
+        contribution = PolarizationCorrectedData(
+            upup=data, updown=data, downup=data, downdown=data
+        )
+        self.contributions = [contribution] * 4
+
+    def time_sum_polarization_contributions(self, events: int, layout: str) -> None:
+        sum_polarization_contributions(*self.contributions)
+
+    def peakmem_sum_polarization_contributions(self, events: int, layout: str) -> None:
+        sum_polarization_contributions(*self.contributions)
+
+
+class CorrectedHistogram:
+    """Corrected I(Q, wavelength), with and without fusing correction and histogram."""
+
+    params = (EVENT_COUNTS, ('fused', 'unfused'))
+    param_names = ('events', 'method')
+    timeout = 600
+
+    def setup(self, events: int, method: str) -> None:
+        workflow = CorrectionWorkflow()
+        transmission = make_transmission_function()
+        workflow[TransmissionFunction[Polarizer]] = transmission
+        workflow[TransmissionFunction[Analyzer]] = transmission
+        data = make_binned(events)
+        for polarizer_spin in (Up, Down):
+            for analyzer_spin in (Up, Down):
+                workflow[
+                    ReducedSampleDataBySpinChannel[polarizer_spin, analyzer_spin]
+                ] = data
+        self.bins = {'Qx': sc.linspace('Qx', -0.3, 0.3, 101, unit='1/angstrom')}
+        workflow[HistogramBins] = self.bins
+        self.workflow = workflow
+
+    def _compute(self, method: str) -> None:
+        if method == 'fused':
+            self.workflow.compute(TotalPolarizationCorrectedHistogram)
+        else:
+            result = self.workflow.compute(TotalPolarizationCorrectedData)
+            for field in ('upup', 'updown', 'downup', 'downdown'):
+                getattr(result, field).hist(self.bins)
+
+    def time_corrected_histogram(self, events: int, method: str) -> None:
+        self._compute(method)
+
+    def peakmem_corrected_histogram(self, events: int, method: str) -> None:
+        self._compute(method)
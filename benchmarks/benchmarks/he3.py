@@ -0,0 +1,102 @@
+# SPDX-License-Identifier: BSD-3-Clause
+# Copyright (c) 2025 Scipp contributors (https://github.com/scipp)
+import numpy as np
+import scipp as sc
+
+from ess.polarization.he3 import (
+    He3OpacityFunction,
+    compute_direct_beam,
+    get_he3_transmission_incoming_unpolarized_from_fit_to_direct_beam,
+    he3_opacity_function_from_beam_data,
+)
+
+from .common import (
+    EVENT_COUNTS,
+    make_binned,
+    make_dense,
+    make_events,
+    make_transmission_function,
+)
+
+
+class DirectBeam:
+    params = EVENT_COUNTS
+    param_names = ('events',)
+    timeout = 600
+
+    def setup(self, events: int) -> None:
+        self.data = make_binned(events)
+        self.q_range = sc.array(dims=['Q'], values=[0.0, 0.02], unit='1/angstrom')
+        self.background_q_range = sc.array(
+            dims=['Q'], values=[0.05, 0.1], unit='1/angstrom'
+        )
+
+    def time_compute_direct_beam(self, events: int) -> None:
+        compute_direct_beam(self.data, self.q_range, self.background_q_range)
+
+    def peakmem_compute_direct_beam(self, events: int) -> None:
+        compute_direct_beam(self.data, self.q_range, self.background_q_range)
+
+
+class He3Fit:
+    params = (10**4, 10**5, 10**6)
+    param_names = ('points',)
+    timeout = 600
+
+    def setup(self, points: int) -> None:
+        transmission = make_transmission_function()
+        data = make_dense(points, nwavelength=100)
+        self.transmission_empty_glass = transmission.transmission_empty_glass
+        self.opacity_function = transmission.opacity_function
+        self.opacity0 = sc.scalar(0.5, unit='1/angstrom')
+        unpolarized = data.copy()
+        unpolarized.data = transmission.transmission_empty_glass * sc.exp(
+            -transmission.opacity_function(data.coords['wavelength'])
+        ).broadcast(sizes=data.sizes)
+        self.unpolarized = unpolarized
+        polarized = data.copy()
+        polarized.data = 0.5 * (
+            transmission.apply(data, 'plus') + transmission.apply(data, 'minus')
+        )
+        self.polarized = polarized
+
+    def time_opacity_fit(self, points: int) -> None:
+        he3_opacity_function_from_beam_data(
+            transmission_empty_glass=self.transmission_empty_glass,
+            transmission_fraction=self.unpolarized,
+            opacity0_initial_guess=self.opacity0,
+        )
+
+    def time_polarization_fit(self, points: int) -> None:
+        get_he3_transmission_incoming_unpolarized_from_fit_to_direct_beam(
+            transmission_fraction=self.polarized,
+            opacity_function=He3OpacityFunction(self.opacity_function.opacity0),
+            transmission_empty_glass=self.transmission_empty_glass,
+        )
+
+    def peakmem_polarization_fit(self, points: int) -> None:
+        get_he3_transmission_incoming_unpolarized_from_fit_to_direct_beam(
+            transmission_fraction=self.polarized,
+            opacity_function=He3OpacityFunction(self.opacity_function.opacity0),
+            transmission_empty_glass=self.transmission_empty_glass,
+        )
+
+
+class PulseTimeTransmission:
+    """Transmission of events sharing the time of their pulse, at 14 Hz."""
+
+    params = (EVENT_COUNTS, (14, 14 * 3600))
+    param_names = ('events', 'pulses')
+    timeout = 600
+
+    def setup(self, events: int, pulses: int) -> None:
+        data = make_events(events)
+        pulse = np.arange(events) * pulses // events
+        data.coords['time'] = sc.array(
+            dims=['event'], values=pulse / 14.0, unit='s', dtype='float64'
+        )
+        self.data = data
+        self.transmission = make_transmission_function()
+
+    def time_apply(self, events: int, pulses: int) -> None:
+        self.transmission.apply(self.data, 'plus')
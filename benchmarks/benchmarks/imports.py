@@ -0,0 +1,10 @@
+# SPDX-License-Identifier: BSD-3-Clause
+# Copyright (c) 2025 Scipp contributors (https://github.com/scipp)
+
+
+def timeraw_import_ess_polarization() -> str:
+    return 'import ess.polarization'
+
+
+def timeraw_import_ess_polarization_workflows() -> str:
+    return 'from ess.polarization import CorrectionWorkflow, He3CellWorkflow'
@@ -0,0 +1,36 @@
+# SPDX-License-Identifier: BSD-3-Clause
+# Copyright (c) 2025 Scipp contributors (https://github.com/scipp)
+import numpy as np
+import scipp as sc
+
+from ess.polarization.base import determine_run_section
+
+
+def _make_log(n: int, values: np.ndarray) -> sc.DataArray:
+    return sc.DataArray(
+        sc.array(dims=['time'], values=values),
+        coords={'time': sc.linspace('time', 0.0, 100000.0, n, unit='s')},
+    )
+
+
+class RunSection:
+    params = (10**3, 10**5, 10**6)
+    param_names = ('log_entries',)
+    timeout = 600
+
+    def setup(self, log_entries: int) -> None:
+        rng = np.random.default_rng(0)
+        self.logs = {
+            name: _make_log(log_entries, rng.integers(0, 2, log_entries) == 1)
+            for name in ('sample_in_beam', 'polarizer_in_beam', 'analyzer_in_beam')
+        }
+        for name in ('polarizer_spin', 'analyzer_spin'):
+            self.logs[name] = _make_log(
+                log_entries, np.where(rng.integers(0, 2, log_entries) == 1, 1, -1)
+            )
+
+    def time_determine_run_section(self, log_entries: int) -> None:
+        determine_run_section(**self.logs)
+
+    def peakmem_determine_run_section(self, log_entries: int) -> None:
+        determine_run_section(**self.logs)
@@ -2,60 +2,146 @@
 # Copyright (c) 2025 Scipp contributors (https://github.com/scipp)
 # ruff: noqa: E402, F401, I
 
+import importlib
 import importlib.metadata
+from typing import TYPE_CHECKING
 
 try:
     __version__ = importlib.metadata.version("esspolarization")
 except importlib.metadata.PackageNotFoundError:
     __version__ = "0.0.0"
 
-del importlib
+if TYPE_CHECKING:
+    from .correction import (
+        CorrectionWorkflow,
+        HalfPolarizedWorkflow,
+        PolarizationAnalysisWorkflow,
+    )
+    from .he3 import (
+        Depolarized,
+        DirectBeamBackgroundQRange,
+        DirectBeamNoCell,
+        DirectBeamQRange,
+        He3CellLength,
+        He3CellPressure,
+        He3CellWorkflow,
+        He3DirectBeam,
+        He3FillingTime,
+        He3Opacity0,
+        He3OpacityFunction,
+        He3PolarizationFunction,
+        He3TransmissionEmptyGlass,
+        He3TransmissionFunction,
+        PiecewiseTransmissionFunction,
+        Polarized,
+    )
+    from .supermirror import (
+        EfficiencyLookupTable,
+        SecondDegreePolynomialEfficiency,
+        SupermirrorEfficiencyFunction,
+        SupermirrorWorkflow,
+    )
+    from .types import (
+        Analyzer,
+        CorrectionResolution,
+        CorrectionResolutionTolerance,
+        Down,
+        HalfPolarizedCorrectedData,
+        HistogramBins,
+        NoAnalyzer,
+        PolarizationCorrectedData,
+        Polarizer,
+        PolarizingElement,
+        ReducedSampleDataBySpinChannel,
+        TotalPolarizationCorrectedData,
+        TotalPolarizationCorrectedHistogram,
+        TransmissionFunction,
+        Up,
+    )
 
+# Public names are imported from their submodules on first access, such that
+# ``import ess.polarization`` stays cheap for code that needs only part of the API.
+_lazy_attributes = {
+    "Analyzer": "types",
+    "CorrectionResolution": "types",
+    "CorrectionResolutionTolerance": "types",
+    "CorrectionWorkflow": "correction",
+    "Depolarized": "he3",
+    "DirectBeamBackgroundQRange": "he3",
+    "DirectBeamNoCell": "he3",
+    "DirectBeamQRange": "he3",
+    "Down": "types",
+    "EfficiencyLookupTable": "supermirror",
+    "HalfPolarizedCorrectedData": "types",
+    "HalfPolarizedWorkflow": "correction",
+    "He3CellLength": "he3",
+    "He3CellPressure": "he3",
+    "He3CellWorkflow": "he3",
+    "He3DirectBeam": "he3",
+    "He3FillingTime": "he3",
+    "He3Opacity0": "he3",
+    "He3OpacityFunction": "he3",
+    "He3PolarizationFunction": "he3",
+    "He3TransmissionEmptyGlass": "he3",
+    "He3TransmissionFunction": "he3",
+    "HistogramBins": "types",
+    "NoAnalyzer": "types",
+    "PiecewiseTransmissionFunction": "he3",
+    "PolarizationAnalysisWorkflow": "correction",
+    "PolarizationCorrectedData": "types",
+    "Polarized": "he3",
+    "Polarizer": "types",
+    "PolarizingElement": "types",
+    "ReducedSampleDataBySpinChannel": "types",
+    "SecondDegreePolynomialEfficiency": "supermirror",
+    "SupermirrorEfficiencyFunction": "supermirror",
+    "SupermirrorWorkflow": "supermirror",
+    "TotalPolarizationCorrectedData": "types",
+    "TotalPolarizationCorrectedHistogram": "types",
+    "TransmissionFunction": "types",
+    "Up": "types",
+}
 
-from .correction import (
-    CorrectionWorkflow,
-    HalfPolarizedWorkflow,
-    PolarizationAnalysisWorkflow,
-)
-from .he3 import (
-    Depolarized,
-    DirectBeamBackgroundQRange,
-    DirectBeamNoCell,
-    DirectBeamQRange,
-    He3CellLength,
-    He3CellPressure,
-    He3CellWorkflow,
-    He3DirectBeam,
-    He3FillingTime,
-    He3Opacity0,
-    He3OpacityFunction,
-    He3PolarizationFunction,
-    He3TransmissionEmptyGlass,
-    He3TransmissionFunction,
-    Polarized,
-)
-from .supermirror import (
-    EfficiencyLookupTable,
-    SecondDegreePolynomialEfficiency,
-    SupermirrorEfficiencyFunction,
-    SupermirrorWorkflow,
-)
-from .types import (
-    Analyzer,
-    Down,
-    HalfPolarizedCorrectedData,
-    NoAnalyzer,
-    PolarizationCorrectedData,
-    Polarizer,
-    PolarizingElement,
-    ReducedSampleDataBySpinChannel,
-    TotalPolarizationCorrectedData,
-    TransmissionFunction,
-    Up,
+_submodules = frozenset(
+    (
+        "base",
+        "batch",
+        "bootstrap",
+        "cluster",
+        "cache",
+        "correction",
+        "he3",
+        "io",
+        "profiling",
+        "service",
+        "supermirror",
+        "synthetic",
+        "types",
+        "zoom",
+    )
 )
 
+
+def __getattr__(name: str) -> object:
+    if name in _lazy_attributes:
+        module = importlib.import_module(f".{_lazy_attributes[name]}", __name__)
+        value = getattr(module, name)
+    elif name in _submodules:
+        value = importlib.import_module(f".{name}", __name__)
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> list[str]:
+    return sorted({*globals(), *__all__, *_submodules})
+
+
 __all__ = [
     "Analyzer",
+    "CorrectionResolution",
+    "CorrectionResolutionTolerance",
     "CorrectionWorkflow",
     "Depolarized",
     "DirectBeamBackgroundQRange",
@@ -75,7 +161,9 @@ __all__ = [
     "He3PolarizationFunction",
     "He3TransmissionEmptyGlass",
     "He3TransmissionFunction",
+    "HistogramBins",
     "NoAnalyzer",
+    "PiecewiseTransmissionFunction",
     "PolarizationAnalysisWorkflow",
     "PolarizationCorrectedData",
     "Polarizer",
@@ -85,6 +173,7 @@ __all__ = [
     "SupermirrorEfficiencyFunction",
     "SupermirrorWorkflow",
     "TotalPolarizationCorrectedData",
+    "TotalPolarizationCorrectedHistogram",
     "TransmissionFunction",
     "Up",
 ]
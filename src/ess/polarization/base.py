@@ -1,13 +1,20 @@
 # SPDX-License-Identifier: BSD-3-Clause
 # Copyright (c) 2023 Scipp contributors (https://github.com/scipp)
-from collections.abc import Mapping
+from collections.abc import Mapping, Sequence
+from dataclasses import dataclass
 from typing import NewType
 
 import numpy as np
 import sciline as sl
 import scipp as sc
 
-from .he3 import Polarized, ReducedDirectBeamData, ReducedDirectBeamDataNoCell
+from .he3 import (
+    He3PolarizationFunction,
+    He3TransmissionFunction,
+    Polarized,
+    ReducedDirectBeamData,
+    ReducedDirectBeamDataNoCell,
+)
 from .types import (
     Analyzer,
     Down,
@@ -74,9 +81,184 @@ def determine_run_section(
     return RunSectionLog(sc.Dataset(logs))
 
 
+def _polarization_cut_times(
+    polarization_function: He3PolarizationFunction,
+    start: float,
+    stop: float,
+    max_change: float,
+    unit: sc.Unit,
+) -> np.ndarray:
+    # P(t) = C exp(-t/T1) is monotonic, so we can place the cuts at equidistant
+    # polarization values and invert P(t) analytically to obtain the cut times.
+    C = polarization_function.C.to(unit='', dtype='float64').value
+    T1 = polarization_function.T1.to(unit=unit, dtype='float64').value
+    p_start = C * np.exp(-start / T1)
+    p_stop = C * np.exp(-stop / T1)
+    n = int(np.ceil(abs(p_stop - p_start) / max_change))
+    if n <= 1:
+        return np.empty(0)
+    levels = np.linspace(p_start, p_stop, num=n + 1)[1:-1]
+    return -T1 * np.log(levels / C)
+
+
+def subdivide_sample_sections(
+    run_section: RunSectionLog,
+    transmission_functions: Sequence[He3TransmissionFunction],
+    wavelength: sc.Variable,
+    tolerance: float,
+) -> RunSectionLog:
+    """
+    Subdivide sample sections such that the transmission is approximately constant.
+
+    A sample section is cut only if the transmission of any of the given cells changes
+    by more than the relative ``tolerance`` within the section. The existing section
+    bounds are preserved exactly, new bounds are inserted such that the change of the
+    cell polarization is equal in all sub-intervals of a section. Downstream, each
+    sub-interval can thus be treated as having a time-independent transmission.
+
+    Since the transmission of a He3 cell is ``T = T_E exp(-O(lambda) (1 -/+ P(t)))``,
+    the relative change of the transmission within a sub-interval is bounded by
+    ``exp(O(lambda_max) * dP) - 1``, where ``dP`` is the change of the polarization.
+    The largest opacity is attained at the largest wavelength.
+
+    Note that the transmission functions are typically fitted to direct-beam data
+    extracted from the reduced data. The subdivided run-section log is thus used to
+    re-run the reduction workflow after the fit.
+
+    Parameters
+    ----------
+    run_section:
+        Run-section log, as returned by :py:func:`determine_run_section`. The last
+        entry defines the end of the last section, i.e., it is not subdivided.
+    transmission_functions:
+        Fitted transmission functions of the cells in the beam during the sample
+        sections, e.g., the polarizer and the analyzer.
+    wavelength:
+        Wavelengths at which the transmission is required. Only the maximum is used.
+    tolerance:
+        Maximum relative change of the transmission within a sub-interval.
+
+    Returns
+    -------
+    :
+        Run-section log with additional entries within sample sections.
+    """
+    if tolerance <= 0:
+        raise ValueError(f'Tolerance must be positive, got {tolerance}.')
+    time = run_section.coords['time']
+    max_changes = [
+        np.log1p(tolerance)
+        / transmission.opacity_function(wavelength.max()).to(unit='').value
+        for transmission in transmission_functions
+    ]
+    is_sample = run_section['sample_in_beam'].values
+    times = [time.values]
+    for i in np.flatnonzero(is_sample[:-1]):
+        for transmission, max_change in zip(
+            transmission_functions, max_changes, strict=True
+        ):
+            times.append(
+                _polarization_cut_times(
+                    transmission.polarization_function,
+                    start=time.values[i],
+                    stop=time.values[i + 1],
+                    max_change=max_change,
+                    unit=time.unit,
+                )
+            )
+    new_times = np.unique(np.concatenate(times))
+    # Each new entry inherits the log values of the section it was inserted into.
+    section = np.searchsorted(time.values, new_times, side='right') - 1
+    subdivided = run_section['time', section]
+    subdivided.coords['time'] = sc.array(
+        dims=time.dims, values=new_times, unit=time.unit, dtype=time.dtype
+    )
+    return RunSectionLog(subdivided)
+
+
 ReducedDataByRunSectionAndWavelength = NewType(
     'ReducedDataByRunSectionAndWavelength', sc.DataArray
 )
+"""
+Reduced data binned into run sections and wavelength.
+
+The run sections are laid out sorted by kind, as defined by :py:class:`RunSectionIndex`.
+"""
+
+
+def is_sample_channel(
+    coords: Mapping[str, sc.Variable],
+    polarizer_spin: sc.Variable,
+    analyzer_spin: sc.Variable,
+) -> sc.Variable:
+    return (
+        coords['sample_in_beam']
+        & coords['polarizer_in_beam']
+        & coords['analyzer_in_beam']
+        & (coords['polarizer_spin'] == polarizer_spin)
+        & (coords['analyzer_spin'] == analyzer_spin)
+    )
+
+
+def _run_section_kinds(
+    coords: Mapping[str, sc.Variable],
+) -> dict[str, sc.Variable]:
+    # TODO We need all "polarized" runs, can we assume that
+    # ReducedDataByRunSectionAndWavelength does not contain any depolarized data?
+    sample = coords['sample_in_beam']
+    polarizer = coords['polarizer_in_beam']
+    analyzer = coords['analyzer_in_beam']
+    return {
+        'direct_beam': ~(sample | polarizer | analyzer),
+        'polarizer': polarizer & ~sample & ~analyzer,
+        'analyzer': analyzer & ~sample & ~polarizer,
+        'sample_up_up': is_sample_channel(coords, spin_up, spin_up),
+        'sample_up_down': is_sample_channel(coords, spin_up, spin_down),
+        'sample_down_up': is_sample_channel(coords, spin_down, spin_up),
+        'sample_down_down': is_sample_channel(coords, spin_down, spin_down),
+    }
+
+
+@dataclass(frozen=True)
+class RunSectionIndex:
+    """
+    Index of run sections, grouped by kind.
+
+    Reduced data is laid out such that all run sections of a given kind, e.g., direct
+    beam without cells or a given sample spin channel, form a contiguous range. Within
+    a range the sections are sorted by time. Selecting all sections of a kind is then
+    a slice, i.e., a view into the reduced data instead of a copy.
+    """
+
+    order: np.ndarray
+    """Permutation of the run sections, sorting them by kind."""
+    ranges: dict[str, slice]
+    """Range of each kind of run section, after applying :py:attr:`order`."""
+
+    def select(self, data: sc.DataArray, kind: str) -> sc.DataArray:
+        """Return a view of all run sections of the given kind."""
+        return data['time', self.ranges[kind]]
+
+
+def build_run_section_index(run_section: RunSectionLog) -> RunSectionIndex:
+    """
+    Build an index of the run sections in the log, grouped by kind.
+
+    The last entry of the log defines the end of the last section and is therefore not
+    included in the index. Sections matching none of the kinds, e.g., with the sample
+    in the beam but not all cells, are placed last and are not part of any range.
+    """
+    sections = run_section['time', :-1]
+    kinds = _run_section_kinds(sections)
+    key = np.full(sections.sizes['time'], len(kinds))
+    for i, selected in enumerate(kinds.values()):
+        key[selected.values] = i
+    order = np.argsort(key, kind='stable')
+    bounds = np.searchsorted(key[order], np.arange(len(kinds) + 1))
+    return RunSectionIndex(
+        order=order,
+        ranges={kind: slice(bounds[i], bounds[i + 1]) for i, kind in enumerate(kinds)},
+    )
 
 
 def dummy_reduction(
@@ -94,6 +276,7 @@ def dummy_reduction(
 def run_reduction_workflow(
     run_section: RunSectionLog,
     wavelength_bands: WavelengthBins,
+    index: RunSectionIndex,
 ) -> ReducedDataByRunSectionAndWavelength:
     """
     Run the reduction workflow.
@@ -104,119 +287,96 @@ def run_reduction_workflow(
 
     The reduction workflow must return normalized event data, binned into time and
     wavelength bins. The time bands define intervals of different meaning, such as
-    sample runs, direct beam runs, and spin states.
+    sample runs, direct beam runs, and spin states. The time bands are laid out
+    sorted by kind, as defined by the run-section index. The time coordinate gives the
+    center of each time band, the bounds are stored as 'time_start' and 'time_end'.
     """
     # TODO
-    # Subdivide sample section into smaller intervals, or return numerator/denominator
-    # separately? The latter would complicate things when supporting different
-    # kinds of workflows, performing different kinds of normalizations.
-    # We need to be careful when subdividing and (1) exactly preserve existing bounds
-    # and (2) introduce new bounds using some heuristics that yield approximately
-    # equal time intervals (for the sample runs).
-    data = dummy_reduction(
-        time_bands=run_section.coords['time'],
-        wavelength_bands=wavelength_bands,
-    )
-    for name, log in run_section.items():
+    # Return numerator/denominator separately instead of subdividing sample sections?
+    # The latter would complicate things when supporting different kinds of
+    # workflows, performing different kinds of normalizations. Sample sections can be
+    # subdivided with `subdivide_sample_sections` before running this.
+    time = run_section.coords['time']
+    data = dummy_reduction(time_bands=time, wavelength_bands=wavelength_bands)
+    data.coords['time'] = sc.midpoints(time)
+    data.coords['time_start'] = time[:-1]
+    data.coords['time_end'] = time[1:]
+    for name, log in run_section['time', :-1].items():
         data.coords[name] = log.data
+    # This is the only copy of the data made for selecting run sections. An actual
+    # reduction should bin directly into this order.
+    data = data['time', index.order]
     return ReducedDataByRunSectionAndWavelength(data)
 
 
 def extract_direct_beam(
     data: ReducedDataByRunSectionAndWavelength,
+    index: RunSectionIndex,
 ) -> ReducedDirectBeamDataNoCell:
     """Extract direct beam without any cells from direct beam data."""
-    is_direct_beam = ~(
-        data.coords['sample_in_beam']
-        | data.coords['polarizer_in_beam']
-        | data.coords['analyzer_in_beam']
-    )
     # We select all bins that correspond to direct-beam run sections. This preserves
     # the separation into distinct direct beam runs, which is required later for
     # fitting a time-decay function.
-    return ReducedDirectBeamDataNoCell(data[is_direct_beam])
+    return ReducedDirectBeamDataNoCell(index.select(data, 'direct_beam'))
 
 
 def extract_polarizer_direct_beam_polarized(
     data: ReducedDataByRunSectionAndWavelength,
+    index: RunSectionIndex,
 ) -> ReducedDirectBeamData[Polarizer, Polarized]:
     """Extract run sections with polarized polarizer from direct beam data."""
-    # TODO We need all "polarized" runs, can we assume that
-    # ReducedDataByRunSectionAndWavelength does not contain any depolarized data?
-    select = (
-        data.coords['polarizer_in_beam']
-        & ~data.coords['sample_in_beam']
-        & ~data.coords['analyzer_in_beam']
-    )
-    return ReducedDirectBeamData[Polarizer, Polarized](data[select])
+    return ReducedDirectBeamData[Polarizer, Polarized](index.select(data, 'polarizer'))
 
 
 def extract_analyzer_direct_beam_polarized(
     data: ReducedDataByRunSectionAndWavelength,
+    index: RunSectionIndex,
 ) -> ReducedDirectBeamData[Analyzer, Polarized]:
     """Extract run sections with polarized analyzer from direct beam data."""
-    # TODO We need all "polarized" runs, can we assume that
-    # ReducedDataByRunSectionAndWavelength does not contain any depolarized data?
-    select = (
-        data.coords['analyzer_in_beam']
-        & ~data.coords['sample_in_beam']
-        & ~data.coords['polarizer_in_beam']
-    )
-    return ReducedDirectBeamData[Analyzer, Polarized](data[select])
-
-
-def is_sample_channel(
-    coords: Mapping[str, sc.Variable],
-    polarizer_spin: sc.Variable,
-    analyzer_spin: sc.Variable,
-) -> sc.Variable:
-    return (
-        coords['sample_in_beam']
-        & coords['polarizer_in_beam']
-        & coords['analyzer_in_beam']
-        & (coords['polarizer_spin'] == polarizer_spin)
-        & (coords['analyzer_spin'] == analyzer_spin)
-    )
+    return ReducedDirectBeamData[Analyzer, Polarized](index.select(data, 'analyzer'))
 
 
 def extract_sample_data_up_up(
     data: ReducedDataByRunSectionAndWavelength,
+    index: RunSectionIndex,
 ) -> ReducedSampleDataBySpinChannel[Up, Up]:
     """Extract sample data for spin channel up-up."""
-    return ReducedSampleDataBySpinChannel[Up, Up](
-        is_sample_channel(data, spin_up, spin_up)
-    )
+    return ReducedSampleDataBySpinChannel[Up, Up](index.select(data, 'sample_up_up'))
 
 
 def extract_sample_data_up_down(
     data: ReducedDataByRunSectionAndWavelength,
+    index: RunSectionIndex,
 ) -> ReducedSampleDataBySpinChannel[Up, Down]:
     """Extract sample data for spin channel up-down."""
     return ReducedSampleDataBySpinChannel[Up, Down](
-        is_sample_channel(data, spin_up, spin_down)
+        index.select(data, 'sample_up_down')
     )
 
 
 def extract_sample_data_down_up(
     data: ReducedDataByRunSectionAndWavelength,
+    index: RunSectionIndex,
 ) -> ReducedSampleDataBySpinChannel[Down, Up]:
     """Extract sample data for spin channel down-up."""
     return ReducedSampleDataBySpinChannel[Down, Up](
-        is_sample_channel(data, spin_down, spin_up)
+        index.select(data, 'sample_down_up')
     )
 
 
 def extract_sample_data_down_down(
     data: ReducedDataByRunSectionAndWavelength,
+    index: RunSectionIndex,
 ) -> ReducedSampleDataBySpinChannel[Down, Down]:
     """Extract sample data for spin channel down-down."""
     return ReducedSampleDataBySpinChannel[Down, Down](
-        is_sample_channel(data, spin_down, spin_down)
+        index.select(data, 'sample_down_down')
     )
 
 
 providers = (
     determine_run_section,
+    build_run_section_index,
     run_reduction_workflow,
     extract_direct_beam,
     extract_polarizer_direct_beam_polarized,
@@ -0,0 +1,453 @@
+# SPDX-License-Identifier: BSD-3-Clause
+# Copyright (c) 2025 Scipp contributors (https://github.com/scipp)
+"""
+Batch correction of many runs from the command line.
+
+The ``esspolarization-batch`` command reads a JSON manifest describing the cells and
+the sample runs, fits the cells once, corrects the runs in a process pool, and writes
+one output file per run:
+
+.. code-block:: console
+
+    esspolarization-batch manifest.json --max-workers 8
+
+A manifest looks as follows. Relative paths are relative to the manifest:
+
+.. code-block:: json
+
+    {
+      "output_dir": "corrected",
+      "cells": {
+        "polarizer": {
+          "kind": "he3",
+          "direct_beam_no_cell": "direct_beam_no_cell.h5",
+          "depolarized": "direct_beam_depolarized.h5",
+          "polarized": "direct_beam_polarized.h5",
+          "transmission_empty_glass": 0.9,
+          "opacity0": {"value": 0.88, "unit": "1/angstrom"}
+        },
+        "analyzer": {"kind": "supermirror", "table": "analyzer_efficiency.h5"}
+      },
+      "flipper_efficiency": {"polarizer": 1.0, "analyzer": 0.98},
+      "runs": {
+        "run-001": {
+          "up_up": "run-001-uu.h5",
+          "up_down": "run-001-ud.h5",
+          "down_up": "run-001-du.h5",
+          "down_down": "run-001-dd.h5"
+        }
+      }
+    }
+
+Cells are one of:
+
+- ``"he3"``: Fit of a :py:func:`ess.polarization.He3CellWorkflow` to direct-beam data.
+  Without ``"depolarized"`` the opacity is given by ``"opacity0"`` (in-situ),
+  otherwise ``"opacity0"`` is the initial guess of the opacity fit.
+- ``"supermirror"``: An :py:class:`ess.polarization.EfficiencyLookupTable`.
+- ``"file"``: A transmission function saved with
+  :py:func:`ess.polarization.io.save_transmission_function`.
+
+Data files are Scipp HDF5 files, as written by :py:meth:`scipp.DataArray.save_hdf5`.
+Scalars are numbers (dimensionless) or objects with ``"value"`` and ``"unit"``.
+
+The output of each run is a :py:class:`scipp.DataGroup` with fields ``upup``,
+``updown``, ``downup``, and ``downdown``, written to ``<output_dir>/<run>.h5``. The
+fitted cells are saved to ``<output_dir>/cells/``. Outputs are written atomically, so
+an interrupted batch can be resumed by running the same command again: Existing run
+outputs are skipped and the saved cells are used instead of fitting again. Pass
+``--overwrite`` to start from scratch.
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+from collections.abc import Callable, Mapping
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from functools import partial
+from pathlib import Path
+from typing import Any
+
+import scipp as sc
+from sciline.scheduler import NaiveScheduler
+
+from . import io
+from .correction import CorrectionWorkflow
+from .he3 import (
+    Depolarized,
+    DirectBeamNoCell,
+    He3CellWorkflow,
+    He3DirectBeam,
+    He3Opacity0,
+    He3TransmissionEmptyGlass,
+    Polarized,
+    compute_transmission_fraction_from_direct_beam,
+)
+from .supermirror import (
+    EfficiencyLookupTable,
+    SupermirrorEfficiencyFunction,
+    SupermirrorWorkflow,
+)
+from .types import (
+    Analyzer,
+    Down,
+    FlipperEfficiency,
+    Polarizer,
+    ReducedSampleDataBySpinChannel,
+    TotalPolarizationCorrectedData,
+    TransmissionFunction,
+    Up,
+)
+
+ELEMENTS = {'polarizer': Polarizer, 'analyzer': Analyzer}
+"""Polarizing elements by cell name in a manifest."""
+_CHANNELS = {
+    'up_up': (Up, Up),
+    'up_down': (Up, Down),
+    'down_up': (Down, Up),
+    'down_down': (Down, Down),
+}
+
+
+@dataclass
+class StageThroughput:
+    """Items, events, and wall-clock time of a stage of a batch."""
+
+    name: str
+    items: int = 0
+    events: int = 0
+    seconds: float = 0.0
+
+    @property
+    def events_per_second(self) -> float:
+        return self.events / self.seconds if self.seconds > 0 else 0.0
+
+    @property
+    def items_per_minute(self) -> float:
+        return 60 * self.items / self.seconds if self.seconds > 0 else 0.0
+
+
+@dataclass
+class BatchReport:
+    """Result of :py:func:`run_batch`."""
+
+    fit: StageThroughput = field(default_factory=lambda: StageThroughput('fit'))
+    correct: StageThroughput = field(default_factory=lambda: StageThroughput('correct'))
+    completed: list[str] = field(default_factory=list)
+    """Runs corrected by this batch."""
+    skipped: list[str] = field(default_factory=list)
+    """Runs with existing output, skipped when resuming."""
+    failed: dict[str, str] = field(default_factory=dict)
+    """Errors of runs that could not be corrected, by run name."""
+
+    def summary(self) -> str:
+        return '\n'.join(
+            (
+                f'fit: {self.fit.items} cells in {self.fit.seconds:.2f} s',
+                f'correct: {self.correct.items} runs in {self.correct.seconds:.2f} s '
+                f'({self.correct.items_per_minute:.1f} runs/min, '
+                f'{self.correct.events_per_second:.3g} events/s)',
+                f'skipped: {len(self.skipped)} runs with existing output',
+                f'failed: {len(self.failed)} runs',
+            )
+        )
+
+
+def _resolve(path: str, base: Path) -> Path:
+    return base / path
+
+
+def _scalar(spec: float | Mapping[str, Any]) -> sc.Variable:
+    if isinstance(spec, Mapping):
+        return sc.scalar(float(spec['value']), unit=spec.get('unit', ''))
+    return sc.scalar(float(spec))
+
+
+def _load(path: str, base: Path) -> sc.DataArray:
+    return sc.io.load_hdf5(_resolve(path, base))
+
+
+def cell_workflow_result(
+    element: type, spec: Mapping[str, Any], base: Path
+) -> TransmissionFunction:
+    """
+    Fit or load the transmission function of a cell.
+
+    Parameters
+    ----------
+    element:
+        :py:class:`ess.polarization.Polarizer` or
+        :py:class:`ess.polarization.Analyzer`.
+    spec:
+        The cell, in the format of the ``cells`` of a manifest.
+    base:
+        Directory relative to which paths in ``spec`` are resolved.
+    """
+    kind = spec.get('kind')
+    if kind == 'file':
+        return io.load_transmission_function(_resolve(spec['path'], base))
+    if kind == 'supermirror':
+        workflow = SupermirrorWorkflow()
+        workflow[SupermirrorEfficiencyFunction[element]] = EfficiencyLookupTable[
+            element
+        ](table=_load(spec['table'], base))
+        return workflow.compute(TransmissionFunction[element])
+    if kind == 'he3':
+        workflow = He3CellWorkflow(in_situ='depolarized' not in spec)
+        workflow.insert(compute_transmission_fraction_from_direct_beam)
+        workflow[DirectBeamNoCell] = _load(spec['direct_beam_no_cell'], base)
+        workflow[He3DirectBeam[element, Polarized]] = _load(spec['polarized'], base)
+        if 'depolarized' in spec:
+            workflow[He3DirectBeam[element, Depolarized]] = _load(
+                spec['depolarized'], base
+            )
+        workflow[He3TransmissionEmptyGlass[element]] = _scalar(
+            spec['transmission_empty_glass']
+        )
+        workflow[He3Opacity0[element]] = _scalar(spec['opacity0'])
+        return workflow.compute(TransmissionFunction[element])
+    raise ValueError(
+        f"Unknown cell kind {kind!r}, expected 'he3', 'supermirror', or 'file'."
+    )
+
+
+def fit_cells(manifest: Mapping[str, Any], base: Path) -> dict[str, Any]:
+    """Fit or load the polarizer and analyzer of a manifest, by cell name."""
+    cells = manifest['cells']
+    if set(cells) != set(ELEMENTS):
+        raise ValueError(f'Expected cells {[*ELEMENTS]}, got {[*cells]}.')
+    return {
+        name: cell_workflow_result(ELEMENTS[name], spec, base)
+        for name, spec in cells.items()
+    }
+
+
+def correction_workflow(
+    cells: Mapping[str, Any], flipper_efficiency: Mapping[str, float]
+) -> Any:
+    """
+    Correction workflow with the given cells and flipper efficiencies.
+
+    Flippers not in ``flipper_efficiency`` have efficiency 1.
+    """
+    workflow = CorrectionWorkflow()
+    for name, element in ELEMENTS.items():
+        workflow[TransmissionFunction[element]] = cells[name]
+        if name in flipper_efficiency:
+            workflow[FlipperEfficiency[element]] = FlipperEfficiency[element](
+                value=float(flipper_efficiency[name])
+            )
+    return workflow
+
+
+def _event_count(da: sc.DataArray) -> int:
+    if da.bins is None:
+        return da.size
+    return int(da.bins.size().sum().value)
+
+
+def _write_atomic(dg: sc.DataGroup, filename: Path) -> None:
+    # Resuming relies on outputs being complete if they exist.
+    staging = filename.with_name(f'.{filename.name}.partial')
+    dg.save_hdf5(staging)
+    os.replace(staging, filename)
+
+
+def correct_files(
+    workflow: Any,
+    files: Mapping[str, str],
+    base: Path,
+    output: Path,
+    scheduler: Any = None,
+) -> int:
+    """
+    Correct the spin channels of a run, write the result, and count the events.
+
+    The workflow is computed with the given sciline scheduler, by default the
+    threaded Dask scheduler.
+    """
+    workflow = workflow.copy()
+    events = 0
+    for channel, (polarizer_spin, analyzer_spin) in _CHANNELS.items():
+        data = _load(files[channel], base)
+        events += _event_count(data)
+        workflow[ReducedSampleDataBySpinChannel[polarizer_spin, analyzer_spin]] = data
+    result = workflow.compute(TotalPolarizationCorrectedData, scheduler=scheduler)
+    _write_atomic(
+        sc.DataGroup(
+            upup=result.upup,
+            updown=result.updown,
+            downup=result.downup,
+            downdown=result.downdown,
+        ),
+        output,
+    )
+    return events
+
+
+_worker_workflow = None
+_worker_scheduler = None
+
+
+def _init_worker(workflow: Any, scheduler: Any = None) -> None:
+    global _worker_workflow, _worker_scheduler
+    _worker_workflow = workflow
+    _worker_scheduler = scheduler
+
+
+def _correct_run(
+    files: Mapping[str, str], base: Path, output: Path
+) -> tuple[int, float]:
+    """Correct a single run, runs in worker processes."""
+    start = time.perf_counter()
+    events = correct_files(_worker_workflow, files, base, output, _worker_scheduler)
+    return events, time.perf_counter() - start
+
+
+def run_batch(
+    manifest: str | Path,
+    *,
+    max_workers: int | None = None,
+    overwrite: bool = False,
+    report: Callable[[str], None] | None = None,
+) -> BatchReport:
+    """
+    Fit the cells and correct all runs of a manifest.
+
+    See the module documentation for the manifest format.
+
+    Parameters
+    ----------
+    manifest:
+        Path of the JSON manifest.
+    max_workers:
+        Number of processes used for correcting runs. If None, correct runs one by one
+        in the calling process.
+    overwrite:
+        If True, fit the cells and correct all runs even if outputs exist. Otherwise,
+        saved cells are reused and runs with existing outputs are skipped.
+    report:
+        Called with a progress message after each stage and run.
+
+    Returns
+    -------
+    :
+        Throughput of the stages and the runs that were corrected, skipped, or
+        failed.
+    """
+    report = report or (lambda _: None)
+    manifest = Path(manifest)
+    base = manifest.parent
+    content = json.loads(manifest.read_text())
+    output_dir = _resolve(content.get('output_dir', '.'), base)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    result = BatchReport()
+
+    start = time.perf_counter()
+    cells_dir = output_dir / 'cells'
+    if cells_dir.exists() and not overwrite:
+        cells = {
+            name: io.load_transmission_function(cells_dir / f'{name}.h5')
+            for name in ELEMENTS
+        }
+        report(f'fit: loaded cells from {cells_dir}')
+    else:
+        cells = fit_cells(content, base)
+        # Save into a temporary directory first, such that an interrupted fit is not
+        # mistaken for saved cells.
+        staging = output_dir / '.cells.partial'
+        staging.mkdir(exist_ok=True)
+        for name, cell in cells.items():
+            io.save_transmission_function(cell, staging / f'{name}.h5')
+        if cells_dir.exists():
+            for path in cells_dir.iterdir():
+                path.unlink()
+            cells_dir.rmdir()
+        os.replace(staging, cells_dir)
+        result.fit.items = len(cells)
+    result.fit.seconds = time.perf_counter() - start
+    report(f'fit: {result.fit.items} cells in {result.fit.seconds:.2f} s')
+
+    workflow = correction_workflow(cells, content.get('flipper_efficiency', {}))
+    pending = {}
+    for name, files in content['runs'].items():
+        if missing := set(_CHANNELS) - set(files):
+            raise ValueError(f'Run {name!r} is missing channels {sorted(missing)}.')
+        output = output_dir / f'{name}.h5'
+        if output.exists() and not overwrite:
+            result.skipped.append(name)
+        else:
+            pending[name] = (files, base, output)
+
+    def record(name: str, outcome: Callable[[], tuple[int, float]]) -> None:
+        try:
+            events, seconds = outcome()
+        except Exception as error:
+            result.failed[name] = repr(error)
+            report(f'{name}: failed with {error!r}')
+            return
+        result.completed.append(name)
+        result.correct.items += 1
+        result.correct.events += events
+        report(f'{name}: {events} events in {seconds:.2f} s')
+
+    start = time.perf_counter()
+    if max_workers is None or max_workers <= 1:
+        _init_worker(workflow)
+        for name, args in pending.items():
+            record(name, partial(_correct_run, *args))
+    else:
+        # Fitting and correcting with the threaded scheduler leaves threads behind,
+        # forking could deadlock the workers. The workers run single-threaded, such
+        # that they do not oversubscribe the cores.
+        with ProcessPoolExecutor(
+            max_workers=max_workers,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker,
+            initargs=(workflow, NaiveScheduler()),
+        ) as executor:
+            futures = {
+                executor.submit(_correct_run, *args): name
+                for name, args in pending.items()
+            }
+            for future in as_completed(futures):
+                record(futures[future], future.result)
+    result.correct.seconds = time.perf_counter() - start
+    report(result.summary())
+    return result
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Entry point of the ``esspolarization-batch`` command."""
+    parser = argparse.ArgumentParser(
+        prog='esspolarization-batch',
+        description='Fit cells and apply polarization corrections to many runs.',
+    )
+    parser.add_argument('manifest', type=Path, help='JSON manifest of the batch.')
+    parser.add_argument(
+        '--max-workers',
+        type=int,
+        default=os.cpu_count(),
+        help='Number of processes for correcting runs (default: number of CPUs).',
+    )
+    parser.add_argument(
+        '--overwrite',
+        action='store_true',
+        help='Refit cells and correct all runs, instead of resuming.',
+    )
+    args = parser.parse_args(argv)
+    result = run_batch(
+        args.manifest,
+        max_workers=args.max_workers,
+        overwrite=args.overwrite,
+        report=lambda message: print(message, file=sys.stderr),  # noqa: T201
+    )
+    return 1 if result.failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
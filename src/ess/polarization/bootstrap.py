@@ -0,0 +1,325 @@
+# SPDX-License-Identifier: BSD-3-Clause
+# Copyright (c) 2025 Scipp contributors (https://github.com/scipp)
+"""
+Bootstrap and jackknife uncertainties of the He3 cell fits.
+
+The He3 fit providers return the best-fit parameters only. The estimators in this
+module repeat the opacity and polarization fits on resampled direct-beam data and
+return the distribution of the parameters alongside the transmission function.
+"""
+
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from functools import partial
+from typing import Generic, Literal
+
+import numpy as np
+import scipp as sc
+from scipy.optimize import curve_fit
+
+from .he3 import (
+    He3TransmissionFunction,
+    _with_midpoints,
+    get_he3_transmission_incoming_unpolarized_from_fit_to_direct_beam,
+    he3_opacity_function_from_beam_data,
+)
+from .types import PolarizingElement
+
+
+@dataclass
+class He3FitDistribution(Generic[PolarizingElement]):
+    """Best fit of a He3 cell and the distribution of the fit parameters."""
+
+    transmission_function: He3TransmissionFunction[PolarizingElement]
+    """Transmission function from the fit to the full data."""
+    samples: sc.DataGroup
+    """
+    Fitted ``opacity0``, ``C``, and ``T1`` of each resample, along dim 'sample'.
+
+    Samples of failed fits are NaN. For the jackknife, the coord 'left_out' tells
+    whether a measurement was left out of the 'opacity' or the 'polarization' fit.
+    """
+    method: Literal['bootstrap', 'jackknife']
+    """Resampling method used for obtaining the samples."""
+
+    def std(self) -> sc.DataGroup:
+        """Standard uncertainty of the parameters, ignoring failed fits."""
+        if self.method == 'bootstrap':
+            return sc.DataGroup(
+                {
+                    name: sc.nanstd(samples.data, ddof=1)
+                    for name, samples in self.samples.items()
+                }
+            )
+        return sc.DataGroup(
+            {
+                name: sc.sqrt(_jackknife_variance(samples))
+                for name, samples in self.samples.items()
+            }
+        )
+
+
+def _jackknife_variance(samples: sc.DataArray) -> sc.Variable:
+    # The opacity and polarization data are independent, the variance is the sum of
+    # the delete-one jackknife variances of the two groups.
+    variance = sc.scalar(0.0, unit=samples.unit**2)
+    for group in ('opacity', 'polarization'):
+        values = samples.data[samples.coords['left_out'] == sc.scalar(group)]
+        values = values[~sc.isnan(values)]
+        n = values.sizes['sample']
+        if n > 1:
+            variance += ((values - values.mean()) ** 2).sum() * ((n - 1) / n)
+    return variance
+
+
+# The models below are the He3 transmission models in plain NumPy, with analytic
+# Jacobians. Wavelengths are in angstrom and times in seconds.
+
+
+def _opacity_model(
+    wavelength: np.ndarray, opacity0: float, *, glass: float
+) -> np.ndarray:
+    return glass * np.exp(-opacity0 * wavelength)
+
+
+def _opacity_jacobian(
+    wavelength: np.ndarray, opacity0: float, *, glass: float
+) -> np.ndarray:
+    value = _opacity_model(wavelength, opacity0, glass=glass)
+    return (-wavelength * value)[:, np.newaxis]
+
+
+def _polarization_model(
+    x: np.ndarray, C: float, T1: float, *, opacity0: float, glass: float
+) -> np.ndarray:
+    opacity = opacity0 * x[0]
+    polarization = C * np.exp(-x[1] / T1)
+    return glass * np.exp(-opacity) * np.cosh(opacity * polarization)
+
+
+def _polarization_jacobian(
+    x: np.ndarray, C: float, T1: float, *, opacity0: float, glass: float
+) -> np.ndarray:
+    opacity = opacity0 * x[0]
+    time = x[1]
+    polarization = C * np.exp(-time / T1)
+    # d/dP of T_E * exp(-O) * cosh(O * P)
+    d_polarization = glass * np.exp(-opacity) * np.sinh(opacity * polarization)
+    d_polarization *= opacity
+    return np.stack(
+        [
+            d_polarization * polarization / C,
+            d_polarization * polarization * time / T1**2,
+        ],
+        axis=-1,
+    )
+
+
+def _fit_samples(
+    indices: list[tuple[np.ndarray, np.ndarray]],
+    opacity_data: tuple[np.ndarray, np.ndarray, np.ndarray | None],
+    polarization_data: tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray | None],
+    glass: float,
+    p0: tuple[float, float, float],
+) -> np.ndarray:
+    """
+    Fit opacity and polarization to each resample, runs in worker processes.
+
+    Each resample is a pair of index arrays, selecting the direct-beam measurements
+    used for the opacity and the polarization fit. Both fits are warm-started from the
+    fit to the full data. Returns an array of shape (n_samples, 3) with opacity0, C,
+    and T1. Failed fits are NaN.
+    """
+    wavelength, opacity_y, opacity_sigma = opacity_data
+    pol_wavelength, pol_time, pol_y, pol_sigma = polarization_data
+    result = np.full((len(indices), 3), np.nan)
+    for i, (opacity_index, polarization_index) in enumerate(indices):
+        try:
+            (opacity0,), _ = curve_fit(
+                partial(_opacity_model, glass=glass),
+                wavelength[opacity_index].ravel(),
+                opacity_y[opacity_index].ravel(),
+                p0=p0[:1],
+                sigma=None
+                if opacity_sigma is None
+                else opacity_sigma[opacity_index].ravel(),
+                jac=partial(_opacity_jacobian, glass=glass),
+            )
+            x = np.stack(
+                [
+                    pol_wavelength[polarization_index].ravel(),
+                    pol_time[polarization_index].ravel(),
+                ]
+            )
+            (C, T1), _ = curve_fit(
+                partial(_polarization_model, opacity0=opacity0, glass=glass),
+                x,
+                pol_y[polarization_index].ravel(),
+                p0=p0[1:],
+                sigma=None
+                if pol_sigma is None
+                else pol_sigma[polarization_index].ravel(),
+                jac=partial(_polarization_jacobian, opacity0=opacity0, glass=glass),
+            )
+        except (RuntimeError, ValueError):
+            continue
+        result[i] = opacity0, C, T1
+    return result
+
+
+def _as_arrays(
+    data: sc.DataArray, dims: tuple[str, ...]
+) -> tuple[dict[str, np.ndarray], np.ndarray, np.ndarray | None]:
+    """Broadcast coords and values to the dims and return them as NumPy arrays."""
+    data = data.transpose(dims)
+    coords = {
+        'wavelength': data.coords['wavelength'].to(unit='angstrom', dtype='float64'),
+    }
+    if 'time' in data.coords:
+        coords['time'] = data.coords['time'].to(unit='s', dtype='float64')
+    coords = {
+        name: coord.broadcast(sizes=data.sizes).values for name, coord in coords.items()
+    }
+    sigma = None if data.variances is None else np.sqrt(data.variances)
+    return coords, data.values, sigma
+
+
+def _resample_dim(data: sc.DataArray) -> str:
+    return 'time' if 'time' in data.dims else 'wavelength'
+
+
+def _resample_indices(
+    n: int, method: str, samples: int, rng: np.random.Generator
+) -> list[np.ndarray]:
+    if method == 'bootstrap':
+        return list(rng.integers(0, n, size=(samples, n)))
+    if method == 'jackknife':
+        return [np.delete(np.arange(n), i) for i in range(n)]
+    raise ValueError(f"Expected method 'bootstrap' or 'jackknife', got '{method}'.")
+
+
+def bootstrap_he3_fit(
+    *,
+    transmission_empty_glass: sc.Variable,
+    depolarized: sc.DataArray,
+    polarized: sc.DataArray,
+    opacity0_initial_guess: sc.Variable,
+    method: Literal['bootstrap', 'jackknife'] = 'bootstrap',
+    samples: int = 200,
+    max_workers: int | None = None,
+    seed: int = 0,
+) -> He3FitDistribution:
+    """
+    Fit a He3 cell and estimate the parameter uncertainties by resampling.
+
+    The full fit uses the same providers as :py:func:`ess.polarization.He3CellWorkflow`.
+    The resampled fits use NumPy implementations of the same models with analytic
+    Jacobians, warm-started from the full fit, and run on a process pool. The
+    direct-beam measurements, i.e., the entries along 'time', are resampled. If the
+    depolarized data has no time dimension, its wavelength points are resampled
+    instead. The opacity fit of each resample is used in the polarization fit of the
+    same resample, such that the uncertainty of the opacity propagates to ``C`` and
+    ``T1``.
+
+    Parameters
+    ----------
+    transmission_empty_glass:
+        Transmission of the empty cell glass.
+    depolarized:
+        Transmission fraction of the depolarized cell, for the opacity fit.
+    polarized:
+        Transmission fraction of the polarized cell as a function of time and
+        wavelength, with unpolarized incoming beam.
+    opacity0_initial_guess:
+        Initial guess of the opacity at 1 angstrom.
+    method:
+        'bootstrap' draws ``samples`` resamples with replacement, 'jackknife' leaves
+        out one measurement at a time.
+    samples:
+        Number of bootstrap resamples. The jackknife has one sample per measurement
+        of the opacity and of the polarization fit.
+    max_workers:
+        Number of worker processes. If None or 1, run in the calling process.
+    seed:
+        Seed for drawing bootstrap resamples.
+    """
+    opacity_function = he3_opacity_function_from_beam_data(
+        transmission_empty_glass=transmission_empty_glass,
+        transmission_fraction=depolarized,
+        opacity0_initial_guess=opacity0_initial_guess,
+    )
+    transmission = get_he3_transmission_incoming_unpolarized_from_fit_to_direct_beam(
+        transmission_fraction=polarized,
+        opacity_function=opacity_function,
+        transmission_empty_glass=transmission_empty_glass,
+    )
+    polarization_function = transmission.polarization_function
+
+    depolarized = _with_midpoints(depolarized, 'wavelength')
+    opacity_dim = _resample_dim(depolarized)
+    opacity_coords, opacity_y, opacity_sigma = _as_arrays(
+        depolarized, (opacity_dim, *(d for d in depolarized.dims if d != opacity_dim))
+    )
+    polarized = _with_midpoints(polarized, 'wavelength')
+    pol_dims = ('time', *(d for d in polarized.dims if d != 'time'))
+    pol_coords, pol_y, pol_sigma = _as_arrays(polarized, pol_dims)
+
+    rng = np.random.default_rng(seed)
+    opacity_indices = _resample_indices(
+        depolarized.sizes[opacity_dim], method, samples, rng
+    )
+    polarization_indices = _resample_indices(
+        polarized.sizes['time'], method, samples, rng
+    )
+    if method == 'jackknife':
+        # Leave out one measurement of either fit at a time.
+        opacity_all = np.arange(depolarized.sizes[opacity_dim])
+        polarization_all = np.arange(polarized.sizes['time'])
+        indices = [(index, polarization_all) for index in opacity_indices] + [
+            (opacity_all, index) for index in polarization_indices
+        ]
+        left_out = ['opacity'] * len(opacity_indices) + ['polarization'] * len(
+            polarization_indices
+        )
+        coords = {'left_out': sc.array(dims=['sample'], values=left_out)}
+    else:
+        indices = list(zip(opacity_indices, polarization_indices, strict=True))
+        coords = {}
+
+    glass = float(transmission_empty_glass.to(unit='', dtype='float64').value)
+    p0 = (
+        float(opacity_function.opacity0.to(unit='1/angstrom').value),
+        float(polarization_function.C.to(unit='').value),
+        float(polarization_function.T1.to(unit='s').value),
+    )
+    arguments = (
+        (opacity_coords['wavelength'], opacity_y, opacity_sigma),
+        (pol_coords['wavelength'], pol_coords['time'], pol_y, pol_sigma),
+        glass,
+        p0,
+    )
+    if max_workers is None or max_workers <= 1:
+        fitted = _fit_samples(indices, *arguments)
+    else:
+        chunks = np.array_split(np.arange(len(indices)), max_workers)
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futures = [
+                executor.submit(_fit_samples, [indices[i] for i in chunk], *arguments)
+                for chunk in chunks
+                if len(chunk)
+            ]
+            fitted = np.concatenate([future.result() for future in futures])
+    units = {'opacity0': '1/angstrom', 'C': '', 'T1': 's'}
+    return He3FitDistribution(
+        transmission_function=transmission,
+        samples=sc.DataGroup(
+            {
+                name: sc.DataArray(
+                    sc.array(dims=['sample'], values=fitted[:, i], unit=unit),
+                    coords=coords,
+                )
+                for i, (name, unit) in enumerate(units.items())
+            }
+        ),
+        method=method,
+    )
@@ -0,0 +1,277 @@
+# SPDX-License-Identifier: BSD-3-Clause
+# Copyright (c) 2025 Scipp contributors (https://github.com/scipp)
+"""
+Persistent cache of intermediate workflow results.
+
+Results are stored on disk, keyed by a hash of everything they depend on, i.e., the
+parameters and providers of the upstream graph. When only a downstream parameter of a
+workflow changes, e.g., a flipper efficiency, expensive upstream results such as
+fitted transmission functions are loaded from the cache instead of being recomputed:
+
+.. code-block:: python
+
+    cache = ResultCache('reduction-cache', max_bytes=2**30)
+    workflow = apply_result_cache(
+        workflow,
+        [TransmissionFunction[Polarizer], TransmissionFunction[Analyzer]],
+        cache,
+    )
+    workflow.compute(TotalPolarizationCorrectedData)
+"""
+
+import dataclasses
+import functools
+import hashlib
+import os
+import sys
+import tempfile
+from collections.abc import Hashable, Iterable
+from pathlib import Path
+from typing import Any
+
+import networkx as nx
+import numpy as np
+import sciline
+import scipp as sc
+
+from . import io
+
+_FORMAT_VERSION = 1
+
+
+def _update_with_variable(digest: Any, var: sc.Variable) -> None:
+    digest.update(repr((var.dims, var.shape, str(var.unit), str(var.dtype))).encode())
+    if var.bins is not None:
+        constituents = var.bins.constituents
+        _update(digest, constituents['begin'])
+        _update(digest, constituents['end'])
+        _update(digest, constituents['dim'])
+        _update(digest, constituents['data'])
+        return
+    values = np.asarray(var.values)
+    if values.dtype == object:
+        digest.update(repr(values.tolist()).encode())
+    else:
+        digest.update(np.ascontiguousarray(values).tobytes())
+    if var.variances is not None:
+        digest.update(np.ascontiguousarray(var.variances).tobytes())
+
+
+def _update(digest: Any, obj: Any) -> None:
+    digest.update(type(obj).__qualname__.encode())
+    match obj:
+        case sc.Variable():
+            _update_with_variable(digest, obj)
+        case sc.DataArray():
+            _update(digest, obj.data)
+            for name in ('coords', 'masks'):
+                mapping = getattr(obj, name)
+                for key in sorted(mapping):
+                    digest.update(key.encode())
+                    if name == 'coords':
+                        digest.update(b'aligned' if mapping[key].aligned else b'')
+                    _update(digest, mapping[key])
+        case sc.Dataset() | sc.DataGroup() | dict():
+            if isinstance(obj, sc.Dataset):
+                _update(digest, dict(obj.coords))
+            for key in sorted(obj, key=repr):
+                digest.update(repr(key).encode())
+                _update(digest, obj[key])
+        case list() | tuple():
+            for item in obj:
+                _update(digest, item)
+        case np.ndarray():
+            digest.update(repr((obj.shape, str(obj.dtype))).encode())
+            digest.update(np.ascontiguousarray(obj).tobytes())
+        case os.PathLike() | str() if os.path.isfile(obj):
+            # Parameters such as filenames refer to files which may change. Hashing
+            # their contents is as slow as loading them, so we use size and
+            # modification time, like make.
+            stat = os.stat(obj)
+            digest.update(
+                repr((os.fspath(obj), stat.st_size, stat.st_mtime_ns)).encode()
+            )
+        case _ if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+            for f in dataclasses.fields(obj):
+                if f.compare:
+                    digest.update(f.name.encode())
+                    _update(digest, getattr(obj, f.name))
+        case _:
+            try:
+                converted = io.to_data_group(obj)
+            except TypeError:
+                # Objects without a content-based repr include their id, i.e., they
+                # never produce false cache hits, only misses.
+                digest.update(repr(obj).encode())
+            else:
+                _update(digest, converted)
+
+
+def content_hash(obj: Any) -> str:
+    """Hash of the content of a value, e.g., a workflow parameter."""
+    digest = hashlib.sha256()
+    _update(digest, obj)
+    return digest.hexdigest()
+
+
+@functools.cache
+def _module_source_hash(name: str) -> str:
+    module = sys.modules.get(name)
+    filename = getattr(module, '__file__', None)
+    if filename is None or not os.path.isfile(filename):
+        return ''
+    return hashlib.sha256(Path(filename).read_bytes()).hexdigest()
+
+
+def _provider_identity(provider: Any) -> str:
+    func = getattr(provider, 'func', provider)
+    code = getattr(func, '__code__', None)
+    module = getattr(func, '__module__', '') or ''
+    parts = [module, getattr(func, '__qualname__', repr(func))]
+    # Changes to the provider or to helpers in its module invalidate cached results.
+    parts.append(_module_source_hash(module))
+    if code is not None:
+        parts.append(hashlib.sha256(code.co_code).hexdigest())
+        parts.append(repr(code.co_consts))
+    return '|'.join(parts)
+
+
+def _node_digests(
+    workflow: sciline.Pipeline, keys: Iterable[Hashable]
+) -> dict[Hashable, str]:
+    graph = workflow.underlying_graph
+    nodes = set()
+    for key in keys:
+        nodes |= {key, *nx.ancestors(graph, key)}
+    digests = {}
+    for node in nx.topological_sort(graph.subgraph(nodes)):
+        digest = hashlib.sha256(f'{_FORMAT_VERSION}|{node!r}'.encode())
+        data = graph.nodes[node]
+        if 'value' in data:
+            digest.update(content_hash(data['value']).encode())
+        elif 'provider' in data:
+            digest.update(_provider_identity(data['provider']).encode())
+            inputs = sorted(graph.predecessors(node), key=repr)
+            for parent in inputs:
+                digest.update(digests[parent].encode())
+        else:
+            raise sciline.UnsatisfiedRequirement(f'Missing input {node}.')
+        digests[node] = digest.hexdigest()
+    return digests
+
+
+class ResultCache:
+    """
+    Content-addressed cache of workflow results on disk, with LRU eviction.
+
+    Supports Scipp objects and the transmission functions of this package. Loading a
+    result marks it as recently used, the least recently used results are evicted
+    when the total size exceeds ``max_bytes``.
+
+    Parameters
+    ----------
+    directory:
+        Directory for storing the results. Created if it does not exist.
+    max_bytes:
+        Maximum total size of the stored results.
+    """
+
+    def __init__(self, directory: str | os.PathLike[str], *, max_bytes: int) -> None:
+        self._directory = Path(directory)
+        self._directory.mkdir(parents=True, exist_ok=True)
+        self._max_bytes = max_bytes
+
+    def _path(self, digest: str) -> Path:
+        return self._directory / f'{digest}.h5'
+
+    def __contains__(self, digest: str) -> bool:
+        return self._path(digest).exists()
+
+    def load(self, digest: str) -> Any:
+        """Load a result, raises KeyError if it is not in the cache."""
+        path = self._path(digest)
+        try:
+            dg = sc.io.load_hdf5(path)
+        except FileNotFoundError:
+            raise KeyError(digest) from None
+        # The modification time is used for tracking the last use.
+        os.utime(path)
+        if dg['kind'] == 'object':
+            return io.from_data_group(dg['value'])
+        return dg['value']
+
+    def store(self, digest: str, value: Any) -> None:
+        """Store a result and evict old results if the cache is too large."""
+        if isinstance(value, sc.Variable | sc.DataArray | sc.Dataset | sc.DataGroup):
+            dg = sc.DataGroup(kind='scipp', value=value)
+        else:
+            dg = sc.DataGroup(kind='object', value=io.to_data_group(value))
+        path = self._path(digest)
+        # Write to a temporary file first, such that concurrent readers never see a
+        # partially written result.
+        with tempfile.NamedTemporaryFile(
+            dir=self._directory, prefix=f'.{path.name}.', suffix='.tmp', delete=False
+        ) as f:
+            tmp = Path(f.name)
+        try:
+            dg.save_hdf5(tmp)
+            os.replace(tmp, path)
+        finally:
+            tmp.unlink(missing_ok=True)
+        self.evict()
+
+    def evict(self) -> None:
+        """Remove least recently used results until the size limit is satisfied."""
+        entries = []
+        for path in self._directory.glob('*.h5'):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:  # Removed concurrently
+                continue
+            entries.append((stat.st_mtime_ns, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self._max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+
+
+def apply_result_cache(
+    workflow: sciline.Pipeline, keys: Iterable[Hashable], cache: ResultCache
+) -> sciline.Pipeline:
+    """
+    Return a copy of the workflow with the results for the given keys cached.
+
+    Results found in the cache are loaded, the others are computed and stored. In both
+    cases they are set as values in the returned workflow, such that downstream
+    computations do not depend on the upstream graph anymore.
+
+    Parameters
+    ----------
+    workflow:
+        The workflow. Not modified.
+    keys:
+        Keys of the results to cache, e.g., ``TransmissionFunction[Analyzer]``,
+        ``He3DirectBeam[Analyzer, Polarized]``, or ``DirectBeamNoCell``.
+    cache:
+        The cache.
+    """
+    keys = list(keys)
+    digests = _node_digests(workflow, keys)
+    results = {}
+    missing = []
+    for key in keys:
+        try:
+            results[key] = cache.load(digests[key])
+        except KeyError:
+            missing.append(key)
+    if missing:
+        computed = workflow.compute(missing)
+        for key in missing:
+            cache.store(digests[key], computed[key])
+        results.update(computed)
+    workflow = workflow.copy()
+    for key, value in results.items():
+        workflow[key] = value
+    return workflow
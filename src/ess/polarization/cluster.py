@@ -0,0 +1,152 @@
+# SPDX-License-Identifier: BSD-3-Clause
+# Copyright (c) 2025 Scipp contributors (https://github.com/scipp)
+"""
+Execution of polarization workflows on a ``dask.distributed`` cluster.
+
+Individual workflows can be computed with the providers distributed over the cluster
+using :py:func:`cluster_scheduler`. Many runs are best reduced with
+:py:func:`compute_runs`, which scatters the data of each run to a worker and
+computes the run there:
+
+.. code-block:: python
+
+    from dask.distributed import Client
+
+    client = Client('scheduler-address:8786')
+    results = compute_runs(
+        client,
+        workflow,
+        TotalPolarizationCorrectedData,
+        runs={run: {ReducedSampleDataBySpinChannel[Up, Up]: data, ...} for ...},
+    )
+
+Scipp objects do not support pickling. :py:func:`cluster_scheduler` and
+:py:func:`compute_runs` register a pickling mechanism based on HDF5 in this process
+and on all workers, see :py:func:`register_scipp_pickling`. Call it explicitly for
+other uses, e.g., a process-based dask scheduler. Transmission functions of this
+package are picklable without registration.
+"""
+
+import copyreg
+import io
+from collections.abc import Hashable, Mapping
+from typing import Any
+
+import sciline
+import scipp as sc
+from sciline.scheduler import DaskScheduler, NaiveScheduler
+
+_SCIPP_TYPES = (sc.Variable, sc.DataArray, sc.Dataset)
+
+
+def _scipp_from_bytes(data: bytes) -> sc.Variable | sc.DataArray | sc.Dataset:
+    return sc.io.load_hdf5(io.BytesIO(data))
+
+
+def _reduce_scipp(obj: sc.Variable | sc.DataArray | sc.Dataset) -> Any:
+    buffer = io.BytesIO()
+    obj.save_hdf5(buffer)
+    return _scipp_from_bytes, (buffer.getvalue(),)
+
+
+def register_scipp_pickling() -> None:
+    """
+    Make Scipp variables, data arrays, and datasets picklable in this process.
+
+    Objects are pickled as HDF5 bytes. This is required for sending data to and from
+    dask workers and for pickling workflows that hold Scipp objects as parameters.
+    Calling this multiple times has no further effect.
+    """
+    for tp in _SCIPP_TYPES:
+        copyreg.pickle(tp, _reduce_scipp)
+
+
+def _register_on_cluster(client: Any) -> None:
+    register_scipp_pickling()
+    client.run(register_scipp_pickling)
+
+
+def cluster_scheduler(client: Any) -> DaskScheduler:
+    """
+    Return a scheduler for computing a workflow with a ``dask.distributed`` client.
+
+    Each provider becomes a task on the cluster. Dask runs tasks on the workers
+    holding their inputs where possible, e.g., the corrections of a spin channel run
+    where the data of the channel is.
+
+    Parameters
+    ----------
+    client:
+        A :py:class:`dask.distributed.Client`.
+
+    Examples
+    --------
+    .. code-block:: python
+
+        workflow.compute(
+            TotalPolarizationCorrectedData, scheduler=cluster_scheduler(client)
+        )
+    """
+    _register_on_cluster(client)
+    return DaskScheduler(client.get)
+
+
+def _compute_run(
+    workflow: sciline.Pipeline,
+    targets: tuple[Hashable, ...],
+    keys: tuple[Hashable, ...],
+    values: tuple[Any, ...],
+) -> dict[Hashable, Any]:
+    # Results are pickled when sent back to the client.
+    register_scipp_pickling()
+    workflow = workflow.copy()
+    for key, value in zip(keys, values, strict=True):
+        workflow[key] = value
+    # Runs are the unit of parallelism, avoid oversubscribing the worker.
+    return workflow.compute(targets, scheduler=NaiveScheduler())
+
+
+def compute_runs(
+    client: Any,
+    workflow: sciline.Pipeline,
+    targets: Hashable | tuple[Hashable, ...] | list[Hashable],
+    runs: Mapping[Hashable, Mapping[Hashable, Any]],
+) -> dict[Hashable, dict[Hashable, Any]]:
+    """
+    Compute results for many runs on a ``dask.distributed`` cluster.
+
+    The parameters of each run are scattered to a worker first and the workflow is
+    computed as a single task. Dask places the task on the worker holding the data,
+    such that the run data is transferred only once. Parameters shared by all runs,
+    e.g., transmission functions, should be set on the workflow, which is sent to
+    each worker once.
+
+    Parameters
+    ----------
+    client:
+        A :py:class:`dask.distributed.Client`.
+    workflow:
+        The workflow, e.g., a
+        :py:func:`ess.polarization.PolarizationAnalysisWorkflow`.
+    targets:
+        Key or keys to compute.
+    runs:
+        Parameters of each run, by run name.
+
+    Returns
+    -------
+    :
+        Computed results of each run, by run name and key.
+    """
+    _register_on_cluster(client)
+    targets = tuple(targets) if isinstance(targets, tuple | list) else (targets,)
+    # Avoid sending the workflow with every task.
+    [workflow_future] = client.scatter([workflow], broadcast=True, hash=False)
+    futures = {}
+    for name, params in runs.items():
+        # Scatter all parameters of a run as one object, to place them on one worker.
+        [values] = client.scatter([tuple(params.values())], hash=False)
+        futures[name] = client.submit(
+            _compute_run, workflow_future, targets, tuple(params), values, pure=False
+        )
+    return client.gather(futures)
@@ -1,18 +1,25 @@
 # SPDX-License-Identifier: BSD-3-Clause
 # Copyright (c) 2023 Scipp contributors (https://github.com/scipp)
+import itertools
+from collections.abc import Callable
 from dataclasses import dataclass
+from functools import partial
 from typing import Generic
 
+import numpy as np
 import sciline
 import scipp as sc
 
 from .types import (
     Analyzer,
     AnalyzerSpin,
+    CorrectionResolution,
+    CorrectionResolutionTolerance,
     Down,
     FlipperEfficiency,
     HalfPolarizedCorrectedData,
     HalfPolarizedCorrection,
+    HistogramBins,
     NoAnalyzer,
     PolarizationCorrectedData,
     PolarizationCorrection,
@@ -22,6 +29,7 @@ from .types import (
     PolarizingElementCorrection,
     ReducedSampleDataBySpinChannel,
     TotalPolarizationCorrectedData,
+    TotalPolarizationCorrectedHistogram,
     TransmissionFunction,
     Up,
 )
@@ -34,23 +42,61 @@ class InverseFlipperMatrix(Generic[PolarizerSpin, PolarizingElement]):
     efficiency: FlipperEfficiency[PolarizingElement]
     swap: bool
 
+    def _inverse_efficiency(
+        self, channel: sc.DataArray, resolution: str, fine: np.ndarray | None
+    ) -> float | sc.Variable | None:
+        """Inverse of the efficiency, None for a perfect flipper."""
+        if not self.efficiency.is_constant:
+            f = _evaluate_efficiency(self.efficiency, channel, resolution, fine)
+            return sc.reciprocal(f)
+        f = 1 / self.efficiency.value
+        if isinstance(f, sc.Variable):
+            # Efficiencies with a scan dim are kept even if all are 1, such that the
+            # result has the scan dim.
+            return None if f.ndim == 0 and f.value == 1 else f
+        return None if f == 1 else f
+
     def from_left(
-        self, up: sc.Variable, down: sc.Variable
+        self,
+        up: sc.Variable,
+        down: sc.Variable,
+        channel: sc.DataArray,
+        resolution: str = 'event',
+        fine: np.ndarray | None = None,
     ) -> tuple[sc.Variable, sc.Variable]:
-        """Apply inverse flipper matrix from the left (for analyzer)"""
+        """
+        Apply inverse flipper matrix from the left (for analyzer)
+
+        A wavelength-dependent efficiency is evaluated for the channel, at the same
+        resolution as the correction factors ``up`` and ``down``. With resolution
+        'auto', ``fine`` gives the bins in which the factors were evaluated per event,
+        see :py:attr:`PolarizingElementCorrection.fine`.
+        """
         if self.swap:
             up, down = down, up
-        f = 1 / self.efficiency.value
-        if f == 1:
+        f = self._inverse_efficiency(channel, resolution, fine)
+        if f is None:
             return up, down
         return up, (1 - f) * up + f * down
 
     def from_right(
-        self, up: sc.Variable, down: sc.Variable
+        self,
+        up: sc.Variable,
+        down: sc.Variable,
+        channel: sc.DataArray,
+        resolution: str = 'event',
+        fine: np.ndarray | None = None,
     ) -> tuple[sc.Variable, sc.Variable]:
-        """Apply inverse flipper matrix from the right (for polarizer)"""
-        f = 1 / self.efficiency.value
-        if f == 1:
+        """
+        Apply inverse flipper matrix from the right (for polarizer)
+
+        A wavelength-dependent efficiency is evaluated for the channel, at the same
+        resolution as the correction factors ``up`` and ``down``. With resolution
+        'auto', ``fine`` gives the bins in which the factors were evaluated per event,
+        see :py:attr:`PolarizingElementCorrection.fine`.
+        """
+        f = self._inverse_efficiency(channel, resolution, fine)
+        if f is None:
             return (down, up) if self.swap else (up, down)
         if self.swap:
             return f * down, f * up
@@ -74,9 +120,256 @@ def make_spin_flipping_matrix_down(
     )
 
 
+_RESOLUTIONS = ('event', 'bin-center', 'bin-mean', 'auto')
+# Event coordinates used by the transmission functions.
+_TRANSMISSION_COORDS = ('wavelength', 'time')
+
+
+def _bin_points(
+    channel: sc.DataArray | sc.Variable, *, centers: bool, reduce: str = 'mean'
+) -> sc.DataArray:
+    """Dense data array with one point per bin, for evaluating a transmission."""
+    outer = channel.coords if isinstance(channel, sc.DataArray) else {}
+    coords = {}
+    for name in _TRANSMISSION_COORDS:
+        if name not in channel.bins.coords:
+            continue
+        coord = outer.get(name) if centers else None
+        if coord is None:
+            coords[name] = getattr(channel.bins.coords[name].bins, reduce)()
+            continue
+        for dim in coord.dims:
+            if channel.coords.is_edges(name, dim):
+                coord = sc.midpoints(coord, dim)
+        coords[name] = coord
+    return sc.DataArray(sc.empty(sizes=channel.sizes), coords=coords)
+
+
+def _requires_event_resolution(
+    channel: sc.DataArray | sc.Variable,
+    transmission: TransmissionFunction[PolarizingElement],
+    tolerance: float,
+) -> np.ndarray:
+    """
+    Whether the transmission changes by more than the tolerance within each bin.
+
+    The transmission is evaluated at the corners of the bounding box of the events in
+    each bin. This bounds the variation only if the transmission is monotonic in each
+    coordinate, see :py:attr:`TransmissionFunction.is_monotonic`.
+    """
+    lower = _bin_points(channel, centers=False, reduce='min')
+    upper = _bin_points(channel, centers=False, reduce='max')
+    corners = [
+        lower.assign_coords(dict(zip(lower.coords, bounds, strict=True)))
+        for bounds in itertools.product(
+            *((lower.coords[name], upper.coords[name]) for name in lower.coords)
+        )
+    ]
+    empty = (channel.bins.size() == sc.index(0)).values
+    coarse = np.ones(channel.shape, dtype=bool)
+    for plus_minus in ('plus', 'minus'):
+        values = [transmission.apply(corner, plus_minus) for corner in corners]
+        values = sc.concat(values, '_corner')
+        low = values.min('_corner')
+        high = values.max('_corner')
+        # Infinite or NaN variations, e.g., of empty bins, are not coarse.
+        variation = ((high - low) / abs(high)).broadcast(sizes=channel.sizes)
+        coarse &= (variation <= sc.scalar(tolerance)).transpose(channel.dims).values
+    return ~(coarse | empty)
+
+
+def _per_bin_with_event_resolution(
+    channel: sc.DataArray | sc.Variable,
+    evaluate: Callable[[sc.DataArray], sc.Variable],
+    per_bin: sc.Variable,
+    fine: np.ndarray,
+) -> sc.Variable:
+    """
+    Broadcast per-bin values to the events, evaluating per event in ``fine`` bins.
+
+    Only the events of the fine bins are passed to ``evaluate``, e.g., the
+    transmission function.
+    """
+    constituents = channel.bins.constituents
+    buffer = constituents['data']
+    dim = constituents['dim']
+    begin = constituents['begin'].transpose(channel.dims).values.ravel()
+    end = constituents['end'].transpose(channel.dims).values.ravel()
+    lengths = end - begin
+    bin_of_event = np.repeat(np.arange(begin.size), lengths)
+    offsets = np.cumsum(lengths) - lengths
+    position = np.arange(lengths.sum()) + np.repeat(begin - offsets, lengths)
+    values = np.full(buffer.sizes[dim], np.nan)
+    values[position] = per_bin.values.ravel()[bin_of_event]
+    position = position[fine.ravel()[bin_of_event]]
+    coords = {
+        name: sc.array(
+            dims=[dim],
+            values=buffer.coords[name].values[position],
+            unit=buffer.coords[name].unit,
+        )
+        for name in _TRANSMISSION_COORDS
+        if name in buffer.coords
+    }
+    events = sc.DataArray(sc.empty(sizes={dim: position.size}), coords=coords)
+    values[position] = evaluate(events).values
+    return sc.bins(
+        begin=constituents['begin'],
+        end=constituents['end'],
+        dim=dim,
+        data=sc.array(dims=[dim], values=values, unit=per_bin.unit),
+    )
+
+
+def _combines_with_events(
+    channel: sc.DataArray | sc.Variable, per_bin: sc.Variable
+) -> bool:
+    # Extra dims, e.g., of a parameter scan, and variances cannot be combined with
+    # per-event values in a single event buffer.
+    return set(per_bin.dims) <= set(channel.dims) and per_bin.variances is None
+
+
+def _evaluate_efficiency(
+    efficiency: FlipperEfficiency,
+    channel: sc.DataArray,
+    resolution: str,
+    fine: np.ndarray | None,
+) -> sc.Variable:
+    """
+    Evaluate a flipper efficiency at the resolution of the correction factors.
+
+    With resolution 'auto' the efficiency is evaluated per bin, at the mean
+    coordinates, except in the ``fine`` bins, in which the transmission was evaluated
+    per event. The variation of the efficiency itself is not checked.
+    """
+    if channel.bins is None:
+        return efficiency.apply(channel)
+    if resolution in ('bin-center', 'bin-mean'):
+        return efficiency.apply(
+            _bin_points(channel, centers=resolution == 'bin-center')
+        )
+    if resolution == 'auto' and fine is not None and not fine.all():
+        per_bin = efficiency.apply(_bin_points(channel, centers=False))
+        if not fine.any():
+            return per_bin
+        if _combines_with_events(channel, per_bin):
+            return _per_bin_with_event_resolution(
+                channel,
+                efficiency.apply,
+                per_bin.broadcast(sizes=channel.sizes).transpose(channel.dims),
+                fine,
+            )
+    return efficiency.apply(channel.bins)
+
+
+class _EventBuffers:
+    """
+    Reusable buffers for evaluating transmissions of events in place.
+
+    A buffer is reused by later requests with the same key, sliced to the requested
+    length, and replaced if it is too short. Results in a buffer are thus only valid
+    until the next request with the same key.
+    """
+
+    def __init__(self) -> None:
+        self._buffers: dict[str, sc.Variable] = {}
+
+    def get(self, key: str, sizes: dict[str, int]) -> sc.Variable:
+        ((dim, size),) = sizes.items()
+        buffer = self._buffers.get(key)
+        if buffer is None or buffer.dim != dim or buffer.shape[0] < size:
+            buffer = sc.empty(dims=[dim], shape=[size])
+            self._buffers[key] = buffer
+        return buffer[dim, :size]
+
+
+def _evaluate_transmission(
+    channel: sc.DataArray | sc.Variable,
+    transmission: TransmissionFunction[PolarizingElement],
+    resolution: str,
+    tolerance: float,
+    buffers: _EventBuffers | None = None,
+) -> tuple[sc.Variable, sc.Variable, np.ndarray | None]:
+    """
+    Evaluate the 'plus' and 'minus' transmission at the given resolution.
+
+    With resolution 'auto', the third element gives the bins in which the
+    transmission is evaluated per event. It is None for other resolutions.
+    """
+    if resolution not in _RESOLUTIONS:
+        raise ValueError(
+            f'Unknown correction resolution {resolution!r}, expected one of '
+            f'{_RESOLUTIONS}.'
+        )
+    binned = (
+        isinstance(channel, sc.Variable | sc.DataArray) and channel.bins is not None
+    )
+    if resolution == 'event' or not binned:
+        data = channel.bins if binned else channel
+        if binned and transmission.supports_out(data):
+            # Evaluate in place, with one buffer per result.
+            buffers = _EventBuffers() if buffers is None else buffers
+            sizes = data.constituents['data'].sizes
+            return (
+                *(
+                    transmission.apply(
+                        data, plus_minus, out=buffers.get(plus_minus, sizes)
+                    )
+                    for plus_minus in ('plus', 'minus')
+                ),
+                None,
+            )
+        return transmission.apply(data, 'plus'), transmission.apply(data, 'minus'), None
+    if resolution == 'auto' and not transmission.is_monotonic:
+        # The variation within bins cannot be bounded from the corners of the bins.
+        return _evaluate_with_fine_bins(
+            channel, transmission, np.ones(channel.shape, dtype=bool), buffers
+        )
+    points = _bin_points(channel, centers=resolution == 'bin-center')
+    per_bin = (transmission.apply(points, 'plus'), transmission.apply(points, 'minus'))
+    if resolution != 'auto':
+        return (*per_bin, None)
+    if not all(_combines_with_events(channel, t) for t in per_bin):
+        return _evaluate_with_fine_bins(
+            channel, transmission, np.ones(channel.shape, dtype=bool), buffers
+        )
+    fine = _requires_event_resolution(channel, transmission, tolerance)
+    if not fine.any():
+        return (*per_bin, fine)
+    if fine.all():
+        return _evaluate_with_fine_bins(channel, transmission, fine, buffers)
+    return (
+        *(
+            _per_bin_with_event_resolution(
+                channel,
+                partial(transmission.apply, plus_minus=plus_minus),
+                t.broadcast(sizes=channel.sizes).transpose(channel.dims),
+                fine,
+            )
+            for plus_minus, t in zip(('plus', 'minus'), per_bin, strict=True)
+        ),
+        fine,
+    )
+
+
+def _evaluate_with_fine_bins(
+    channel: sc.DataArray | sc.Variable,
+    transmission: TransmissionFunction[PolarizingElement],
+    fine: np.ndarray,
+    buffers: _EventBuffers | None,
+) -> tuple[sc.Variable, sc.Variable, np.ndarray]:
+    """Evaluate per event with resolution 'auto', if all bins are fine."""
+    t_plus, t_minus, _ = _evaluate_transmission(
+        channel, transmission, 'event', 0.0, buffers
+    )
+    return t_plus, t_minus, fine
+
+
 def compute_polarizing_element_correction(
     channel: ReducedSampleDataBySpinChannel[PolarizerSpin, AnalyzerSpin],
     transmission: TransmissionFunction[PolarizingElement],
+    resolution: CorrectionResolution = 'event',
+    tolerance: CorrectionResolutionTolerance = 1e-3,
 ) -> PolarizingElementCorrection[PolarizerSpin, AnalyzerSpin, PolarizingElement]:
     """
     Compute matrix coefficients for the correction of a polarizing element.
@@ -97,24 +390,46 @@ def compute_polarizing_element_correction(
         evaluating the transmission function.
     transmission :
         Transmission function for the polarizing element.
+    resolution :
+        For binned data, whether to evaluate the transmission per event or per bin.
+        Per-bin coefficients are dense and broadcast to the events when applied. See
+        :py:class:`ess.polarization.types.CorrectionResolution`.
+    tolerance :
+        Maximum relative change of the transmission within a bin for per-bin
+        evaluation with resolution 'auto'.
 
     Returns
     -------
     :
         Correction matrix coefficients.
     """
-    if isinstance(channel, sc.Variable | sc.DataArray) and channel.bins is not None:
-        channel = channel.bins
+    return _polarizing_element_correction(channel, transmission, resolution, tolerance)
 
-    t_plus = transmission.apply(channel, 'plus')
-    t_minus = transmission.apply(channel, 'minus')
+
+def _polarizing_element_correction(
+    channel: sc.DataArray,
+    transmission: TransmissionFunction[PolarizingElement],
+    resolution: str,
+    tolerance: float,
+    buffers: _EventBuffers | None = None,
+) -> PolarizingElementCorrection:
+    """
+    Implementation of :py:func:`compute_polarizing_element_correction`.
+
+    The coefficients use the memory of the buffers, if the transmission is evaluated
+    in place.
+    """
+    t_plus, t_minus, fine = _evaluate_transmission(
+        channel, transmission, resolution, tolerance, buffers
+    )
     t_minus *= -1
-    denom = t_plus**2 - t_minus**2
+    denom = t_plus * t_plus
+    denom -= t_minus * t_minus
     sc.reciprocal(denom, out=denom)
     t_plus *= denom
     t_minus *= denom
     return PolarizingElementCorrection[PolarizerSpin, AnalyzerSpin, PolarizingElement](
-        diag=t_plus, off_diag=t_minus
+        diag=t_plus, off_diag=t_minus, fine=fine
     )
 
 
@@ -124,6 +439,8 @@ def compute_polarization_correction(
     polarizer: PolarizingElementCorrection[PolarizerSpin, AnalyzerSpin, Polarizer],
     analyzer_flipper: InverseFlipperMatrix[AnalyzerSpin, Analyzer],
     polarizer_flipper: InverseFlipperMatrix[PolarizerSpin, Polarizer],
+    channel: ReducedSampleDataBySpinChannel[PolarizerSpin, AnalyzerSpin],
+    resolution: CorrectionResolution = 'event',
 ) -> PolarizationCorrection[PolarizerSpin, AnalyzerSpin]:
     """
     Compute columns of combined correction coefficients for polarizer and analyzer.
@@ -140,14 +457,24 @@ def compute_polarization_correction(
         Flipper matrix for the analyzer.
     polarizer_flipper :
         Flipper matrix for the polarizer.
+    channel :
+        Data of the spin channel. Only the coordinates are used, for evaluating
+        wavelength-dependent flipper efficiencies.
+    resolution :
+        Resolution of the correction coefficients, see
+        :py:func:`compute_polarizing_element_correction`.
 
     Returns
     -------
     :
         Combined correction coefficients.
     """
-    a_up, a_down = analyzer_flipper.from_left(analyzer.diag, analyzer.off_diag)
-    p_up, p_down = polarizer_flipper.from_right(polarizer.diag, polarizer.off_diag)
+    a_up, a_down = analyzer_flipper.from_left(
+        analyzer.diag, analyzer.off_diag, channel, resolution, analyzer.fine
+    )
+    p_up, p_down = polarizer_flipper.from_right(
+        polarizer.diag, polarizer.off_diag, channel, resolution, polarizer.fine
+    )
     return PolarizationCorrection[PolarizerSpin, AnalyzerSpin](
         upup=p_up * a_up,
         updown=p_up * a_down,
@@ -156,6 +483,50 @@ def compute_polarization_correction(
     )
 
 
+def _extra_sizes(channel: sc.DataArray, factor: sc.Variable) -> dict[str, int]:
+    """Sizes of the extra dims of a correction factor, e.g., of a scan."""
+    return {dim: size for dim, size in factor.sizes.items() if dim not in channel.dims}
+
+
+def _multiply_by_factor(channel: sc.DataArray, factor: sc.Variable) -> sc.DataArray:
+    """
+    Multiply the data by a correction factor, which may have extra dims.
+
+    Scipp refuses to implicitly broadcast data with variances. Instead of broadcasting
+    the data first and multiplying the copy, which would copy all events twice, the
+    result is allocated once with the extra dims and multiplied in place.
+    """
+    sizes = _extra_sizes(channel, factor)
+    if not sizes:
+        return channel * factor
+    result = channel.broadcast(sizes={**sizes, **channel.sizes}).copy()
+    result *= factor
+    return result
+
+
+def _weighted_histogram(
+    channel: sc.DataArray, factor: sc.Variable, bins: dict[str, sc.Variable]
+) -> sc.DataArray:
+    """
+    Histogram the events with the correction factor as weights.
+
+    Extra dims of the factor, e.g., of a scan, are handled one point at a time, such
+    that the events of the channel are never copied.
+    """
+    sizes = _extra_sizes(channel, factor)
+    if not sizes:
+        # Assigning the weights shares the event coords with the input, unlike
+        # multiplying the data array.
+        return channel.bins.assign(channel.bins.data * factor).hist(bins)
+    histograms = []
+    for index in np.ndindex(*sizes.values()):
+        point = factor
+        for dim, i in zip(sizes, index, strict=True):
+            point = point[dim, i]
+        histograms.append(channel.bins.assign(channel.bins.data * point).hist(bins))
+    return sc.concat(histograms, '_points').fold(dim='_points', sizes=sizes)
+
+
 def compute_polarization_corrected_data(
     channel: ReducedSampleDataBySpinChannel[PolarizerSpin, AnalyzerSpin],
     polarization_correction: PolarizationCorrection[PolarizerSpin, AnalyzerSpin],
@@ -163,10 +534,10 @@ def compute_polarization_corrected_data(
     # TODO Would like to use inplace ops, but modifying input is dodgy. Maybe combine
     # into a single function?
     return PolarizationCorrectedData(
-        upup=channel * polarization_correction.upup,
-        updown=channel * polarization_correction.updown,
-        downup=channel * polarization_correction.downup,
-        downdown=channel * polarization_correction.downdown,
+        upup=_multiply_by_factor(channel, polarization_correction.upup),
+        updown=_multiply_by_factor(channel, polarization_correction.updown),
+        downup=_multiply_by_factor(channel, polarization_correction.downup),
+        downdown=_multiply_by_factor(channel, polarization_correction.downdown),
     )
 
 
@@ -207,12 +578,108 @@ def sum_polarization_contributions(
     )
 
 
+def histogram_polarization_corrected_data(
+    upup: ReducedSampleDataBySpinChannel[Up, Up],
+    updown: ReducedSampleDataBySpinChannel[Up, Down],
+    downup: ReducedSampleDataBySpinChannel[Down, Up],
+    downdown: ReducedSampleDataBySpinChannel[Down, Down],
+    polarizer: TransmissionFunction[Polarizer],
+    analyzer: TransmissionFunction[Analyzer],
+    polarizer_flipper_up: InverseFlipperMatrix[Up, Polarizer],
+    polarizer_flipper_down: InverseFlipperMatrix[Down, Polarizer],
+    analyzer_flipper_up: InverseFlipperMatrix[Up, Analyzer],
+    analyzer_flipper_down: InverseFlipperMatrix[Down, Analyzer],
+    bins: HistogramBins,
+    resolution: CorrectionResolution = 'event',
+    tolerance: CorrectionResolutionTolerance = 1e-3,
+) -> TotalPolarizationCorrectedHistogram:
+    """
+    Correct and histogram event data in one pass.
+
+    Gives the same result as histogramming :py:class:`TotalPolarizationCorrectedData`,
+    but the corrected event lists are never stored. Instead, the spin channels are
+    processed one after the other and the correction factors are used as weights
+    when histogramming the events, accumulating the contributions of all channels.
+    The event coordinates are shared with the input.
+
+    Event-sized intermediates are bounded by those of a single input channel: the
+    transmissions of the polarizer and analyzer and the four correction factors of
+    the channel, which are released before the next channel is processed. Besides
+    these, only the histograms are kept.
+
+    Parameters
+    ----------
+    upup, updown, downup, downdown :
+        Event data for each flipper state channel.
+    polarizer, analyzer :
+        Transmission functions of the polarizing elements.
+    polarizer_flipper_up, polarizer_flipper_down,
+    analyzer_flipper_up, analyzer_flipper_down :
+        Flipper matrices of the polarizing elements.
+    bins :
+        Bin edges of the histogram, by dimension, e.g., Q and wavelength.
+    resolution, tolerance :
+        Resolution of the correction factors, see
+        :py:func:`compute_polarizing_element_correction`.
+
+    Returns
+    -------
+    :
+        Histogrammed polarization corrected data.
+    """
+    channels = {
+        (Up, Up): upup,
+        (Up, Down): updown,
+        (Down, Up): downup,
+        (Down, Down): downdown,
+    }
+    polarizer_flippers = {Up: polarizer_flipper_up, Down: polarizer_flipper_down}
+    analyzer_flippers = {Up: analyzer_flipper_up, Down: analyzer_flipper_down}
+    fields = ('upup', 'updown', 'downup', 'downdown')
+    result = dict.fromkeys(fields)
+    # The coefficients of a channel are not needed once its weights are computed, so
+    # their buffers are reused for the next channel.
+    polarizer_buffers = _EventBuffers()
+    analyzer_buffers = _EventBuffers()
+    for (polarizer_spin, analyzer_spin), channel in channels.items():
+        if channel.bins is None:
+            raise ValueError(
+                'Fused histogramming requires binned event data, use '
+                'TotalPolarizationCorrectedData for dense data.'
+            )
+        correction = compute_polarization_correction(
+            polarizer=_polarizing_element_correction(
+                channel, polarizer, resolution, tolerance, polarizer_buffers
+            ),
+            analyzer=_polarizing_element_correction(
+                channel, analyzer, resolution, tolerance, analyzer_buffers
+            ),
+            polarizer_flipper=polarizer_flippers[polarizer_spin],
+            analyzer_flipper=analyzer_flippers[analyzer_spin],
+            channel=channel,
+            resolution=resolution,
+        )
+        for field in fields:
+            histogram = _weighted_histogram(channel, getattr(correction, field), bins)
+            if result[field] is None:
+                result[field] = histogram
+            else:
+                result[field] += histogram
+        # Release the factors before computing those of the next channel.
+        del correction
+    return TotalPolarizationCorrectedHistogram(PolarizationCorrectedData(**result))
+
+
 def compute_half_polarized_correction(
     *,
     polarizer: PolarizingElementCorrection[PolarizerSpin, NoAnalyzer, Polarizer],
     polarizer_flipper: InverseFlipperMatrix[PolarizerSpin, Polarizer],
+    channel: ReducedSampleDataBySpinChannel[PolarizerSpin, NoAnalyzer],
+    resolution: CorrectionResolution = 'event',
 ) -> HalfPolarizedCorrection[PolarizerSpin]:
-    p_up, p_down = polarizer_flipper.from_right(polarizer.diag, polarizer.off_diag)
+    p_up, p_down = polarizer_flipper.from_right(
+        polarizer.diag, polarizer.off_diag, channel, resolution, polarizer.fine
+    )
     return HalfPolarizedCorrection[PolarizerSpin](up=p_up, down=p_down)
 
 
@@ -221,8 +688,8 @@ def compute_half_polarized_corrected_data(
     polarization_correction: HalfPolarizedCorrection[PolarizerSpin],
 ) -> HalfPolarizedCorrectedData[PolarizerSpin]:
     return HalfPolarizedCorrectedData(
-        up=channel * polarization_correction.up,
-        down=channel * polarization_correction.down,
+        up=_multiply_by_factor(channel, polarization_correction.up),
+        down=_multiply_by_factor(channel, polarization_correction.down),
     )
 
 
@@ -260,11 +727,14 @@ def CorrectionWorkflow(half_polarized: bool = False) -> sciline.Pipeline:
     else:
         workflow.insert(compute_polarization_correction)
         workflow.insert(compute_polarization_corrected_data)
+        workflow.insert(histogram_polarization_corrected_data)
     # If there is no flipper, setting an efficiency of 1.0 is equivalent to not using
     # a flipper.
     workflow[FlipperEfficiency[PolarizingElement]] = FlipperEfficiency[
         PolarizingElement
     ](value=1.0)
+    workflow[CorrectionResolution] = 'event'
+    workflow[CorrectionResolutionTolerance] = 1e-3
     return workflow
 
 
@@ -1,17 +1,23 @@
 # SPDX-License-Identifier: BSD-3-Clause
 # Copyright (c) 2023 Scipp contributors (https://github.com/scipp)
+import functools
+import inspect
+from collections.abc import Callable, Iterable
 from dataclasses import dataclass
-from typing import Generic, NewType, TypeVar
+from typing import Any, Generic, NewType, TypeVar
 
+import numpy as np
 import sciline as sl
 import scipp as sc
 
 from ess.reduce.uncertainty import broadcast_with_upper_bound_variances
 
+from .profiling import record_fit_evaluations
 from .types import (
     Analyzer,
     AnalyzerSpin,
     Down,
+    HDF5Picklable,
     PlusMinus,
     PolarizerSpin,
     PolarizingElement,
@@ -85,7 +91,7 @@ class He3Opacity0(sl.Scope[PolarizingElement, sc.Variable], sc.Variable):
     """Opacity at 1 Angstrom for a given cell."""
 
 
-class He3OpacityFunction(Generic[PolarizingElement]):
+class He3OpacityFunction(HDF5Picklable, Generic[PolarizingElement]):
     """Wavelength-dependent opacity function for a given cell."""
 
     def __init__(self, opacity0: sc.Variable):
@@ -138,6 +144,27 @@ def he3_opacity_function_from_cell_opacity(
     return He3OpacityFunction[PolarizingElement](opacity0)
 
 
+def _curve_fit(
+    coords: list[str], f: Callable[..., sc.Variable], da: sc.DataArray, **kwargs: Any
+) -> tuple[sc.DataGroup, sc.DataGroup]:
+    """Same as :py:func:`scipp.curve_fit`, recording model evaluations for profiling."""
+    evaluations = 0
+
+    @functools.wraps(f)
+    def model(*args: Any, **kw: Any) -> sc.Variable:
+        nonlocal evaluations
+        evaluations += 1
+        return f(*args, **kw)
+
+    # curve_fit finds the fit parameters from the signature, without following
+    # __wrapped__.
+    model.__signature__ = inspect.signature(f)
+    try:
+        return sc.curve_fit(coords, model, da, **kwargs)
+    finally:
+        record_fit_evaluations(evaluations)
+
+
 def _with_midpoints(data: sc.DataArray, dim: str) -> sc.DataArray:
     if data.coords.is_edges(dim):
         return data.assign_coords({dim: sc.midpoints(data.coords[dim])})
@@ -164,7 +191,7 @@ def he3_opacity_function_from_beam_data(
         opacity = He3OpacityFunction[PolarizingElement](opacity0)
         return transmission_empty_glass * sc.exp(-opacity(wavelength))
 
-    popt, _ = sc.curve_fit(
+    popt, _ = _curve_fit(
         ['wavelength'],
         intensity,
         _with_midpoints(transmission_fraction, 'wavelength'),
@@ -173,8 +200,13 @@ def he3_opacity_function_from_beam_data(
     return He3OpacityFunction[PolarizingElement](sc.values(popt['opacity0']).data)
 
 
-class He3PolarizationFunction(Generic[PolarizingElement]):
-    """Time-dependent polarization function for a given cell."""
+class He3PolarizationFunction(HDF5Picklable, Generic[PolarizingElement]):
+    """
+    Time-dependent polarization function for a given cell.
+
+    ``C`` and ``T1`` may have extra dims, e.g., 'scan', in which case the polarization
+    is evaluated for all values at once.
+    """
 
     def __init__(self, C: sc.Variable, T1: sc.Variable):
         self._C = C
@@ -201,21 +233,369 @@ class He3TransmissionFunction(TransmissionFunction[PolarizingElement]):
     transmission_empty_glass: He3TransmissionEmptyGlass[PolarizingElement]
 
     def __call__(
-        self, *, time: sc.Variable, wavelength: sc.Variable, plus_minus: PlusMinus
+        self,
+        *,
+        time: sc.Variable,
+        wavelength: sc.Variable,
+        plus_minus: PlusMinus,
+        out: sc.Variable | None = None,
     ) -> sc.Variable:
+        """
+        Evaluate the transmission.
+
+        Parameters
+        ----------
+        time:
+            Time, e.g., of each event.
+        wavelength:
+            Wavelength, with the same sizes or event layout as ``time``.
+        plus_minus:
+            Whether to compute the transmission for spins parallel ('plus') or
+            antiparallel ('minus') to the polarization of the cell.
+        out:
+            Dimensionless float64 buffer for the result, with the sizes of
+            ``wavelength``, or of the event buffer for binned data. It may be a slice
+            of a larger buffer, such that it can be reused for inputs of different
+            lengths. The result is then computed with in-place operations, allocating
+            only the polarization. ``out`` is ignored if the parameters have extra
+            dims or variances, which in-place operations cannot handle.
+
+        Returns
+        -------
+        :
+            The transmission, using the memory of ``out`` if given.
+        """
+        if out is not None and self._supports_out(time, wavelength, out):
+            if wavelength.bins is None:
+                return self._evaluate_into(out, time, wavelength, plus_minus)
+            constituents = wavelength.bins.constituents
+            return sc.bins(
+                begin=constituents['begin'],
+                end=constituents['end'],
+                dim=constituents['dim'],
+                data=self._evaluate_into(
+                    out,
+                    time.bins.constituents['data'],
+                    constituents['data'],
+                    plus_minus,
+                ),
+            )
         opacity = self.opacity_function(wavelength)
-        polarization = self.polarization_function(time)
+        polarization = self._polarization(time)
         if plus_minus == 'plus':
             polarization *= -1.0
         elif isinstance(plus_minus, sc.Variable):
             polarization *= -plus_minus
         return self.transmission_empty_glass * sc.exp(-opacity * (1.0 + polarization))
 
-    def apply(self, data: sc.DataArray, plus_minus: PlusMinus) -> sc.Variable:
+    @property
+    def is_monotonic(self) -> bool:
+        """True, the transmission is monotonic in wavelength and in time."""
+        return True
+
+    def apply(
+        self,
+        data: sc.DataArray,
+        plus_minus: PlusMinus,
+        out: sc.Variable | None = None,
+    ) -> sc.Variable:
         return self(
             time=data.coords['time'],
             wavelength=data.coords['wavelength'],
             plus_minus=plus_minus,
+            out=out,
+        )
+
+    def supports_out(self, data: sc.DataArray) -> bool:
+        """Whether :py:meth:`apply` evaluates the data in place into ``out``."""
+        return self._evaluates_in_place(data.coords['time'], data.coords['wavelength'])
+
+    def _evaluates_in_place(self, time: sc.Variable, wavelength: sc.Variable) -> bool:
+        parameters = (
+            self.opacity_function.opacity0,
+            self.polarization_function.C,
+            self.polarization_function.T1,
+            self.transmission_empty_glass,
+        )
+        if any(p.ndim or p.variances is not None for p in parameters):
+            return False
+        # Units of the factors must be one, since the unit of out cannot change if it
+        # is a slice.
+        factors = (self.polarization_function.C, self.transmission_empty_glass)
+        if any(p.unit != sc.units.one for p in factors):
+            return False
+        if wavelength.bins is not None:
+            if time.bins is None:
+                return False
+            time = time.bins.constituents['data']
+            wavelength = wavelength.bins.constituents['data']
+        return time.sizes == wavelength.sizes and wavelength.variances is None
+
+    def _supports_out(
+        self, time: sc.Variable, wavelength: sc.Variable, out: sc.Variable
+    ) -> bool:
+        if not self._evaluates_in_place(time, wavelength):
+            return False
+        if wavelength.bins is not None:
+            wavelength = wavelength.bins.constituents['data']
+        return (
+            wavelength.sizes == out.sizes
+            and out.dtype == sc.DType.float64
+            and out.unit == sc.units.one
+        )
+
+    def _evaluate_into(
+        self,
+        out: sc.Variable,
+        time: sc.Variable,
+        wavelength: sc.Variable,
+        plus_minus: PlusMinus,
+    ) -> sc.Variable:
+        """Evaluate the transmission for dense inputs with in-place operations."""
+        # -opacity0 with the unit of the wavelength, such that out stays dimensionless.
+        scale = -self.opacity_function.opacity0 * sc.scalar(1.0, unit=wavelength.unit)
+        out.values = wavelength.values
+        out *= scale.to(unit='')
+        # The only allocation, shared with the allocating path.
+        polarization = self._polarization(time)
+        if plus_minus == 'plus':
+            polarization *= -1.0
+        elif isinstance(plus_minus, sc.Variable):
+            polarization *= -plus_minus
+        polarization += 1.0
+        out *= polarization
+        del polarization
+        sc.exp(out, out=out)
+        out *= self.transmission_empty_glass
+        return out
+
+    def _polarization(self, time: sc.Variable) -> sc.Variable:
+        """
+        Evaluate the polarization, once per run of equal consecutive times.
+
+        Events are stamped with the time of their pulse and stored in pulse order, so
+        many consecutive events share a time. The polarization is then computed once
+        per pulse and broadcast to the events with an index array.
+        """
+        if time.bins is not None:
+            function = self.polarization_function
+            if function.C.ndim or function.T1.ndim:
+                # The flat event buffer cannot hold the extra dims of a parameter
+                # scan, let Scipp broadcast instead.
+                return function(time)
+            constituents = time.bins.constituents
+            return sc.bins(
+                begin=constituents['begin'],
+                end=constituents['end'],
+                dim=constituents['dim'],
+                data=self._polarization(constituents['data']),
+            )
+        if time.ndim != 1 or (runs := _factorize_runs(time.values)) is None:
+            return self.polarization_function(time)
+        unique, index = runs
+        polarization = self.polarization_function(
+            sc.array(dims=time.dims, values=unique, unit=time.unit)
+        )
+        # C and T1 may have extra dims, e.g., in a parameter scan.
+        axis = polarization.dims.index(time.dim)
+        return sc.array(
+            dims=polarization.dims,
+            values=np.take(polarization.values, index, axis=axis),
+            variances=None
+            if polarization.variances is None
+            else np.take(polarization.variances, index, axis=axis),
+            unit=polarization.unit,
+        )
+
+
+def _factorize_runs(values: np.ndarray) -> tuple[np.ndarray, np.ndarray] | None:
+    """
+    Return the unique values and the index of each element into them.
+
+    Elements are first grouped into runs of equal consecutive elements, such that
+    only the value of each run needs to be sorted. Runs may be fragmented, e.g., if
+    events are binned in wavelength, each bin repeats the sequence of pulse times.
+    Returns None if the runs are too short for factorization to pay off.
+    """
+    if values.size < 2:
+        return None
+    starts = np.flatnonzero(values[1:] != values[:-1]) + 1
+    if 4 * (starts.size + 1) > values.size:
+        return None
+    starts = np.concatenate([[0], starts])
+    lengths = np.diff(starts, append=values.size)
+    unique, inverse = np.unique(values[starts], return_inverse=True)
+    return unique, np.repeat(inverse, lengths)
+
+
+def _validate_interval(start: sc.Variable, stop: sc.Variable) -> None:
+    for value in (start, stop):
+        if value.ndim != 0:
+            raise sc.DimensionError('Interval start and stop must be scalars.')
+        if value.dtype == sc.DType.datetime64:
+            raise ValueError(
+                'Interval start and stop must be relative to the shared time origin, '
+                'got a datetime. Subtract the origin, e.g., the start of the first '
+                'run.'
+            )
+        try:
+            value.to(unit='s', dtype='float64')
+        except sc.UnitError:
+            raise sc.UnitError(
+                f'Interval start and stop must be times, got unit {value.unit}.'
+            ) from None
+    if start.value < 0:
+        raise ValueError(
+            f'Interval starting at {start.value} {start.unit} is before the shared '
+            'time origin.'
+        )
+    if not stop > start.to(unit=stop.unit):
+        raise ValueError(f'Interval starting at {start.value} is empty or reversed.')
+
+
+@dataclass
+class PiecewiseTransmissionFunction(TransmissionFunction[PolarizingElement]):
+    """
+    Transmission of a sequence of cells, or refills of a cell, over a long run.
+
+    Consecutive time segments are given by their edges, each segment uses its own
+    transmission function, e.g., a :py:class:`He3TransmissionFunction` fitted for the
+    cell in the beam during the segment. Segments without a function, e.g., while a
+    cell is being swapped, and times outside of all segments give NaN.
+
+    Use :py:meth:`from_intervals` to create the function from intervals, which may
+    have gaps between them.
+
+    All segments share a single time origin, the origin of the ``time`` coordinate of
+    the data passed to :py:meth:`apply`, e.g., the start of the first run. The segment
+    edges are relative to this origin, and each function is evaluated with these
+    times, not with times relative to the start of its segment. Functions must thus
+    be fitted against the same time axis, e.g., a :py:class:`He3PolarizationFunction`
+    of a cell filled during the run describes the polarization at the shared origin,
+    not at the fill time.
+    """
+
+    edges: sc.Variable
+    """Sorted edges of the time segments, with one more entry than ``functions``."""
+    functions: list[TransmissionFunction[PolarizingElement] | None]
+    """Transmission function of each segment, None if there is none."""
+
+    def __post_init__(self) -> None:
+        if self.edges.ndim != 1 or self.edges.shape[0] != len(self.functions) + 1:
+            raise sc.DimensionError(
+                'Expected 1-D edges with one more entry than there are functions.'
+            )
+        if not sc.issorted(self.edges, self.edges.dim, order='ascending'):
+            raise ValueError('Segment edges must be sorted.')
+
+    @classmethod
+    def from_intervals(
+        cls,
+        intervals: Iterable[
+            tuple[sc.Variable, sc.Variable, TransmissionFunction[PolarizingElement]]
+        ],
+    ) -> 'PiecewiseTransmissionFunction[PolarizingElement]':
+        """
+        Create the function from (start, stop, function) intervals.
+
+        Intervals are sorted by their start and must not overlap. Start and stop are
+        durations relative to the shared time origin, see
+        :py:class:`PiecewiseTransmissionFunction`, and can thus not be negative.
+        """
+        intervals = sorted(intervals, key=lambda interval: interval[0].value)
+        if not intervals:
+            raise ValueError('Expected at least one interval.')
+        for start, stop, _ in intervals:
+            _validate_interval(start, stop)
+        unit = intervals[0][0].unit
+        edges = [intervals[0][0].to(unit=unit)]
+        functions = []
+        for start, stop, function in intervals:
+            start = start.to(unit=unit)
+            if start < edges[-1]:
+                raise ValueError(f'Interval starting at {start.value} overlaps.')
+            if start > edges[-1]:
+                edges.append(start)
+                functions.append(None)
+            edges.append(stop.to(unit=unit))
+            functions.append(function)
+        return cls(edges=sc.concat(edges, 'time'), functions=functions)
+
+    def segment_index(self, time: sc.Variable) -> np.ndarray:
+        """Index of the segment of each time, -1 outside of all segments."""
+        # Compare in float in the unit of the times, casting the times to, e.g., integer
+        # edges would truncate them.
+        edges = self.edges.to(unit=time.unit, dtype='float64').values
+        times = time.values
+        index = np.searchsorted(edges, times, side='right') - 1
+        # The last edge is inclusive.
+        index[times == edges[-1]] = len(self.functions) - 1
+        index[(index < 0) | (index >= len(self.functions))] = -1
+        return index
+
+    def _apply_to_table(
+        self, table: sc.DataArray, plus_minus: PlusMinus
+    ) -> sc.Variable:
+        (dim,) = table.dims
+        index = self.segment_index(table.coords['time'])
+        result = np.full(table.shape, np.nan)
+        unit = None
+        # Events are usually sorted by time, such that segments are contiguous and
+        # can be sliced without copies.
+        contiguous = bool(np.all(index[1:] >= index[:-1]))
+        if contiguous:
+            order = None
+            bounds = np.searchsorted(index, np.arange(len(self.functions) + 1))
+        else:
+            order = np.argsort(index, kind='stable')
+            bounds = np.searchsorted(index[order], np.arange(len(self.functions) + 1))
+        for i, function in enumerate(self.functions):
+            begin, end = bounds[i], bounds[i + 1]
+            if function is None or begin == end:
+                continue
+            if order is None:
+                selection = slice(begin, end)
+                segment = table[dim, begin:end]
+            else:
+                selection = order[begin:end]
+                segment = table[dim, selection]
+            transmission = function.apply(segment, plus_minus)
+            unit = transmission.unit
+            result[selection] = transmission.values
+        return sc.array(dims=[dim], values=result, unit=unit or '')
+
+    def apply(
+        self,
+        data: sc.DataArray,
+        plus_minus: PlusMinus,
+        out: sc.Variable | None = None,
+    ) -> sc.Variable:
+        """
+        Evaluate the transmission of each event or time point of the data.
+
+        Events or points are assigned to their segment with a single search, each
+        segment is then evaluated in bulk by its transmission function. ``out`` is
+        ignored.
+        """
+        if isinstance(data, sc.DataArray) and data.bins is None:
+            # Dense data is evaluated like a table of points.
+            coords = {
+                name: coord.broadcast(sizes=data.sizes)
+                for name, coord in data.coords.items()
+                if not data.coords.is_edges(name)
+            }
+            table = sc.DataArray(data.data, coords=coords).flatten(to='_points')
+            return self._apply_to_table(table, plus_minus).fold(
+                dim='_points', sizes=data.sizes
+            )
+        constituents = (
+            data.bins if isinstance(data, sc.DataArray) else data
+        ).constituents
+        return sc.bins(
+            begin=constituents['begin'],
+            end=constituents['end'],
+            dim=constituents['dim'],
+            data=self._apply_to_table(constituents['data'], plus_minus),
         )
 
 
@@ -280,7 +660,7 @@ def get_he3_transmission_incoming_unpolarized_from_fit_to_direct_beam(
             polarization=polarization,
         )
 
-    popt, _ = sc.curve_fit(
+    popt, _ = _curve_fit(
         ['wavelength', 'time'],
         expected_transmission,
         _with_midpoints(transmission_fraction, 'wavelength'),
@@ -375,7 +755,7 @@ def get_he3_transmission_incoming_polarized_from_fit_to_direct_beam(
             transmission_empty_glass=transmission_empty_glass,
         )(time=time, wavelength=wavelength, plus_minus=plus_minus)
 
-    popt, _ = sc.curve_fit(
+    popt, _ = _curve_fit(
         ['wavelength', 'time', 'plus_minus'],
         expected_transmission,
         _with_midpoints(transmission_fraction, 'wavelength'),
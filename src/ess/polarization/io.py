@@ -0,0 +1,338 @@
+# SPDX-License-Identifier: BSD-3-Clause
+# Copyright (c) 2025 Scipp contributors (https://github.com/scipp)
+"""
+Saving and loading of transmission functions.
+
+Fitted transmission functions can be saved once and loaded by downstream jobs, instead
+of repeating the fits:
+
+.. code-block:: python
+
+    save_transmission_function(transmission, 'analyzer.h5')
+    transmission = load_transmission_function('analyzer.h5')
+
+The HDF5 file uses NeXus-compatible groups: Each object is an ``NXcollection`` and
+lookup tables are ``NXdata`` groups. Datasets have a ``units`` attribute and
+uncertainties are stored as ``<name>_errors``. A JSON sidecar with the same name
+lists the type and the scalar parameters with their units, for inspection without
+HDF5 tools. The format is versioned, files of newer versions are rejected.
+"""
+
+import io
+import json
+from pathlib import Path
+from typing import Any
+
+import h5py
+import numpy as np
+import scipp as sc
+
+from .he3 import (
+    He3OpacityFunction,
+    He3PolarizationFunction,
+    He3TransmissionFunction,
+    PiecewiseTransmissionFunction,
+)
+from .supermirror import (
+    EfficiencyLookupTable,
+    SecondDegreePolynomialEfficiency,
+    SupermirrorTransmissionFunction,
+)
+
+_HDF5_TYPES = (
+    He3OpacityFunction,
+    He3PolarizationFunction,
+    He3TransmissionFunction,
+    PiecewiseTransmissionFunction,
+    SecondDegreePolynomialEfficiency,
+    EfficiencyLookupTable,
+    SupermirrorTransmissionFunction,
+)
+
+
+def to_data_group(obj: Any) -> sc.DataGroup:
+    """
+    Convert a transmission function or one of its components to a data group.
+
+    The data group contains only Scipp objects and strings and can thus be saved to
+    HDF5 using :py:meth:`scipp.DataGroup.save_hdf5`. Use :py:func:`from_data_group`
+    to restore the object.
+    """
+    match obj:
+        case He3OpacityFunction():
+            return sc.DataGroup(type='He3OpacityFunction', opacity0=obj.opacity0)
+        case He3PolarizationFunction():
+            return sc.DataGroup(type='He3PolarizationFunction', C=obj.C, T1=obj.T1)
+        case He3TransmissionFunction():
+            return sc.DataGroup(
+                type='He3TransmissionFunction',
+                opacity_function=to_data_group(obj.opacity_function),
+                polarization_function=to_data_group(obj.polarization_function),
+                transmission_empty_glass=obj.transmission_empty_glass,
+            )
+        case PiecewiseTransmissionFunction():
+            # Segments are stored by their scalar start and stop, since the HDF5
+            # format supports only scalars and tables.
+            segments = {
+                str(i): sc.DataGroup(
+                    start=obj.edges[i],
+                    stop=obj.edges[i + 1],
+                    function=to_data_group(function),
+                )
+                for i, function in enumerate(obj.functions)
+                if function is not None
+            }
+            return sc.DataGroup(
+                type='PiecewiseTransmissionFunction', segments=sc.DataGroup(segments)
+            )
+        case SecondDegreePolynomialEfficiency():
+            return sc.DataGroup(
+                type='SecondDegreePolynomialEfficiency', a=obj.a, b=obj.b, c=obj.c
+            )
+        case EfficiencyLookupTable():
+            dg = sc.DataGroup(type='EfficiencyLookupTable', table=obj.table)
+            if obj.uniform_grid:
+                dg['uniform_grid'] = 'lookup'
+            return dg
+        case SupermirrorTransmissionFunction():
+            return sc.DataGroup(
+                type='SupermirrorTransmissionFunction',
+                efficiency_function=to_data_group(obj.efficiency_function),
+                memo_size=sc.scalar(obj.memo_size),
+                memo_bytes=sc.scalar(obj.memo_bytes),
+            )
+    raise TypeError(f'Cannot convert {type(obj).__name__} to a data group.')
+
+
+def from_data_group(dg: sc.DataGroup) -> Any:
+    """Restore an object converted with :py:func:`to_data_group`."""
+    match dg['type']:
+        case 'He3OpacityFunction':
+            return He3OpacityFunction(dg['opacity0'])
+        case 'He3PolarizationFunction':
+            return He3PolarizationFunction(C=dg['C'], T1=dg['T1'])
+        case 'He3TransmissionFunction':
+            return He3TransmissionFunction(
+                opacity_function=from_data_group(dg['opacity_function']),
+                polarization_function=from_data_group(dg['polarization_function']),
+                transmission_empty_glass=dg['transmission_empty_glass'],
+            )
+        case 'PiecewiseTransmissionFunction':
+            return PiecewiseTransmissionFunction.from_intervals(
+                (
+                    segment['start'],
+                    segment['stop'],
+                    from_data_group(segment['function']),
+                )
+                for segment in dg['segments'].values()
+            )
+        case 'SecondDegreePolynomialEfficiency':
+            return SecondDegreePolynomialEfficiency(a=dg['a'], b=dg['b'], c=dg['c'])
+        case 'EfficiencyLookupTable':
+            # Files of earlier versions may store the removed grid modes 'linear' and
+            # 'constant' and a tolerance, the grid now always reproduces the lookup.
+            return EfficiencyLookupTable(
+                table=dg['table'], uniform_grid='uniform_grid' in dg
+            )
+        case 'SupermirrorTransmissionFunction':
+            memo_size = dg.get('memo_size')
+            memo_bytes = dg.get('memo_bytes')
+            return SupermirrorTransmissionFunction(
+                efficiency_function=from_data_group(dg['efficiency_function']),
+                memo_size=1 if memo_size is None else int(memo_size.value),
+                memo_bytes=2**30 if memo_bytes is None else int(memo_bytes.value),
+            )
+    raise ValueError(f"Unknown type '{dg['type']}'.")
+
+
+def to_bytes(obj: Any) -> bytes:
+    """
+    Serialize a transmission function or one of its components to bytes.
+
+    This is used for pickling, e.g., when sending transmission functions to dask
+    workers. Use :py:func:`from_bytes` to restore the object.
+    """
+    buffer = io.BytesIO()
+    to_data_group(obj).save_hdf5(buffer)
+    return buffer.getvalue()
+
+
+def from_bytes(data: bytes) -> Any:
+    """Restore an object serialized with :py:func:`to_bytes`."""
+    return from_data_group(sc.io.load_hdf5(io.BytesIO(data)))
+
+
+def reduce_ex(obj: Any, protocol: int) -> Any:
+    """
+    Implementation of ``__reduce_ex__`` for the transmission functions.
+
+    Scipp objects cannot be pickled, so the types supported by :py:func:`to_data_group`
+    are pickled as HDF5 bytes. Caches such as memoized efficiencies are not included.
+    Other objects, e.g., user-defined subclasses, use the default implementation,
+    which requires :py:func:`ess.polarization.cluster.register_scipp_pickling` if they
+    hold Scipp objects.
+    """
+    # Subclasses would be restored as their base class.
+    if type(obj) not in _HDF5_TYPES:
+        return object.__reduce_ex__(obj, protocol)
+    return from_bytes, (to_bytes(obj),)
+
+
+FORMAT = 'ess.polarization.transmission_function'
+FORMAT_VERSION = 1
+
+
+def _write_variable(group: h5py.Group, name: str, var: sc.Variable) -> None:
+    dataset = group.create_dataset(name, data=var.values)
+    if var.unit is not None:
+        dataset.attrs['units'] = str(var.unit)
+    if var.variances is not None:
+        errors = group.create_dataset(f'{name}_errors', data=np.sqrt(var.variances))
+        if var.unit is not None:
+            errors.attrs['units'] = str(var.unit)
+
+
+def _write_group(group: h5py.Group, dg: sc.DataGroup) -> None:
+    group.attrs['NX_class'] = 'NXcollection'
+    for name, value in dg.items():
+        if isinstance(value, str):
+            group.attrs[name] = value
+        elif isinstance(value, sc.DataGroup):
+            _write_group(group.create_group(name), value)
+        elif isinstance(value, sc.DataArray):
+            if value.ndim != 1:
+                raise ValueError(f"Only 1-D tables are supported, got '{name}'.")
+            table = group.create_group(name)
+            table.attrs['NX_class'] = 'NXdata'
+            signal = value.name or 'data'
+            table.attrs['signal'] = signal
+            table.attrs['axes'] = [value.dim]
+            _write_variable(table, signal, value.data)
+            for coord_name, coord in value.coords.items():
+                _write_variable(table, coord_name, coord)
+        else:
+            _write_variable(group, name, value)
+            if value.ndim > 0:
+                # E.g., parameters with a scan dim.
+                group[name].attrs['dims'] = list(value.dims)
+
+
+def _read_variable(group: h5py.Group, name: str, dims: tuple[str, ...]) -> sc.Variable:
+    dataset = group[name]
+    unit = dataset.attrs.get('units')
+    values = dataset[()]
+    variances = None
+    if f'{name}_errors' in group:
+        variances = group[f'{name}_errors'][()] ** 2
+    if values.ndim == 0:
+        variance = None if variances is None else variances.item()
+        return sc.scalar(values.item(), variance=variance, unit=unit)
+    return sc.array(dims=dims, values=values, variances=variances, unit=unit)
+
+
+def _read_group(group: h5py.Group) -> sc.DataGroup:
+    dg = sc.DataGroup(
+        {name: value for name, value in group.attrs.items() if name != 'NX_class'}
+    )
+    for name, item in group.items():
+        if name.endswith('_errors'):
+            continue
+        if isinstance(item, h5py.Dataset):
+            dims = tuple(str(dim) for dim in item.attrs.get('dims', ()))
+            dg[name] = _read_variable(group, name, dims)
+        elif item.attrs.get('NX_class') == 'NXdata':
+            (dim,) = item.attrs['axes']
+            signal = item.attrs['signal']
+            coords = {
+                coord: _read_variable(item, coord, (dim,))
+                for coord in item
+                if coord != signal and not coord.endswith('_errors')
+            }
+            dg[name] = sc.DataArray(
+                _read_variable(item, signal, (dim,)), coords=coords, name=signal
+            )
+        else:
+            dg[name] = _read_group(item)
+    return dg
+
+
+def _sidecar_content(dg: sc.DataGroup, path: str = '') -> dict[str, Any]:
+    content = {}
+    for name, value in dg.items():
+        if isinstance(value, str):
+            content[name] = value
+        elif isinstance(value, sc.DataGroup):
+            content[name] = _sidecar_content(value, f'{path}/{name}')
+        elif isinstance(value, sc.DataArray):
+            content[name] = {'hdf5_path': f'{path}/{name}', 'size': value.size}
+        elif value.ndim == 0:
+            scalar = value.value
+            if isinstance(scalar, np.generic):
+                scalar = scalar.item()
+            content[name] = {'value': scalar, 'unit': str(value.unit)}
+    return content
+
+
+def _sidecar_path(filename: Path) -> Path:
+    return filename.with_suffix('.json')
+
+
+def save_transmission_function(obj: Any, filename: str | Path) -> None:
+    """
+    Save a transmission function to an HDF5 file and a JSON sidecar.
+
+    Supported are :py:class:`He3TransmissionFunction`,
+    :py:class:`PiecewiseTransmissionFunction`, and
+    :py:class:`SupermirrorTransmissionFunction` as well as their components, e.g.,
+    :py:class:`He3PolarizationFunction` or :py:class:`EfficiencyLookupTable`.
+
+    Parameters
+    ----------
+    obj:
+        The object to save.
+    filename:
+        Name of the HDF5 file. The sidecar is written next to it, with suffix
+        '.json'.
+    """
+    from . import __version__
+
+    filename = Path(filename)
+    dg = to_data_group(obj)
+    with h5py.File(filename, 'w') as f:
+        entry = f.create_group('transmission_function')
+        _write_group(entry, dg)
+        entry.attrs['format'] = FORMAT
+        entry.attrs['format_version'] = FORMAT_VERSION
+    sidecar = {
+        'format': FORMAT,
+        'format_version': FORMAT_VERSION,
+        'esspolarization_version': __version__,
+        'hdf5_file': filename.name,
+        'transmission_function': _sidecar_content(dg, '/transmission_function'),
+    }
+    _sidecar_path(filename).write_text(json.dumps(sidecar, indent=2))
+
+
+def load_transmission_function(filename: str | Path) -> Any:
+    """
+    Load a transmission function saved with :py:func:`save_transmission_function`.
+
+    Parameters
+    ----------
+    filename:
+        Name of the HDF5 file.
+    """
+    with h5py.File(filename, 'r') as f:
+        entry = f['transmission_function']
+        if entry.attrs.get('format') != FORMAT:
+            raise ValueError(f"'{filename}' does not contain a transmission function.")
+        version = int(entry.attrs['format_version'])
+        if version > FORMAT_VERSION:
+            raise ValueError(
+                f"'{filename}' has format version {version}, but only versions up to "
+                f'{FORMAT_VERSION} are supported. Please update esspolarization.'
+            )
+        dg = _read_group(entry)
+    del dg['format']
+    del dg['format_version']
+    return from_data_group(dg)
@@ -0,0 +1,245 @@
+# SPDX-License-Identifier: BSD-3-Clause
+# Copyright (c) 2025 Scipp contributors (https://github.com/scipp)
+"""
+Opt-in instrumentation of workflow computations.
+
+Pass a :py:class:`ProviderProfiler` as the reporter when computing results of any
+workflow of this package, e.g., :py:func:`ess.polarization.He3CellWorkflow`:
+
+.. code-block:: python
+
+    profiler = ProviderProfiler()
+    workflow.compute(TransmissionFunction[Analyzer], reporter=profiler)
+    print(profiler.summary())
+    profiler.save_chrome_trace('trace.json')
+
+The trace can be opened in ``chrome://tracing`` or https://ui.perfetto.dev.
+"""
+
+from __future__ import annotations
+
+import dataclasses
+import json
+import os
+import threading
+import time
+from collections.abc import Callable, Hashable
+from dataclasses import dataclass
+from pathlib import Path
+from types import TracebackType
+from typing import TYPE_CHECKING, Any
+
+import scipp as sc
+from sciline.reporter import Reporter
+
+if TYPE_CHECKING:
+    from sciline._provider import Provider
+
+try:
+    import resource
+except ImportError:  # Not available on Windows
+    resource = None
+
+_current = threading.local()
+
+
+@dataclass
+class ProviderCall:
+    """Measurements of a single provider call."""
+
+    name: str
+    """Fully qualified name of the provider."""
+    thread: int
+    """Identifier of the thread that ran the provider."""
+    start: float
+    """Start time in seconds, relative to the start of the computation."""
+    wall_time: float = 0.0
+    """Wall-clock time in seconds."""
+    cpu_time: float = 0.0
+    """CPU time of the calling thread in seconds."""
+    peak_rss_delta: int | None = None
+    """
+    Increase of the peak resident set size of the process in bytes.
+
+    The peak is process-wide and only increases if a call exceeds the previous peak.
+    With parallel schedulers the increase may thus be attributed to any of the
+    concurrently running providers. None if not supported by the platform.
+    """
+    output_bytes: int | None = None
+    """Size of the output in bytes, None if the output is not a Scipp object."""
+    fit_evaluations: int = 0
+    """Number of model evaluations in fits performed by the provider."""
+
+
+def _peak_rss() -> int | None:
+    if resource is None:
+        return None
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _output_bytes(obj: Any) -> int | None:
+    if isinstance(obj, sc.Variable | sc.DataArray | sc.Dataset):
+        return obj.underlying_size()
+    if isinstance(obj, sc.DataGroup):
+        sizes = [_output_bytes(value) for value in obj.values()]
+    elif dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        sizes = [_output_bytes(getattr(obj, f.name)) for f in dataclasses.fields(obj)]
+    else:
+        return None
+    sizes = [size for size in sizes if size is not None]
+    return sum(sizes) if sizes else None
+
+
+def record_fit_evaluations(count: int) -> None:
+    """
+    Add model evaluations of a fit to the currently profiled provider call.
+
+    Does nothing if no provider is profiled in the calling thread.
+    """
+    if (call := getattr(_current, 'call', None)) is not None:
+        call.fit_evaluations += count
+
+
+def _provider_name(provider: Provider) -> str:
+    func = provider.func
+    module = getattr(func, '__module__', None)
+    name = getattr(func, '__qualname__', repr(func))
+    return name if module is None else f'{module}.{name}'
+
+
+class ProviderProfiler(Reporter):
+    """
+    Reporter recording time, memory, and output size of each provider call.
+
+    Works with the default (Dask) as well as the naive scheduler. The same profiler can
+    be used for multiple consecutive computations, which are recorded together. It must
+    not be used for multiple computations concurrently.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._calls: list[ProviderCall] = []
+        self._origin: float | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def calls(self) -> list[ProviderCall]:
+        """Recorded provider calls, ordered by start time."""
+        return sorted(self._calls, key=lambda call: call.start)
+
+    def __enter__(self) -> None:
+        if self._origin is None:
+            self._origin = time.perf_counter()
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_val: BaseException | None,
+        exc_tb: TracebackType | None,
+    ) -> None:
+        pass
+
+    def on_provider_start(self, provider: Provider) -> int:
+        # Not used, since we wrap provider calls ourselves to obtain the outputs.
+        return self._get_provider_id()
+
+    def on_provider_end(self, provider_id: int) -> None:
+        pass
+
+    def _profile(self, provider: Provider, call: Callable[[], Any]) -> Any:
+        record = ProviderCall(
+            name=_provider_name(provider),
+            thread=threading.get_ident(),
+            start=time.perf_counter() - (self._origin or 0.0),
+        )
+        rss = _peak_rss()
+        cpu = time.thread_time()
+        wall = time.perf_counter()
+        previous = getattr(_current, 'call', None)
+        _current.call = record
+        try:
+            result = call()
+        finally:
+            _current.call = previous
+            record.wall_time = time.perf_counter() - wall
+            record.cpu_time = time.thread_time() - cpu
+            if rss is not None:
+                record.peak_rss_delta = _peak_rss() - rss
+            with self._lock:
+                self._calls.append(record)
+        record.output_bytes = _output_bytes(result)
+        return result
+
+    def reporting_provider_func(self, provider: Provider) -> Callable[..., Any]:
+        if provider.kind != 'function':
+            return provider
+
+        def profiled(*args: Any, **kwargs: Any) -> Any:
+            return self._profile(provider, lambda: provider(*args, **kwargs))
+
+        return profiled
+
+    def call_provider_with_reporting(
+        self, provider: Provider, values: dict[Hashable, Any]
+    ) -> Any:
+        if provider.kind != 'function':
+            return provider.call_arg_dict(values)
+        return self._profile(provider, lambda: provider.call_arg_dict(values))
+
+    def as_table(self) -> list[dict[str, Any]]:
+        """Recorded calls as a list of rows, one per call."""
+        return [dataclasses.asdict(call) for call in self.calls]
+
+    def as_pandas(self) -> Any:
+        """Recorded calls as a :class:`pandas.DataFrame`."""
+        import pandas as pd
+
+        return pd.DataFrame(self.as_table())
+
+    def summary(self) -> str:
+        """Return a table of the recorded calls, slowest first."""
+        header = (
+            f'{"Wall [ms]":>10} {"CPU [ms]":>10} {"Peak RSS +[MB]":>15} '
+            f'{"Output [MB]":>12} {"Fit evals":>9}  Provider'
+        )
+
+        def megabytes(value: int | None) -> str:
+            return '-' if value is None else f'{value / 2**20:.1f}'
+
+        rows = [
+            f'{call.wall_time * 1e3:10.3f} {call.cpu_time * 1e3:10.3f} '
+            f'{megabytes(call.peak_rss_delta):>15} '
+            f'{megabytes(call.output_bytes):>12} {call.fit_evaluations:9d}  '
+            f'{call.name}'
+            for call in sorted(self._calls, key=lambda c: c.wall_time, reverse=True)
+        ]
+        return '\n'.join([header, *rows])
+
+    def chrome_trace(self) -> dict[str, Any]:
+        """Recorded calls in the Chrome trace event format."""
+        pid = os.getpid()
+        events = [
+            {
+                'name': call.name.rsplit('.', 1)[-1],
+                'cat': 'provider',
+                'ph': 'X',
+                'ts': call.start * 1e6,
+                'dur': call.wall_time * 1e6,
+                'pid': pid,
+                'tid': call.thread,
+                'args': {
+                    'provider': call.name,
+                    'cpu_time_ms': call.cpu_time * 1e3,
+                    'peak_rss_delta': call.peak_rss_delta,
+                    'output_bytes': call.output_bytes,
+                    'fit_evaluations': call.fit_evaluations,
+                },
+            }
+            for call in self.calls
+        ]
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def save_chrome_trace(self, filename: str | os.PathLike[str]) -> None:
+        """Write the recorded calls to a Chrome trace file."""
+        Path(filename).write_text(json.dumps(self.chrome_trace()))
@@ -0,0 +1,238 @@
+# SPDX-License-Identifier: BSD-3-Clause
+# Copyright (c) 2025 Scipp contributors (https://github.com/scipp)
+"""
+Resident correction service with an HTTP interface.
+
+Starting a reduction process imports the dependencies, builds the workflows, and fits
+the cells before any data is corrected. The service does this once and keeps the
+fitted transmission functions in memory, such that each correction request only loads
+and corrects the data:
+
+.. code-block:: console
+
+    esspolarization-service manifest.json --port 8765
+
+The manifest has the format used by :py:mod:`ess.polarization.batch`, runs are
+optional. The service accepts JSON requests, relative paths are relative to the
+manifest:
+
+- ``GET /status``: The cells and the number of served requests.
+- ``POST /correct`` with ``{"files": {"up_up": ..., ...}, "output": ...}``: Correct a
+  run and write the result, as in :py:mod:`ess.polarization.batch`.
+- ``POST /cells/<name>`` with a cell as in the manifest: Refit the polarizer or
+  analyzer, e.g., when new direct-beam data has arrived. Corrections in progress
+  finish with the previous cell.
+
+Outputs must be inside the directory of the manifest. Errors are returned with status
+400 and a JSON object with an ``"error"`` field.
+"""
+
+import argparse
+import json
+import threading
+import time
+from collections.abc import Mapping
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Any
+
+from .batch import (
+    ELEMENTS,
+    cell_workflow_result,
+    correct_files,
+    correction_workflow,
+    fit_cells,
+)
+
+
+class CorrectionService:
+    """
+    Fitted cells and a correction workflow, kept in memory between requests.
+
+    Parameters
+    ----------
+    cells:
+        Transmission functions of the polarizer and analyzer, by cell name.
+    flipper_efficiency:
+        Flipper efficiencies by cell name. Flippers not given have efficiency 1.
+    base_dir:
+        Directory relative to which paths in requests are resolved.
+    """
+
+    def __init__(
+        self,
+        cells: Mapping[str, Any],
+        *,
+        flipper_efficiency: Mapping[str, float] | None = None,
+        base_dir: str | Path = '.',
+    ) -> None:
+        self._flipper_efficiency = dict(flipper_efficiency or {})
+        self._base_dir = Path(base_dir)
+        self._lock = threading.Lock()
+        self._cells = dict(cells)
+        self._workflow = correction_workflow(self._cells, self._flipper_efficiency)
+        self._served = 0
+        self._started = time.monotonic()
+
+    @classmethod
+    def from_manifest(cls, manifest: str | Path) -> 'CorrectionService':
+        """Fit the cells of a batch manifest and create a service."""
+        manifest = Path(manifest)
+        content = json.loads(manifest.read_text())
+        return cls(
+            fit_cells(content, manifest.parent),
+            flipper_efficiency=content.get('flipper_efficiency'),
+            base_dir=manifest.parent,
+        )
+
+    @property
+    def cells(self) -> dict[str, Any]:
+        """Current transmission functions by cell name."""
+        with self._lock:
+            return dict(self._cells)
+
+    def refresh_cell(self, name: str, spec: Mapping[str, Any]) -> float:
+        """
+        Refit a cell and use it for subsequent corrections.
+
+        Parameters
+        ----------
+        name:
+            'polarizer' or 'analyzer'.
+        spec:
+            The cell, in the format of the ``cells`` of a batch manifest.
+
+        Returns
+        -------
+        :
+            Time taken by the fit in seconds.
+        """
+        if name not in ELEMENTS:
+            raise ValueError(f'Unknown cell {name!r}, expected {[*ELEMENTS]}.')
+        start = time.perf_counter()
+        # Fit outside the lock, such that corrections continue meanwhile.
+        cell = cell_workflow_result(ELEMENTS[name], spec, self._base_dir)
+        with self._lock:
+            self._cells[name] = cell
+            self._workflow = correction_workflow(self._cells, self._flipper_efficiency)
+        return time.perf_counter() - start
+
+    def correct(self, files: Mapping[str, str], output: str) -> dict[str, Any]:
+        """
+        Correct the spin channels of a run and write the result.
+
+        Parameters
+        ----------
+        files:
+            Data files of the spin channels, 'up_up', 'up_down', 'down_up', and
+            'down_down'.
+        output:
+            Output file, must be inside the base directory of the service.
+
+        Returns
+        -------
+        :
+            The output file, the number of events, and the time taken in seconds.
+        """
+        start = time.perf_counter()
+        base_dir = self._base_dir.resolve()
+        output = (base_dir / output).resolve()
+        if not output.is_relative_to(base_dir):
+            raise ValueError(f'Output {output} is outside of {base_dir}.')
+        with self._lock:
+            workflow = self._workflow
+        events = correct_files(workflow, files, self._base_dir, output)
+        with self._lock:
+            self._served += 1
+        return {
+            'output': str(output),
+            'events': events,
+            'seconds': time.perf_counter() - start,
+        }
+
+    def status(self) -> dict[str, Any]:
+        """The cell types, the number of served corrections, and the uptime."""
+        with self._lock:
+            return {
+                'cells': {
+                    name: type(cell).__name__ for name, cell in self._cells.items()
+                },
+                'served': self._served,
+                'uptime': time.monotonic() - self._started,
+            }
+
+    def server(self, host: str = '127.0.0.1', port: int = 0) -> ThreadingHTTPServer:
+        """
+        Create an HTTP server for the service.
+
+        Requests are handled in threads. Call ``serve_forever`` to start serving,
+        possibly in a separate thread, and ``shutdown`` to stop. With port 0 a free
+        port is chosen, see ``server_address``.
+        """
+        return _Server((host, port), self)
+
+
+class _Server(ThreadingHTTPServer):
+    def __init__(
+        self, server_address: tuple[str, int], service: CorrectionService
+    ) -> None:
+        super().__init__(server_address, _Handler)
+        self.service = service
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: _Server
+
+    def _respond(self, status: HTTPStatus, content: Mapping[str, Any]) -> None:
+        body = json.dumps(content).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self) -> None:
+        if self.path == '/status':
+            self._respond(HTTPStatus.OK, self.server.service.status())
+        else:
+            self._respond(HTTPStatus.NOT_FOUND, {'error': f'Unknown path {self.path}'})
+
+    def do_POST(self) -> None:
+        service = self.server.service
+        try:
+            length = int(self.headers.get('Content-Length', 0))
+            request = json.loads(self.rfile.read(length) or b'{}')
+            if self.path == '/correct':
+                content = service.correct(request['files'], request['output'])
+            elif self.path.startswith('/cells/'):
+                name = self.path.removeprefix('/cells/')
+                content = {'seconds': service.refresh_cell(name, request)}
+            else:
+                self._respond(
+                    HTTPStatus.NOT_FOUND, {'error': f'Unknown path {self.path}'}
+                )
+                return
+        except Exception as error:
+            self._respond(HTTPStatus.BAD_REQUEST, {'error': repr(error)})
+            return
+        self._respond(HTTPStatus.OK, content)
+
+
+def main(argv: list[str] | None = None) -> None:
+    """Entry point of the ``esspolarization-service`` command."""
+    parser = argparse.ArgumentParser(
+        prog='esspolarization-service',
+        description='Serve polarization corrections with cells kept in memory.',
+    )
+    parser.add_argument('manifest', type=Path, help='JSON manifest with the cells.')
+    parser.add_argument('--host', default='127.0.0.1', help='Address to listen on.')
+    parser.add_argument('--port', type=int, default=8765, help='Port to listen on.')
+    args = parser.parse_args(argv)
+    server = CorrectionService.from_manifest(args.manifest).server(args.host, args.port)
+    with server:
+        server.serve_forever()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,25 +1,38 @@
 # SPDX-License-Identifier: BSD-3-Clause
 # Copyright (c) 2023 Scipp contributors (https://github.com/scipp)
 
+import hashlib
+import json
+import os
+import tempfile
+import threading
 from abc import ABC, abstractmethod
-from dataclasses import dataclass
+from collections import OrderedDict
+from collections.abc import Hashable, Mapping
+from dataclasses import dataclass, field
 from io import BytesIO, StringIO
 from pathlib import Path
 from typing import Any, Generic, Self
 
+import numpy as np
 import sciline
 import scipp as sc
 
-from .types import PlusMinus, PolarizingElement, TransmissionFunction
+from .types import HDF5Picklable, PlusMinus, PolarizingElement, TransmissionFunction
 
 
-class SupermirrorEfficiencyFunction(Generic[PolarizingElement], ABC):
+class SupermirrorEfficiencyFunction(HDF5Picklable, Generic[PolarizingElement], ABC):
     """Base class for supermirror efficiency functions"""
 
     @abstractmethod
     def __call__(self, *, wavelength: sc.Variable) -> sc.Variable:
         """Return the efficiency of a supermirror for a given wavelength"""
 
+    @property
+    def is_monotonic(self) -> bool:
+        """Whether the efficiency is monotonic for positive wavelengths"""
+        return False
+
 
 @dataclass
 class SecondDegreePolynomialEfficiency(
@@ -43,14 +56,40 @@ class SecondDegreePolynomialEfficiency(
     a: sc.Variable
     b: sc.Variable
     c: sc.Variable
+    _coefficients: dict[sc.Unit, tuple[sc.Variable, sc.Variable, sc.Variable]] = field(
+        default_factory=dict, init=False, repr=False, compare=False
+    )
+
+    def _coefficients_for(
+        self, unit: sc.Unit
+    ) -> tuple[sc.Variable, sc.Variable, sc.Variable]:
+        # Convert the coefficients once per wavelength unit, such that evaluating the
+        # polynomial does not require unit conversion of event-sized arrays.
+        if (coefficients := self._coefficients.get(unit)) is None:
+            length = sc.scalar(1.0, unit=unit)
+            coefficients = (
+                (self.a * length**2).to(unit='') / length**2,
+                (self.b * length).to(unit='') / length,
+                self.c.to(unit=''),
+            )
+            self._coefficients[unit] = coefficients
+        return coefficients
+
+    @property
+    def is_monotonic(self) -> bool:
+        """Whether the vertex of the parabola is at a non-positive wavelength"""
+        a, b, _ = self._coefficients_for(sc.Unit('angstrom'))
+        return bool(np.all(a.values * b.values >= 0))
 
     def __call__(self, *, wavelength: sc.Variable) -> sc.Variable:
         """Return the efficiency of a supermirror for a given wavelength"""
-        return (
-            (self.a * wavelength**2).to(unit='', copy=False)
-            + (self.b * wavelength).to(unit='', copy=False)
-            + self.c.to(unit='', copy=False)
-        )
+        a, b, c = self._coefficients_for(wavelength.unit)
+        # Horner's scheme with in-place operations, allocating a single result array
+        efficiency = a * wavelength
+        efficiency += b
+        efficiency *= wavelength
+        efficiency += c
+        return efficiency
 
 
 @dataclass
@@ -59,21 +98,36 @@ class EfficiencyLookupTable(SupermirrorEfficiencyFunction[PolarizingElement]):
     Efficiency of a supermirror as a lookup table.
     The names of the columns in the table has to be "wavelength", "efficiency".
 
+    By default the efficiency is looked up using :py:func:`scipp.lookup`, which
+    searches the table for every wavelength. That is, the efficiency of the nearest
+    wavelength in the table is used, or of the bin for tables with bin edges. For
+    large event lists, a uniform grid of cells covering the table can be built
+    instead, such that the lookup is a direct index computation. The result is the
+    same.
+
     Parameters
     ----------
     table:
         The lookup table.
+    uniform_grid:
+        If True, look up the efficiency using a uniform grid. The number of cells is
+        derived from the smallest spacing of the table, up to about a million.
     """
 
     table: sc.DataArray
+    uniform_grid: bool = False
 
     def __post_init__(self):
         table = self.table if self.table.variances is None else sc.values(self.table)
         self._lut = sc.lookup(table, 'wavelength')
+        if self.uniform_grid:
+            self._grid = _UniformGrid.from_table(table)
 
     def __call__(self, *, wavelength: sc.Variable) -> sc.Variable:
         """Return the efficiency of a supermirror for a given wavelength"""
-        return self._lut(wavelength)
+        if not self.uniform_grid:
+            return self._lut(wavelength)
+        return self._grid(wavelength)
 
     @classmethod
     def from_file(
@@ -82,8 +136,51 @@ class EfficiencyLookupTable(SupermirrorEfficiencyFunction[PolarizingElement]):
         wavelength_colname: str,
         efficiency_colname: str,
         wavelength_unit: sc.Unit | str = 'angstrom',
+        *,
+        cache_dir: str | Path | None = None,
         **kwargs: Any,
     ) -> Self:
+        """
+        Load the lookup table from a CSV file.
+
+        Parameters
+        ----------
+        path:
+            Path to the CSV file or file-like object.
+        wavelength_colname:
+            Name of the column containing the wavelength.
+        efficiency_colname:
+            Name of the column containing the efficiency.
+        wavelength_unit:
+            Unit of the wavelength column.
+        cache_dir:
+            If given, the parsed table is stored in a binary cache in this directory
+            and later loads of the same file read the cache instead of parsing the
+            CSV. The cache is invalidated if the file is modified. Ignored for
+            file-like objects.
+        kwargs:
+            Forwarded to :py:func:`scipp.io.load_csv`.
+        """
+        if cache_dir is not None and isinstance(path, str | Path):
+            cache_file = _efficiency_table_cache_file(
+                cache_dir,
+                path,
+                wavelength_colname=wavelength_colname,
+                efficiency_colname=efficiency_colname,
+                wavelength_unit=wavelength_unit,
+                **kwargs,
+            )
+            if cache_file.exists():
+                return cls(sc.io.load_hdf5(cache_file))
+            table = cls.from_file(
+                path,
+                wavelength_colname=wavelength_colname,
+                efficiency_colname=efficiency_colname,
+                wavelength_unit=wavelength_unit,
+                **kwargs,
+            ).table
+            _write_atomic(table, cache_file)
+            return cls(table)
         ds = sc.io.load_csv(path, **kwargs)
         wavelength = (
             ds[wavelength_colname]
@@ -99,24 +196,316 @@ class EfficiencyLookupTable(SupermirrorEfficiencyFunction[PolarizingElement]):
         return cls(sc.DataArray(efficiency, coords={'wavelength': wavelength}))
 
 
+def _efficiency_table_cache_file(
+    cache_dir: str | Path,
+    path: str | Path,
+    *,
+    wavelength_colname: str,
+    efficiency_colname: str,
+    wavelength_unit: sc.Unit | str = 'angstrom',
+    **kwargs: Any,
+) -> Path:
+    path = Path(path).resolve()
+    stat = path.stat()
+    key = json.dumps(
+        {
+            'path': str(path),
+            'mtime_ns': stat.st_mtime_ns,
+            'size': stat.st_size,
+            'wavelength_colname': wavelength_colname,
+            'efficiency_colname': efficiency_colname,
+            'wavelength_unit': str(sc.Unit(str(wavelength_unit))),
+            'kwargs': {name: repr(value) for name, value in kwargs.items()},
+        },
+        sort_keys=True,
+    )
+    digest = hashlib.sha256(key.encode()).hexdigest()[:32]
+    return Path(cache_dir) / f'efficiency-table-{digest}.h5'
+
+
+def _write_atomic(table: sc.DataArray, filename: Path) -> None:
+    filename.parent.mkdir(parents=True, exist_ok=True)
+    # Write to a temporary file first, such that concurrent readers never see a
+    # partially written cache file. The name is unique, also between threads.
+    with tempfile.NamedTemporaryFile(
+        dir=filename.parent, prefix=f'.{filename.name}.', suffix='.tmp', delete=False
+    ) as f:
+        tmp = Path(f.name)
+    try:
+        table.save_hdf5(tmp)
+        os.replace(tmp, filename)
+    finally:
+        tmp.unlink(missing_ok=True)
+
+
+def build_efficiency_table_cache(
+    cache_dir: str | Path, *tables: Mapping[str, Any]
+) -> list[Path]:
+    """
+    Pre-build the binary cache for a number of efficiency tables.
+
+    Subsequent calls of :py:meth:`EfficiencyLookupTable.from_file` with the same
+    arguments and ``cache_dir`` load the cached table without parsing the CSV file.
+
+    .. code-block:: python
+
+        build_efficiency_table_cache(
+            cache_dir,
+            {'path': polarizer_table, 'wavelength_colname': '# X ',
+             'efficiency_colname': ' Y '},
+            {'path': analyzer_table, 'wavelength_colname': '# X ',
+             'efficiency_colname': ' Y '},
+        )
+
+    Parameters
+    ----------
+    cache_dir:
+        Directory of the cache.
+    tables:
+        Keyword arguments of :py:meth:`EfficiencyLookupTable.from_file` for each table.
+
+    Returns
+    -------
+    :
+        Paths of the cache files.
+    """
+    files = []
+    for table in tables:
+        table = dict(table)
+        path = table.pop('path')
+        EfficiencyLookupTable.from_file(path, cache_dir=cache_dir, **table)
+        files.append(_efficiency_table_cache_file(cache_dir, path, **table))
+    return files
+
+
+_MAX_UNIFORM_GRID_SIZE = 2**20
+
+
+@dataclass(frozen=True)
+class _UniformGrid:
+    """
+    Step function given by boundaries and the values between them, evaluated with a
+    uniform grid of cells.
+
+    Each cell stores the index of the first boundary that may lie within it, such that
+    the value of a wavelength is found by a direct index computation and a comparison
+    with each boundary within its cell. This reproduces :py:func:`scipp.lookup`.
+    """
+
+    boundaries: np.ndarray
+    """Sorted boundaries, padded with +inf, region ``i`` ends at ``boundaries[i]``."""
+    values: np.ndarray
+    """Values of the regions, one more than there are boundaries."""
+    start: float
+    step: float
+    first: np.ndarray
+    """Index of the first boundary that may lie within each cell."""
+    per_cell: int
+    """Maximum number of boundaries that may lie within a cell."""
+    unit: sc.Unit
+    value_unit: sc.Unit
+
+    @classmethod
+    def from_table(cls, table: sc.DataArray) -> '_UniformGrid':
+        x = table.coords['wavelength'].to(dtype='float64').values
+        y = table.data.to(dtype='float64').values
+        if table.coords.is_edges('wavelength'):
+            # Histograms are looked up by their bins, NaN outside.
+            boundaries = x
+            values = np.concatenate([[np.nan], y, [np.nan]])
+        else:
+            # Points are looked up by the nearest point, ties go to the upper point.
+            boundaries = 0.5 * (x[1:] + x[:-1])
+            values = y
+        spacing = np.diff(boundaries)
+        spacing = spacing[spacing > 0]
+        start = boundaries[0] if boundaries.size else 0.0
+        if spacing.size == 0:
+            step, size = 1.0, 1
+        else:
+            extent = boundaries[-1] - start
+            # Cells no larger than the smallest spacing hold at most two boundaries,
+            # but the number of cells is bounded for very irregular tables.
+            size = min(int(np.ceil(extent / spacing.min())) + 1, _MAX_UNIFORM_GRID_SIZE)
+            step = extent / size
+        # Cells are widened slightly, such that rounding when computing the cell of a
+        # wavelength cannot miss a boundary.
+        edges = start + step * np.arange(size + 1)
+        margin = 1e-9 * step
+        first = np.searchsorted(boundaries, edges[:-1] - margin, 'left')
+        last = np.searchsorted(boundaries, edges[1:] + margin, 'right')
+        return cls(
+            boundaries=np.concatenate([boundaries, [np.inf]]),
+            values=values,
+            start=start,
+            step=step,
+            first=first,
+            per_cell=int((last - first).max(initial=0)),
+            unit=table.coords['wavelength'].unit,
+            value_unit=table.unit,
+        )
+
+    def _evaluate(self, x: np.ndarray) -> np.ndarray:
+        shape = np.shape(x)
+        x = np.reshape(x, -1)
+        cell = x - self.start
+        cell *= 1.0 / self.step
+        np.clip(cell, 0, len(self.first) - 1, out=cell)
+        np.nan_to_num(cell, copy=False)
+        region = self.first[cell.astype(np.intp)]
+        index = region.copy()
+        for _ in range(self.per_cell):
+            above = x >= self.boundaries[index]
+            region += above
+            index += 1
+            np.minimum(index, len(self.boundaries) - 1, out=index)
+        return self.values[region].reshape(shape)
+
+    def __call__(self, wavelength: sc.Variable) -> sc.Variable:
+        if wavelength.bins is not None:
+            constituents = wavelength.bins.constituents
+            constituents['data'] = self(constituents['data'])
+            return sc.bins(**constituents)
+        x = wavelength.to(unit=self.unit, dtype='float64', copy=False)
+        return sc.array(
+            dims=x.dims, values=self._evaluate(x.values), unit=self.value_unit
+        )
+
+
+def _buffer_key(var: sc.Variable) -> Hashable:
+    """Key identifying the memory and layout of a variable, without hashing values."""
+    if var.bins is not None:
+        constituents = var.bins.constituents
+        return (
+            _buffer_key(constituents['begin']),
+            _buffer_key(constituents['end']),
+            _buffer_key(constituents['data']),
+        )
+    values = var.values
+    return (
+        values.__array_interface__['data'][0],
+        values.shape,
+        values.strides,
+        str(var.dtype),
+        str(var.unit),
+    )
+
+
+class _EfficiencyMemo:
+    """
+    Bounded memo of efficiencies, keyed by the identity of the wavelength array.
+
+    Entries keep a reference to the wavelength array, so its memory cannot be reused
+    by another array while the entry exists. Modifying the wavelength array in-place
+    between calls is not detected. The memo can be used from multiple threads.
+
+    The memo is bounded by the number of entries and by the total size of the
+    wavelength and efficiency arrays it references. Least recently used entries are
+    evicted first, entries larger than ``maxbytes`` are not stored.
+    """
+
+    def __init__(self, maxsize: int, maxbytes: int) -> None:
+        self._maxsize = maxsize
+        self._maxbytes = maxbytes
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[Hashable, tuple[sc.Variable, sc.Variable, int]] = (
+            OrderedDict()
+        )
+        self._nbytes = 0
+
+    def __reduce__(self) -> Any:
+        # Copies and unpickled objects start with an empty memo and their own lock.
+        return type(self), (self._maxsize, self._maxbytes)
+
+    @property
+    def nbytes(self) -> int:
+        """Total size of the arrays referenced by the entries."""
+        return self._nbytes
+
+    def get(
+        self, function: SupermirrorEfficiencyFunction, wavelength: sc.Variable
+    ) -> sc.Variable:
+        if self._maxsize <= 0 or self._maxbytes <= 0:
+            return function(wavelength=wavelength)
+        key = _buffer_key(wavelength)
+        with self._lock:
+            if (entry := self._entries.get(key)) is not None:
+                self._entries.move_to_end(key)
+                return entry[1]
+        efficiency = function(wavelength=wavelength)
+        nbytes = wavelength.underlying_size() + efficiency.underlying_size()
+        if nbytes > self._maxbytes:
+            return efficiency
+        with self._lock:
+            if (entry := self._entries.pop(key, None)) is not None:
+                self._nbytes -= entry[2]
+            self._entries[key] = (wavelength, efficiency, nbytes)
+            self._nbytes += nbytes
+            while len(self._entries) > self._maxsize or self._nbytes > self._maxbytes:
+                self._nbytes -= self._entries.popitem(last=False)[1][2]
+        return efficiency
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._nbytes = 0
+
+
 @dataclass
 class SupermirrorTransmissionFunction(TransmissionFunction[PolarizingElement]):
-    """Wavelength-dependent transmission of a supermirror"""
+    """
+    Wavelength-dependent transmission of a supermirror
+
+    The efficiency is memoized for the most recently used wavelength arrays, such
+    that evaluating the 'plus' and 'minus' transmission for the same data computes
+    the efficiency only once.
+
+    Parameters
+    ----------
+    efficiency_function:
+        Efficiency of the supermirror.
+    memo_size:
+        Maximum number of wavelength arrays for which the efficiency is memoized. Set
+        to 0 to disable memoization.
+    memo_bytes:
+        Maximum total size in bytes of the wavelength and efficiency arrays kept
+        alive by the memo. Larger arrays are not memoized. This bounds the memory
+        retained by long-lived transmission functions, e.g., in a service.
+    """
 
     efficiency_function: SupermirrorEfficiencyFunction
+    memo_size: int = 1
+    memo_bytes: int = 2**30
+    _memo: _EfficiencyMemo = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        self._memo = _EfficiencyMemo(maxsize=self.memo_size, maxbytes=self.memo_bytes)
 
     def __call__(
         self, *, wavelength: sc.Variable, plus_minus: PlusMinus
     ) -> sc.Variable:
         """Return the transmission fraction for a given wavelength"""
-        efficiency = self.efficiency_function(wavelength=wavelength)
+        efficiency = self._memo.get(self.efficiency_function, wavelength)
         if plus_minus == 'plus':
-            return 0.5 * (1 + efficiency)
+            transmission = efficiency + 1.0
+            transmission *= 0.5
         else:
-            return 0.5 * (1 - efficiency)
+            transmission = efficiency * -0.5
+            transmission += 0.5
+        return transmission
 
-    def apply(self, data: sc.DataArray, plus_minus: PlusMinus) -> sc.Variable:
-        """Apply the transmission function to a data array"""
+    @property
+    def is_monotonic(self) -> bool:
+        """Whether the efficiency function is monotonic"""
+        return self.efficiency_function.is_monotonic
+
+    def apply(
+        self,
+        data: sc.DataArray,
+        plus_minus: PlusMinus,
+        out: sc.Variable | None = None,
+    ) -> sc.Variable:
+        """Apply the transmission function to a data array, ``out`` is ignored"""
         return self(wavelength=data.coords['wavelength'], plus_minus=plus_minus)
 
 
@@ -0,0 +1,324 @@
+# SPDX-License-Identifier: BSD-3-Clause
+# Copyright (c) 2025 Scipp contributors (https://github.com/scipp)
+"""
+Synthetic polarized data for testing and benchmarking.
+
+Events are generated from a forward model of the instrument, given the transmission
+functions of polarizer and analyzer, flipper efficiencies, and the spin-resolved
+intensities of the sample. Correcting the generated data with the same transmission
+functions recovers the sample intensities.
+"""
+
+from collections.abc import Callable, Iterator, Sequence
+
+import numpy as np
+import scipp as sc
+
+from .base import CellInBeamLog, CellSpinLog, SampleInBeamLog, spin_down, spin_up
+from .he3 import He3TransmissionFunction
+from .types import (
+    Analyzer,
+    Down,
+    FlipperEfficiency,
+    Polarizer,
+    ReducedSampleDataBySpinChannel,
+    TransmissionFunction,
+    Up,
+)
+
+SECTION_KINDS = (
+    'direct_beam',
+    'polarizer',
+    'analyzer',
+    'sample_up_up',
+    'sample_up_down',
+    'sample_down_up',
+    'sample_down_down',
+)
+"""Kinds of run sections, see :py:func:`make_run_section_logs`."""
+
+_Efficiency = float | sc.DataArray | Callable[..., sc.Variable]
+
+
+def _spin_index(spin: type[Up] | type[Down]) -> int:
+    if spin is Up:
+        return 0
+    if spin is Down:
+        return 1
+    raise ValueError(f'Expected Up or Down, got {spin}.')
+
+
+def _polarizer_weights(
+    t_plus: sc.Variable,
+    t_minus: sc.Variable,
+    spin: int,
+    flipper_efficiency: float | sc.Variable,
+) -> tuple[sc.Variable, sc.Variable]:
+    # Row `spin` of F @ P, with P = [[T+, T-], [T-, T+]] and F = [[1, 0], [1-f, f]].
+    if spin == 0:
+        return t_plus, t_minus
+    f = flipper_efficiency
+    return (1 - f) * t_plus + f * t_minus, (1 - f) * t_minus + f * t_plus
+
+
+def _analyzer_weights(
+    t_plus: sc.Variable,
+    t_minus: sc.Variable,
+    spin: int,
+    flipper_efficiency: float | sc.Variable,
+) -> tuple[sc.Variable, sc.Variable]:
+    # Row `spin` of A @ F, with A = [[T+, T-], [T-, T+]] and F = [[1, 0], [1-f, f]].
+    f = flipper_efficiency
+    if spin == 0:
+        return t_plus + (1 - f) * t_minus, f * t_minus
+    return t_minus + (1 - f) * t_plus, f * t_plus
+
+
+def iter_spin_channel_events(
+    polarizer_spin: type[Up] | type[Down],
+    analyzer_spin: type[Up] | type[Down],
+    *,
+    polarizer: TransmissionFunction[Polarizer],
+    analyzer: TransmissionFunction[Analyzer],
+    events: int,
+    time_range: sc.Variable,
+    wavelength_range: sc.Variable,
+    cross_sections: Sequence[float] = (1.0, 0.1, 0.1, 1.0),
+    polarizer_flipper_efficiency: _Efficiency = 1.0,
+    analyzer_flipper_efficiency: _Efficiency = 1.0,
+    chunk_size: int = 10_000_000,
+    seed: int = 0,
+) -> Iterator[sc.DataArray]:
+    """
+    Generate weighted events of a spin channel in chunks.
+
+    Each chunk covers a consecutive part of the time range, such that events are
+    sorted by time, as in a real measurement. Wavelengths are uniformly distributed.
+    The event weights are the measured intensity for the given flipper states, i.e.,
+    the sample intensities propagated through polarizer, flippers, and analyzer.
+    Memory use is bounded by the chunk size, independent of the total number of
+    events.
+
+    Parameters
+    ----------
+    polarizer_spin:
+        Spin state of the polarizer flipper, ``Up`` or ``Down``.
+    analyzer_spin:
+        Spin state of the analyzer flipper, ``Up`` or ``Down``.
+    polarizer:
+        Transmission function of the polarizer, e.g., of a supermirror.
+    analyzer:
+        Transmission function of the analyzer, e.g., of a He3 cell.
+    events:
+        Total number of events.
+    time_range:
+        Start and end time of the measurement, relative to the start of the run.
+    wavelength_range:
+        Minimum and maximum wavelength.
+    cross_sections:
+        Spin-resolved sample intensities, ordered as up-up, up-down, down-up, and
+        down-down.
+    polarizer_flipper_efficiency:
+        Efficiency of the polarizer flipper. Can depend on wavelength and time, see
+        :py:class:`ess.polarization.types.FlipperEfficiency`.
+    analyzer_flipper_efficiency:
+        Efficiency of the analyzer flipper, as for the polarizer.
+    chunk_size:
+        Maximum number of events per chunk.
+    seed:
+        Seed of the random number generator.
+    """
+    if len(cross_sections) != 4:
+        raise ValueError('Expected four cross sections, up-up to down-down.')
+    p_spin = _spin_index(polarizer_spin)
+    a_spin = _spin_index(analyzer_spin)
+    rng = np.random.default_rng(seed)
+    start, stop = time_range.to(dtype='float64').values
+    time_unit = time_range.unit
+    wavelength_range = wavelength_range.to(dtype='float64')
+    nchunk = max(-(-events // chunk_size), 1)
+    bounds = np.linspace(start, stop, num=nchunk + 1)
+    sizes = np.diff(np.linspace(0, events, num=nchunk + 1).astype(np.int64))
+    for size, t0, t1 in zip(sizes, bounds[:-1], bounds[1:], strict=True):
+        chunk = sc.DataArray(
+            sc.empty(dims=['event'], shape=[size], unit=''),
+            coords={
+                'time': sc.array(
+                    dims=['event'],
+                    values=np.sort(rng.uniform(t0, t1, size)),
+                    unit=time_unit,
+                ),
+                'wavelength': sc.array(
+                    dims=['event'],
+                    values=rng.uniform(*wavelength_range.values, size),
+                    unit=wavelength_range.unit,
+                ),
+            },
+        )
+        p_up, p_down = _polarizer_weights(
+            polarizer.apply(chunk, 'plus'),
+            polarizer.apply(chunk, 'minus'),
+            p_spin,
+            FlipperEfficiency(polarizer_flipper_efficiency).apply(chunk),
+        )
+        a_up, a_down = _analyzer_weights(
+            analyzer.apply(chunk, 'plus'),
+            analyzer.apply(chunk, 'minus'),
+            a_spin,
+            FlipperEfficiency(analyzer_flipper_efficiency).apply(chunk),
+        )
+        uu, ud, du, dd = cross_sections
+        chunk.data = (
+            p_up * (uu * a_up + ud * a_down) + p_down * (du * a_up + dd * a_down)
+        ).broadcast(sizes=chunk.sizes)
+        yield chunk
+
+
+def make_spin_channel_data(
+    polarizer_spin: type[Up] | type[Down],
+    analyzer_spin: type[Up] | type[Down],
+    *,
+    time_bins: sc.Variable,
+    wavelength_bins: sc.Variable,
+    **kwargs: object,
+) -> ReducedSampleDataBySpinChannel:
+    """
+    Generate events of a spin channel, binned in time and wavelength.
+
+    The binned result holds all events in memory. For event counts that do not fit
+    into memory use :py:func:`iter_spin_channel_events` and process the chunks
+    one by one. Keyword arguments are forwarded to
+    :py:func:`iter_spin_channel_events`, the time and wavelength ranges are given by
+    the first and last bin edges.
+    """
+    chunks = [
+        chunk.bin(time=time_bins, wavelength=wavelength_bins)
+        for chunk in iter_spin_channel_events(
+            polarizer_spin,
+            analyzer_spin,
+            time_range=time_bins[[0, -1]],
+            wavelength_range=wavelength_bins[[0, -1]],
+            **kwargs,
+        )
+    ]
+    binned = sc.reduce(chunks).bins.concat() if len(chunks) > 1 else chunks[0]
+    return ReducedSampleDataBySpinChannel[polarizer_spin, analyzer_spin](binned)
+
+
+def make_direct_beam_runs(
+    transmission: He3TransmissionFunction,
+    *,
+    time: sc.Variable,
+    wavelength: sc.Variable,
+    incoming: str = 'unpolarized',
+    noise: float = 0.0,
+    seed: int = 0,
+) -> tuple[sc.DataArray, sc.DataArray]:
+    """
+    Generate direct beam data without and with a He3 cell.
+
+    Parameters
+    ----------
+    transmission:
+        Transmission function of the cell.
+    time:
+        Times of the direct beam measurements with the cell.
+    wavelength:
+        Wavelengths of the direct beam data points.
+    incoming:
+        Polarization of the incoming beam, 'unpolarized', 'plus', or 'minus'. The
+        latter two correspond to a beam polarized parallel or antiparallel to the
+        cell.
+    noise:
+        Standard deviation of Gaussian noise, relative to the direct beam with cell.
+    seed:
+        Seed of the random number generator for the noise.
+
+    Returns
+    -------
+    :
+        Direct beam without the cell as a function of wavelength, and direct beam with
+        the cell as a function of time and wavelength. The ratio of the two is the
+        transmission fraction of the cell.
+    """
+    # Smooth spectrum, peaked at a few Angstrom.
+    scale = sc.scalar(3.0, unit='angstrom').to(unit=wavelength.unit)
+    spectrum = (wavelength / scale) ** 2 * sc.exp(-wavelength / scale * 2.0)
+    no_cell = sc.DataArray(spectrum.to(unit=''), coords={'wavelength': wavelength})
+    probe = sc.DataArray(
+        sc.empty(sizes={**time.sizes, **wavelength.sizes}, unit=''),
+        coords={'time': time, 'wavelength': wavelength},
+    )
+    if incoming == 'unpolarized':
+        fraction = 0.5 * (
+            transmission.apply(probe, 'plus') + transmission.apply(probe, 'minus')
+        )
+    elif incoming in ('plus', 'minus'):
+        fraction = transmission.apply(probe, incoming)
+    else:
+        raise ValueError(
+            "Expected incoming to be 'unpolarized', 'plus', or 'minus', "
+            f"got {incoming}."
+        )
+    with_cell = no_cell * fraction
+    if noise > 0.0:
+        rng = np.random.default_rng(seed)
+        with_cell.values *= 1.0 + rng.normal(0.0, noise, with_cell.shape)
+    return no_cell, with_cell.assign_coords(time=time)
+
+
+def make_run_section_logs(
+    sections: Sequence[str],
+    *,
+    section_duration: sc.Variable,
+) -> dict[type, sc.DataArray]:
+    """
+    Generate logs of sample and cells being in the beam, and of the cell spins.
+
+    Parameters
+    ----------
+    sections:
+        Kinds of consecutive run sections, see :py:data:`SECTION_KINDS`. Sample
+        sections specify the polarizer and analyzer spins, e.g., 'sample_up_down'.
+    section_duration:
+        Duration of each run section.
+
+    Returns
+    -------
+    :
+        Logs keyed by their type, for setting as workflow parameters. The logs have
+        one entry per section, plus a final entry marking the end of the last section.
+    """
+    unknown = set(sections) - set(SECTION_KINDS)
+    if unknown:
+        raise ValueError(f'Unknown run section kinds {sorted(unknown)}.')
+    n = len(sections)
+    time = sc.arange('time', float(n + 1)) * section_duration
+    sample = [kind.startswith('sample') for kind in sections]
+    polarizer = [
+        kind in ('polarizer',) or kind.startswith('sample') for kind in sections
+    ]
+    analyzer = [kind in ('analyzer',) or kind.startswith('sample') for kind in sections]
+    polarizer_spin = [kind.startswith('sample_down') for kind in sections]
+    analyzer_spin = [kind.endswith('_down') for kind in sections]
+
+    def log(values: list[bool]) -> sc.DataArray:
+        values = [*values, values[-1]] if values else [False]
+        return sc.DataArray(
+            sc.array(dims=['time'], values=values), coords={'time': time}
+        )
+
+    def spin(down: list[bool]) -> sc.DataArray:
+        down = [*down, down[-1]] if down else [False]
+        values = np.where(down, spin_down.value, spin_up.value)
+        return sc.DataArray(
+            sc.array(dims=['time'], values=values, unit=None), coords={'time': time}
+        )
+
+    return {
+        SampleInBeamLog: log(sample),
+        CellInBeamLog[Polarizer]: log(polarizer),
+        CellInBeamLog[Analyzer]: log(analyzer),
+        CellSpinLog[Polarizer]: spin(polarizer_spin),
+        CellSpinLog[Analyzer]: spin(analyzer_spin),
+    }
@@ -1,9 +1,12 @@
 # SPDX-License-Identifier: BSD-3-Clause
 # Copyright (c) 2023 Scipp contributors (https://github.com/scipp)
+import copy
 from abc import ABC, abstractmethod
-from dataclasses import dataclass
-from typing import Generic, Literal, NewType, TypeVar
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from typing import Any, Generic, Literal, NewType, TypeVar
 
+import numpy as np
 import sciline as sl
 import scipp as sc
 
@@ -28,11 +31,69 @@ PolarizingElement = TypeVar('PolarizingElement', Analyzer, Polarizer)
 PlusMinus = Literal['plus', 'minus']
 
 
-class TransmissionFunction(Generic[PolarizingElement], ABC):
+class HDF5Picklable:
+    """
+    Base for objects that are pickled as HDF5 bytes, since Scipp objects cannot be.
+
+    Only the types supported by :py:func:`ess.polarization.io.to_data_group` are
+    pickled this way, subclasses of them use the default mechanism. Copies are made
+    by copying the attributes, without HDF5.
+    """
+
+    def __reduce_ex__(self, protocol: int) -> Any:
+        from .io import reduce_ex
+
+        return reduce_ex(self, protocol)
+
+    def __copy__(self) -> Any:
+        result = object.__new__(type(self))
+        result.__dict__.update(self.__dict__)
+        return result
+
+    def __deepcopy__(self, memo: dict[int, Any]) -> Any:
+        result = object.__new__(type(self))
+        memo[id(self)] = result
+        result.__dict__.update(copy.deepcopy(self.__dict__, memo))
+        return result
+
+
+class TransmissionFunction(HDF5Picklable, Generic[PolarizingElement], ABC):
     """Wavelength- and time-dependent transmission for a given cell."""
 
     @abstractmethod
-    def apply(self, data: sc.DataArray, plus_minus: PlusMinus) -> sc.Variable: ...
+    def apply(
+        self,
+        data: sc.DataArray,
+        plus_minus: PlusMinus,
+        out: sc.Variable | None = None,
+    ) -> sc.Variable:
+        """
+        Evaluate the transmission at the coordinates of the data.
+
+        ``out`` is an optional float64 buffer for the result of binned data, with the
+        sizes of the event buffer. Implementations that cannot evaluate in place ignore
+        it and return a new variable, callers must use the returned variable. See
+        :py:meth:`supports_out`.
+        """
+
+    def supports_out(self, data: sc.DataArray) -> bool:
+        """
+        Whether :py:meth:`apply` evaluates the data in place into ``out``.
+
+        Callers allocate ``out`` only if this is True. False unless overridden.
+        """
+        return False
+
+    @property
+    def is_monotonic(self) -> bool:
+        """
+        Whether the transmission is monotonic in each coordinate.
+
+        The extrema within a range of coordinates are then at the corners of the range,
+        which is used for per-bin evaluation with :py:class:`CorrectionResolution`
+        ``'auto'``. False unless overridden.
+        """
+        return False
 
 
 @dataclass
@@ -43,6 +104,11 @@ class PolarizingElementCorrection(
 
     diag: sc.DataArray
     off_diag: sc.DataArray
+    fine: np.ndarray | None = field(default=None, repr=False, compare=False)
+    """
+    Bins with factors evaluated per event, for :py:class:`CorrectionResolution`
+    ``'auto'``. Flipper efficiencies are evaluated with the same resolution.
+    """
 
     def get(self, *, up: bool) -> tuple[sc.DataArray, sc.DataArray]:
         """Get the correction factors for up or down spin."""
@@ -98,6 +164,48 @@ TotalPolarizationCorrectedData = NewType(
 )
 
 
+CorrectionResolution = NewType('CorrectionResolution', str)
+"""
+Resolution at which correction factors of polarizing elements are evaluated.
+
+Applies to binned data only, dense data is always evaluated per point:
+
+- ``'event'``: Evaluate the transmission for every event.
+- ``'bin-center'``: Evaluate once per bin, at the centers of the bins. Coordinates the
+  data is not binned in are taken as the mean of the events in each bin.
+- ``'bin-mean'``: Evaluate once per bin, at the mean coordinates of the events in
+  the bin.
+- ``'auto'``: Evaluate once per bin, at the mean coordinates, if the transmission
+  changes by less than :py:class:`CorrectionResolutionTolerance` within the bin, and
+  per event otherwise. The change is estimated from the transmission at the bounds of
+  the events in the bin, which requires a monotonic transmission, see
+  :py:attr:`TransmissionFunction.is_monotonic`. Other transmissions are evaluated per
+  event.
+
+Per-bin correction factors are applied to the events by broadcasting.
+"""
+
+CorrectionResolutionTolerance = NewType('CorrectionResolutionTolerance', float)
+"""
+Maximum relative change of the transmission within a bin for per-bin evaluation.
+
+Used with :py:class:`CorrectionResolution` ``'auto'``.
+"""
+
+HistogramBins = NewType('HistogramBins', dict[str, sc.Variable])
+"""Bin edges for histogramming corrected event data, by dimension, e.g., Q."""
+
+TotalPolarizationCorrectedHistogram = NewType(
+    'TotalPolarizationCorrectedHistogram', PolarizationCorrectedData
+)
+"""
+Histogram of the polarization corrected data from all flipper state channels.
+
+Equivalent to histogramming :py:class:`TotalPolarizationCorrectedData`, but computed
+without materializing the corrected event lists.
+"""
+
+
 @dataclass
 class HalfPolarizedCorrectedData(Generic[PolarizerSpin]):
     """
@@ -115,6 +223,53 @@ class HalfPolarizedCorrectedData(Generic[PolarizerSpin]):
 
 @dataclass
 class FlipperEfficiency(Generic[PolarizingElement]):
-    """Efficiency of a flipper"""
+    """
+    Efficiency of a flipper
+
+    The value can be a variable with an extra dimension, e.g., 'scan', to evaluate the
+    correction for several efficiencies in a single pass.
+
+    Wavelength-dependent efficiencies, e.g., of RF flippers, can be given as a table
+    with a 'wavelength' coordinate, which is looked up with :py:func:`scipp.lookup`,
+    or as a function. Histogram tables must cover the wavelengths of the data, else
+    :py:meth:`apply` raises a ``ValueError``. The function is called with the
+    'wavelength' and, if present, 'time' coordinates of the data as keyword arguments.
+    Both are evaluated by the correction providers, at the same resolution as the
+    transmission functions.
+    """
 
-    value: float
+    value: float | sc.Variable | sc.DataArray | Callable[..., sc.Variable]
+
+    def _validate_range(self, wavelength: sc.Variable) -> None:
+        # Histogram lookups return NaN outside of the bin edges.
+        edges = self.value.coords['wavelength'].to(unit=wavelength.unit)
+        low = wavelength.min()
+        high = wavelength.max()
+        if low < edges.min() or high >= edges.max():
+            raise ValueError(
+                f'Wavelengths from {low.value} to {high.value} {wavelength.unit} are '
+                f'outside of the flipper efficiency table, which covers '
+                f'[{edges.min().value}, {edges.max().value}) {wavelength.unit}.'
+            )
+
+    @property
+    def is_constant(self) -> bool:
+        """Whether the efficiency is independent of wavelength and time."""
+        return not isinstance(self.value, sc.DataArray) and not callable(self.value)
+
+    def apply(self, data: sc.DataArray) -> float | sc.Variable:
+        """Evaluate the efficiency at the coordinates of the data."""
+        if self.is_constant:
+            return self.value
+        if isinstance(self.value, sc.DataArray):
+            wavelength = data.coords['wavelength']
+            if self.value.coords.is_edges('wavelength'):
+                self._validate_range(wavelength)
+            return sc.lookup(self.value, 'wavelength')[wavelength]
+        return self.value(
+            **{
+                name: data.coords[name]
+                for name in ('wavelength', 'time')
+                if name in data.coords
+            }
+        )
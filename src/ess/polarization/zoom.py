@@ -1,13 +1,25 @@
 # SPDX-License-Identifier: BSD-3-Clause
 # Copyright (c) 2023 Scipp contributors (https://github.com/scipp)
+import hashlib
+import io
+import os
+import tempfile
 from collections.abc import Sequence
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from functools import partial
+from pathlib import Path
+from typing import Any, NewType
 
+import h5py
+import numpy as np
 import sciline as sl
 import scipp as sc
 from scippnexus import NXsource
 
 import ess.isissans as isis
 from ess.isissans.io import LoadedFileContents
+from ess.isissans.mantidio import Period
 from ess.reduce.nexus.types import Position
 from ess.sans.types import (
     Filename,
@@ -84,7 +96,501 @@ def get_monitor_data_from_transmission_run(
     return sc.DataGroup(data=monitor, position=monitor.coords['position'])
 
 
-def ZoomTransmissionFractionWorkflow(runs: Sequence[str]) -> sl.Pipeline:
+TransmissionRunFilenames = NewType('TransmissionRunFilenames', tuple[str, ...])
+"""Filenames of the runs used for the time-dependent transmission fraction."""
+
+
+@dataclass(frozen=True)
+class TransmissionRunLoading:
+    """Options for loading the runs used for the transmission fraction."""
+
+    max_workers: int | None = None
+    """Number of processes used for loading runs. If None, load runs one by one."""
+    cache_dir: str | Path | None = None
+    """If given, cache the monitors extracted from each run in this directory."""
+    calibration: str | Path | None = None
+    """Filename of the calibration applied to each run, loaded by each worker."""
+    lazy: bool = False
+    """
+    If True, read only the monitor spectra and run start and end times directly from
+    all but the first file. The first run is loaded in full and provides the geometry.
+    """
+
+
+@dataclass(frozen=True)
+class TransmissionRunMonitors:
+    """Incident and transmission monitors and source position of each run."""
+
+    incident: list[sc.DataGroup]
+    transmission: list[sc.DataGroup]
+    source_position: list[sc.Variable]
+
+
+def _file_key(filename: str | Path) -> str:
+    # Hashing the contents of every run on each call is as slow as loading it, so the
+    # cache is keyed by the path, size, and modification time of the file instead.
+    path = Path(filename).resolve()
+    stat = path.stat()
+    return f'{path}:{stat.st_size}:{stat.st_mtime_ns}'
+
+
+def _transmission_run_cache_file(
+    cache_dir: str | Path,
+    filename: str,
+    incident_spectrum: int,
+    transmission_spectrum: int,
+    period: int | None,
+    calibration: str | Path | None,
+    template: str | None = None,
+) -> Path:
+    key = [_file_key(filename), str(incident_spectrum), str(transmission_spectrum)]
+    key.append(str(period))
+    key.append('' if calibration is None else _file_key(calibration))
+    if template is not None:
+        # Runs read lazily take the geometry from the template run.
+        key.append(f'lazy:{_file_key(template)}')
+    digest = hashlib.sha256('\n'.join(key).encode()).hexdigest()[:32]
+    return Path(cache_dir) / f'{Path(filename).name}-{digest}.h5'
+
+
+def _write_atomic(dg: sc.DataGroup, filename: Path) -> None:
+    filename.parent.mkdir(parents=True, exist_ok=True)
+    # Write to a temporary file first, such that concurrent readers never see a
+    # partially written cache file.
+    with tempfile.NamedTemporaryFile(
+        dir=filename.parent, prefix=f'.{filename.name}.', suffix='.tmp', delete=False
+    ) as f:
+        tmp = Path(f.name)
+    try:
+        dg.save_hdf5(tmp)
+        os.replace(tmp, filename)
+    finally:
+        tmp.unlink(missing_ok=True)
+
+
+def _load_transmission_run(
+    filename: str,
+    *,
+    incident_spectrum: int,
+    transmission_spectrum: int,
+    period: int | None,
+    cache_dir: str | Path | None,
+    calibration: str | Path | None = None,
+) -> sc.DataGroup:
+    """Load a single run and extract the monitors, runs in worker processes."""
+    if cache_dir is not None:
+        cache_file = _transmission_run_cache_file(
+            cache_dir,
+            filename,
+            incident_spectrum,
+            transmission_spectrum,
+            period,
+            calibration,
+        )
+        if cache_file.exists():
+            return sc.io.load_hdf5(cache_file)
+    workspace = isis.mantidio.load_run(filename, period)
+    # Mantid workspaces cannot be passed between processes, so each worker loads the
+    # calibration itself.
+    dg = isis.mantidio.from_data_workspace(
+        workspace,
+        calibration=None
+        if calibration is None
+        else isis.mantidio.load_calibration(calibration),
+    )
+    run = sc.DataGroup(
+        incident=get_monitor_data_from_transmission_run(
+            dg, isis.MonitorSpectrumNumber[Incident](incident_spectrum)
+        ),
+        transmission=get_monitor_data_from_transmission_run(
+            dg, isis.MonitorSpectrumNumber[Transmission](transmission_spectrum)
+        ),
+        source_position=isis.general.get_source_position(dg),
+    )
+    if cache_dir is not None:
+        _write_atomic(run, cache_file)
+    return run
+
+
+def _load_transmission_run_to_bytes(filename: str, **kwargs: object) -> bytes:
+    # Scipp objects cannot be pickled, so results are returned from worker processes
+    # in Scipp's HDF5 format.
+    buffer = io.BytesIO()
+    _load_transmission_run(filename, **kwargs).save_hdf5(buffer)
+    return buffer.getvalue()
+
+
+def _find_spectrum(entry: h5py.Group, spectrum: int) -> tuple[h5py.Group, int]:
+    # ISIS raw NeXus files store monitors in NXmonitor groups holding a single
+    # spectrum each, and often also as part of the detector_1 group.
+    candidates = [
+        group
+        for group in entry.values()
+        if isinstance(group, h5py.Group)
+        and group.attrs.get('NX_class', b'') in (b'NXmonitor', 'NXmonitor')
+    ]
+    if 'detector_1' in entry:
+        candidates.append(entry['detector_1'])
+    for group in candidates:
+        if 'spectrum_index' not in group:
+            continue
+        spectra = np.atleast_1d(group['spectrum_index'][()])
+        (matches,) = np.nonzero(spectra == spectrum)
+        if len(matches):
+            return group, int(matches[0])
+    raise KeyError(
+        f"Spectrum {spectrum} not found in file '{entry.file.filename}'. Use "
+        'lazy=False to load the run with Mantid instead.'
+    )
+
+
+def _read_string(dataset: h5py.Dataset) -> str:
+    value = np.ravel(dataset[()])[0]
+    return value.decode() if isinstance(value, bytes) else str(value)
+
+
+def _read_monitor_spectra(
+    filename: str, *, spectra: Sequence[int], period: int | None
+) -> dict[str, Any]:
+    """
+    Read selected spectra and run start and end time from an ISIS raw NeXus file.
+
+    Only the requested rows of the counts are read from the file. Returns plain
+    NumPy arrays and strings, which can be passed between processes.
+    """
+    with h5py.File(filename, 'r') as f:
+        entry = f['raw_data_1']
+        result = {
+            'run_start': _read_string(entry['start_time']),
+            'run_end': _read_string(entry['end_time']),
+        }
+        for spectrum in spectra:
+            group, index = _find_spectrum(entry, spectrum)
+            counts = group['data' if 'data' in group else 'counts']
+            # Shape is (period, spectrum, time_of_flight)
+            if counts.shape[0] > 1 and period is None:
+                raise ValueError(
+                    f'Needs {Period} to be set to know what section of the data '
+                    f"to read lazily from '{filename}'"
+                )
+            result[spectrum] = {
+                'counts': counts[period or 0, index, :].astype('float64'),
+                'tof': group['time_of_flight'][()].astype('float64'),
+                'tof_unit': group['time_of_flight'].attrs.get('units', 'microsecond'),
+            }
+    return result
+
+
+def _monitor_from_spectrum(
+    template: sc.DataGroup, spectrum: dict[str, Any], run_start: str, run_end: str
+) -> sc.DataGroup:
+    """Combine the counts read from file with the geometry of a template monitor."""
+    monitor = template['data'].copy(deep=False)
+    counts = spectrum['counts']
+    monitor.data = sc.array(
+        dims=monitor.dims, values=counts, variances=counts, unit='counts'
+    )
+    unit = spectrum['tof_unit']
+    unit = unit.decode() if isinstance(unit, bytes) else unit
+    tof = sc.array(dims=monitor.dims, values=spectrum['tof'], unit=unit)
+    monitor.coords['tof'] = tof.to(unit=monitor.coords['tof'].unit)
+    monitor.coords['datetime'] = _get_time(
+        sc.DataGroup(run_start=sc.scalar(run_start), run_end=sc.scalar(run_end))
+    )
+    return sc.DataGroup(data=monitor, position=template['position'])
+
+
+def _load_transmission_runs_lazily(
+    filenames: Sequence[str],
+    *,
+    incident_spectrum: int,
+    transmission_spectrum: int,
+    period: int | None,
+    cache_dir: str | Path | None,
+    calibration: str | Path | None,
+    max_workers: int | None,
+) -> list[sc.DataGroup]:
+    if not filenames:
+        return []
+    # Geometry is not stored in the raw files in a form that can be used directly, so
+    # we take it from a full load of the first run. All runs are from the same cell
+    # scan and share the instrument geometry.
+    template = _load_transmission_run(
+        filenames[0],
+        incident_spectrum=incident_spectrum,
+        transmission_spectrum=transmission_spectrum,
+        period=period,
+        cache_dir=cache_dir,
+        calibration=calibration,
+    )
+    runs = {filenames[0]: template}
+    cache_files = {}
+    if cache_dir is not None:
+        for filename in filenames[1:]:
+            cache_files[filename] = _transmission_run_cache_file(
+                cache_dir,
+                filename,
+                incident_spectrum,
+                transmission_spectrum,
+                period,
+                calibration,
+                template=filenames[0],
+            )
+            if cache_files[filename].exists():
+                runs[filename] = sc.io.load_hdf5(cache_files[filename])
+    missing = [filename for filename in filenames if filename not in runs]
+    read = partial(
+        _read_monitor_spectra,
+        spectra=(incident_spectrum, transmission_spectrum),
+        period=period,
+    )
+    if max_workers is None or max_workers <= 1:
+        contents = [read(filename) for filename in missing]
+    else:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            contents = list(executor.map(read, missing))
+    for filename, content in zip(missing, contents, strict=True):
+        start, end = content['run_start'], content['run_end']
+        run = sc.DataGroup(
+            incident=_monitor_from_spectrum(
+                template['incident'], content[incident_spectrum], start, end
+            ),
+            transmission=_monitor_from_spectrum(
+                template['transmission'], content[transmission_spectrum], start, end
+            ),
+            source_position=template['source_position'],
+        )
+        if cache_dir is not None:
+            _write_atomic(run, cache_files[filename])
+        runs[filename] = run
+    return [runs[filename] for filename in filenames]
+
+
+def load_transmission_run_monitors(
+    filenames: TransmissionRunFilenames,
+    incident_spectrum: isis.MonitorSpectrumNumber[Incident],
+    transmission_spectrum: isis.MonitorSpectrumNumber[Transmission],
+    period: Period,
+    loading: TransmissionRunLoading,
+) -> TransmissionRunMonitors:
+    """
+    Load monitors from ZOOM direct-beam runs, optionally in parallel and cached.
+
+    Only the small monitor data groups are returned from the worker processes, the
+    full workspaces are discarded after extracting the monitors. With
+    :py:attr:`TransmissionRunLoading.lazy`, only the first run is loaded in full and
+    the other files are read selectively. The calibration is given by
+    :py:attr:`TransmissionRunLoading.calibration`, the
+    :py:class:`ess.isissans.mantidio.CalibrationWorkspace` of the workflow is not
+    used since workspaces cannot be passed to worker processes.
+    """
+    options = {
+        'incident_spectrum': incident_spectrum.value,
+        'transmission_spectrum': transmission_spectrum.value,
+        'period': period,
+        'cache_dir': loading.cache_dir,
+        'calibration': loading.calibration,
+    }
+    if loading.lazy:
+        runs = _load_transmission_runs_lazily(
+            filenames, **options, max_workers=loading.max_workers
+        )
+    elif loading.max_workers is None or loading.max_workers <= 1:
+        runs = [_load_transmission_run(filename, **options) for filename in filenames]
+    else:
+        load = partial(_load_transmission_run_to_bytes, **options)
+        with ProcessPoolExecutor(max_workers=loading.max_workers) as executor:
+            runs = [
+                sc.io.load_hdf5(io.BytesIO(run))
+                for run in executor.map(load, filenames)
+            ]
+    return TransmissionRunMonitors(
+        incident=[run['incident'] for run in runs],
+        transmission=[run['transmission'] for run in runs],
+        source_position=[run['source_position'] for run in runs],
+    )
+
+
+def get_time_dependent_incident_monitor(
+    monitors: TransmissionRunMonitors,
+) -> NeXusComponent[Incident, TransmissionRun[SampleRun]]:
+    """Incident monitor as a function of time, combined from all runs."""
+    return NeXusComponent[Incident, TransmissionRun[SampleRun]](
+        _get_time_dependent_monitor(*monitors.incident)
+    )
+
+
+def get_time_dependent_transmission_monitor(
+    monitors: TransmissionRunMonitors,
+) -> NeXusComponent[Transmission, TransmissionRun[SampleRun]]:
+    """Transmission monitor as a function of time, combined from all runs."""
+    return NeXusComponent[Transmission, TransmissionRun[SampleRun]](
+        _get_time_dependent_monitor(*monitors.transmission)
+    )
+
+
+def get_source_position_of_runs(
+    monitors: TransmissionRunMonitors,
+) -> Position[NXsource, TransmissionRun[SampleRun]]:
+    """Source position, which must be the same for all runs."""
+    return Position[NXsource, TransmissionRun[SampleRun]](
+        _get_unique_position(*monitors.source_position)
+    )
+
+
+class TimeDependentTransmissionStore:
+    """
+    Appendable store of the time-dependent incident and transmission monitors.
+
+    Runs arriving during an experiment are reduced one by one and appended to
+    preallocated buffers, which grow by doubling their capacity. Earlier runs are
+    neither reloaded nor concatenated again. Use :py:meth:`update` to set the
+    current series in a workflow such as :py:func:`ZoomTransmissionFractionWorkflow`,
+    such that the transmission fraction and the He3 fit are recomputed from it.
+
+    .. code-block:: python
+
+        store = TimeDependentTransmissionStore()
+        for filename in new_runs:
+            store.append_run(filename, incident_spectrum=3, transmission_spectrum=4)
+            store.update(workflow)
+            transmission = workflow.compute(TransmissionFraction[SampleRun])
+    """
+
+    def __init__(self, capacity: int = 16) -> None:
+        if capacity < 1:
+            raise ValueError('Capacity must be positive.')
+        self._capacity = capacity
+        self._size = 0
+        self._buffers: dict[type, sc.DataArray] = {}
+        self._positions: dict[type, sc.Variable] = {}
+        self._source_position: sc.Variable | None = None
+
+    def __len__(self) -> int:
+        return self._size
+
+    def append(
+        self,
+        incident: sc.DataGroup,
+        transmission: sc.DataGroup,
+        source_position: sc.Variable,
+    ) -> None:
+        """
+        Append the monitors of a single run.
+
+        Parameters
+        ----------
+        incident:
+            Incident monitor as returned by
+            :py:func:`get_monitor_data_from_transmission_run`.
+        transmission:
+            Transmission monitor as returned by
+            :py:func:`get_monitor_data_from_transmission_run`.
+        source_position:
+            Source position of the run.
+        """
+        if self._source_position is None:
+            self._source_position = source_position
+        else:
+            _get_unique_position(self._source_position, source_position)
+        monitors = {Incident: incident, Transmission: transmission}
+        for mon_type, monitor in monitors.items():
+            self._check_compatible(mon_type, monitor)
+        if self._size == self._capacity:
+            self._grow()
+        for mon_type, monitor in monitors.items():
+            self._write(mon_type, monitor)
+        self._size += 1
+
+    def append_run(
+        self,
+        filename: str,
+        *,
+        incident_spectrum: int,
+        transmission_spectrum: int,
+        period: int | None = None,
+        cache_dir: str | Path | None = None,
+        calibration: str | Path | None = None,
+    ) -> None:
+        """
+        Load a run and append its monitors.
+
+        The run is loaded as by :py:func:`ZoomTransmissionFractionWorkflow` with the
+        same ``cache_dir`` and ``calibration``, such that the monitors are identical.
+        """
+        run = _load_transmission_run(
+            filename,
+            incident_spectrum=incident_spectrum,
+            transmission_spectrum=transmission_spectrum,
+            period=period,
+            cache_dir=cache_dir,
+            calibration=calibration,
+        )
+        self.append(run['incident'], run['transmission'], run['source_position'])
+
+    def monitor(self, mon_type: type[MonitorType]) -> sc.DataGroup:
+        """
+        Time-dependent monitor of all appended runs.
+
+        Equivalent to the monitor combined from all runs by
+        :py:func:`ZoomTransmissionFractionWorkflow`. The data is a view into the
+        store's buffer and must not be modified.
+        """
+        if self._size == 0:
+            raise ValueError('No runs have been appended.')
+        monitor = self._buffers[mon_type]['time', : self._size].copy(deep=False)
+        datetime = monitor.coords['datetime']
+        monitor.coords['time'] = datetime - datetime.min()
+        return sc.DataGroup(data=monitor, position=self._positions[mon_type])
+
+    def update(self, workflow: sl.Pipeline) -> None:
+        """Set the time-dependent monitors and source position in a workflow."""
+        for mon_type in (Incident, Transmission):
+            workflow[NeXusComponent[mon_type, TransmissionRun[SampleRun]]] = (
+                self.monitor(mon_type)
+            )
+        workflow[Position[NXsource, TransmissionRun[SampleRun]]] = self._source_position
+
+    def _check_compatible(self, mon_type: type, monitor: sc.DataGroup) -> None:
+        if mon_type not in self._buffers:
+            return
+        _get_unique_position(self._positions[mon_type], monitor['position'])
+        buffer = self._buffers[mon_type]
+        data = monitor['data']
+        for name, coord in buffer.coords.items():
+            if 'time' not in coord.dims and not sc.identical(coord, data.coords[name]):
+                raise ValueError(f"Coordinate '{name}' differs from previous runs.")
+
+    def _write(self, mon_type: type, monitor: sc.DataGroup) -> None:
+        data = monitor['data']
+        if mon_type not in self._buffers:
+            sizes = {'time': self._capacity, **data.sizes}
+            buffer = data.broadcast(sizes=sizes).copy()
+            buffer.coords['datetime'] = (
+                data.coords['datetime'].broadcast(sizes={'time': self._capacity}).copy()
+            )
+            del buffer.coords['spectrum']
+            del buffer.coords['detector_id']
+            self._buffers[mon_type] = buffer
+            self._positions[mon_type] = monitor['position']
+        buffer = self._buffers[mon_type]
+        buffer.data['time', self._size] = data.data
+        buffer.coords['datetime']['time', self._size] = data.coords['datetime']
+
+    def _grow(self) -> None:
+        for mon_type, buffer in self._buffers.items():
+            self._buffers[mon_type] = sc.concat([buffer, buffer], 'time').copy()
+        self._capacity *= 2
+
+
+def ZoomTransmissionFractionWorkflow(
+    runs: Sequence[str],
+    *,
+    max_workers: int | None = None,
+    cache_dir: str | Path | None = None,
+    lazy: bool = False,
+    calibration: str | Path | None = None,
+) -> sl.Pipeline:
     """
     Workflow computing time-dependent SANS transmission fraction from ZOOM data.
 
@@ -101,11 +607,45 @@ def ZoomTransmissionFractionWorkflow(runs: Sequence[str]) -> sl.Pipeline:
     ----------
     runs:
         List of filenames of the runs to use for the transmission fraction.
+    max_workers:
+        If given, load the runs in parallel using a pool of this many processes.
+    cache_dir:
+        If given, cache the monitors extracted from each run in this directory. The
+        cache is keyed by the path, size, and modification time of each run and of
+        the calibration file, so repeated computations skip loading the files.
+    lazy:
+        If True, read only the incident and transmission monitor spectra and the run
+        start and end times from each file, instead of loading the full workspace.
+        The geometry is taken from the first run, which is loaded in full.
+    calibration:
+        Filename of the calibration applied to the transmission runs. If any of
+        ``max_workers``, ``cache_dir``, or ``lazy`` is given, the runs are not loaded
+        by the workflow and the calibration must be given here instead of setting
+        :py:class:`ess.isissans.mantidio.CalibrationWorkspace`.
     """
     workflow = isis.zoom.ZoomWorkflow()
     workflow.insert(get_monitor_data_no_variances)
     workflow.insert(get_monitor_data_from_transmission_run)
 
+    if (
+        max_workers is not None
+        or cache_dir is not None
+        or lazy
+        or calibration is not None
+    ):
+        workflow.insert(load_transmission_run_monitors)
+        workflow.insert(get_time_dependent_incident_monitor)
+        workflow.insert(get_time_dependent_transmission_monitor)
+        workflow.insert(get_source_position_of_runs)
+        workflow[TransmissionRunFilenames] = TransmissionRunFilenames(tuple(runs))
+        workflow[TransmissionRunLoading] = TransmissionRunLoading(
+            max_workers=max_workers,
+            cache_dir=cache_dir,
+            lazy=lazy,
+            calibration=calibration,
+        )
+        return workflow
+
     mapped = workflow.map({Filename[TransmissionRun[SampleRun]]: runs})
     for mon_type in (Incident, Transmission):
         workflow[NeXusComponent[mon_type, TransmissionRun[SampleRun]]] = mapped[
@@ -0,0 +1,213 @@
+# SPDX-License-Identifier: BSD-3-Clause
+# Copyright (c) 2025 Scipp contributors (https://github.com/scipp)
+import json
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import pytest
+import scipp as sc
+from sciline.scheduler import NaiveScheduler
+from scipp.testing import assert_identical
+
+from ess.polarization import (
+    CorrectionWorkflow,
+    He3OpacityFunction,
+    He3PolarizationFunction,
+    He3TransmissionFunction,
+    batch,
+    synthetic,
+)
+from ess.polarization.batch import main, run_batch
+from ess.polarization.io import load_transmission_function
+from ess.polarization.supermirror import (
+    EfficiencyLookupTable,
+    SupermirrorTransmissionFunction,
+)
+from ess.polarization.types import (
+    Analyzer,
+    Down,
+    Polarizer,
+    ReducedSampleDataBySpinChannel,
+    TotalPolarizationCorrectedData,
+    TransmissionFunction,
+    Up,
+)
+
+CHANNELS = {
+    'up_up': (Up, Up),
+    'up_down': (Up, Down),
+    'down_up': (Down, Up),
+    'down_down': (Down, Down),
+}
+
+
+def make_cells() -> tuple[He3TransmissionFunction, sc.DataArray]:
+    polarizer = He3TransmissionFunction(
+        opacity_function=He3OpacityFunction(sc.scalar(0.88, unit='1/angstrom')),
+        polarization_function=He3PolarizationFunction(
+            C=sc.scalar(0.7), T1=sc.scalar(100000.0, unit='s')
+        ),
+        transmission_empty_glass=sc.scalar(0.9),
+    )
+    table = sc.DataArray(
+        sc.array(dims=['wavelength'], values=[0.9, 0.95, 0.97, 0.98]),
+        coords={
+            'wavelength': sc.array(
+                dims=['wavelength'], values=[0.5, 2.0, 5.0, 9.0], unit='angstrom'
+            )
+        },
+    )
+    return polarizer, table
+
+
+@pytest.fixture
+def manifest(tmp_path: Path) -> Path:
+    polarizer, table = make_cells()
+    no_cell, with_cell = synthetic.make_direct_beam_runs(
+        polarizer,
+        time=sc.linspace('time', 0.0, 200000.0, num=8, unit='s'),
+        wavelength=sc.linspace('wavelength', 1.0, 8.0, num=20, unit='angstrom'),
+    )
+    no_cell.save_hdf5(tmp_path / 'no_cell.h5')
+    with_cell.save_hdf5(tmp_path / 'polarized.h5')
+    table.save_hdf5(tmp_path / 'table.h5')
+    analyzer = SupermirrorTransmissionFunction(EfficiencyLookupTable(table=table))
+    runs = {}
+    for i in range(3):
+        runs[f'run{i}'] = {}
+        for channel, spins in CHANNELS.items():
+            data = synthetic.make_spin_channel_data(
+                *spins,
+                time_bins=sc.linspace('time', 0.0, 100000.0, num=3, unit='s'),
+                wavelength_bins=sc.linspace('wavelength', 1.0, 8.0, num=4, unit='Å'),
+                polarizer=polarizer,
+                analyzer=analyzer,
+                events=200,
+                seed=i,
+            )
+            data.save_hdf5(tmp_path / f'run{i}-{channel}.h5')
+            runs[f'run{i}'][channel] = f'run{i}-{channel}.h5'
+    content = {
+        'output_dir': 'out',
+        'cells': {
+            'polarizer': {
+                'kind': 'he3',
+                'direct_beam_no_cell': 'no_cell.h5',
+                'polarized': 'polarized.h5',
+                'transmission_empty_glass': 0.9,
+                'opacity0': {'value': 0.88, 'unit': '1/angstrom'},
+            },
+            'analyzer': {'kind': 'supermirror', 'table': 'table.h5'},
+        },
+        'runs': runs,
+    }
+    path = tmp_path / 'manifest.json'
+    path.write_text(json.dumps(content))
+    return path
+
+
+def expected_result(manifest: Path, run: str) -> TotalPolarizationCorrectedData:
+    out = manifest.parent / 'out'
+    workflow = CorrectionWorkflow()
+    workflow[TransmissionFunction[Polarizer]] = load_transmission_function(
+        out / 'cells' / 'polarizer.h5'
+    )
+    workflow[TransmissionFunction[Analyzer]] = load_transmission_function(
+        out / 'cells' / 'analyzer.h5'
+    )
+    for channel, spins in CHANNELS.items():
+        workflow[ReducedSampleDataBySpinChannel[spins]] = sc.io.load_hdf5(
+            manifest.parent / f'{run}-{channel}.h5'
+        )
+    return workflow.compute(TotalPolarizationCorrectedData)
+
+
+def assert_output_matches_workflow(manifest: Path, run: str) -> None:
+    output = sc.io.load_hdf5(manifest.parent / 'out' / f'{run}.h5')
+    expected = expected_result(manifest, run)
+    for field in ('upup', 'updown', 'downup', 'downdown'):
+        assert_identical(output[field], getattr(expected, field))
+
+
+def test_run_batch_fits_cells_and_corrects_all_runs(manifest: Path) -> None:
+    messages = []
+    result = run_batch(manifest, report=messages.append)
+
+    assert result.fit.items == 2
+    assert sorted(result.completed) == ['run0', 'run1', 'run2']
+    assert result.skipped == []
+    assert result.failed == {}
+    assert result.correct.items == 3
+    assert result.correct.events == 3 * 4 * 200
+    assert result.correct.events_per_second > 0
+    assert messages[-1] == result.summary()
+    polarizer = load_transmission_function(
+        manifest.parent / 'out' / 'cells' / 'polarizer.h5'
+    )
+    assert sc.allclose(
+        polarizer.polarization_function.C, sc.scalar(0.7), rtol=sc.scalar(1e-3)
+    )
+    for run in ('run0', 'run1', 'run2'):
+        assert_output_matches_workflow(manifest, run)
+
+
+def test_run_batch_resumes_with_saved_cells_and_missing_outputs(
+    manifest: Path,
+) -> None:
+    run_batch(manifest)
+    (manifest.parent / 'out' / 'run1.h5').unlink()
+
+    result = run_batch(manifest)
+
+    assert result.fit.items == 0
+    assert result.completed == ['run1']
+    assert sorted(result.skipped) == ['run0', 'run2']
+    assert_output_matches_workflow(manifest, 'run1')
+
+
+def test_run_batch_overwrite_corrects_all_runs(manifest: Path) -> None:
+    run_batch(manifest)
+    result = run_batch(manifest, overwrite=True)
+    assert result.fit.items == 2
+    assert sorted(result.completed) == ['run0', 'run1', 'run2']
+    assert result.skipped == []
+
+
+def test_run_batch_records_failed_runs_and_continues(manifest: Path) -> None:
+    (manifest.parent / 'run1-up_down.h5').unlink()
+    result = run_batch(manifest)
+    assert sorted(result.completed) == ['run0', 'run2']
+    assert list(result.failed) == ['run1']
+    assert not (manifest.parent / 'out' / 'run1.h5').exists()
+    assert main([str(manifest), '--max-workers', '1']) == 1
+
+
+def test_main_with_process_pool(manifest: Path) -> None:
+    assert main([str(manifest), '--max-workers', '2']) == 0
+    for run in ('run0', 'run1', 'run2'):
+        assert_output_matches_workflow(manifest, run)
+
+
+class InlineExecutor(ThreadPoolExecutor):
+    # Runs the workers in this process, such that their state can be inspected.
+    def __init__(self, *, max_workers, mp_context, initializer, initargs) -> None:
+        super().__init__(max_workers=1, initializer=initializer, initargs=initargs)
+
+
+def test_process_pool_workers_use_naive_scheduler(
+    manifest: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(batch, 'ProcessPoolExecutor', InlineExecutor)
+    monkeypatch.setattr(batch, '_worker_workflow', None)
+    monkeypatch.setattr(batch, '_worker_scheduler', None)
+    result = run_batch(manifest, max_workers=2)
+    assert sorted(result.completed) == ['run0', 'run1', 'run2']
+    assert isinstance(batch._worker_scheduler, NaiveScheduler)
+
+
+def test_run_batch_rejects_unknown_cell_kind(manifest: Path) -> None:
+    content = json.loads(manifest.read_text())
+    content['cells']['analyzer'] = {'kind': 'magic'}
+    manifest.write_text(json.dumps(content))
+    with pytest.raises(ValueError, match='Unknown cell kind'):
+        run_batch(manifest)
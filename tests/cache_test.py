@@ -0,0 +1,129 @@
+# SPDX-License-Identifier: BSD-3-Clause
+# Copyright (c) 2025 Scipp contributors (https://github.com/scipp)
+import os
+from pathlib import Path
+from typing import NewType
+
+import pytest
+import sciline
+import scipp as sc
+from scipp.testing import assert_identical
+
+from ess.polarization import (
+    He3OpacityFunction,
+    He3PolarizationFunction,
+    He3TransmissionFunction,
+)
+from ess.polarization.cache import ResultCache, apply_result_cache, content_hash
+
+Raw = NewType('Raw', sc.DataArray)
+Scale = NewType('Scale', float)
+Offset = NewType('Offset', float)
+Fitted = NewType('Fitted', sc.DataArray)
+Result = NewType('Result', sc.DataArray)
+
+calls = []
+
+
+def fit(raw: Raw, scale: Scale) -> Fitted:
+    calls.append('fit')
+    return Fitted(raw * scale)
+
+
+def apply(fitted: Fitted, offset: Offset) -> Result:
+    return Result(fitted + offset)
+
+
+def _make_workflow(scale: float = 2.0, offset: float = 1.0) -> sciline.Pipeline:
+    workflow = sciline.Pipeline((fit, apply))
+    workflow[Raw] = sc.DataArray(
+        sc.arange('x', 4.0), coords={'x': sc.arange('x', 5.0, unit='m')}
+    )
+    workflow[Scale] = scale
+    workflow[Offset] = offset
+    return workflow
+
+
+def test_content_hash_depends_on_values_units_and_coords() -> None:
+    da = sc.DataArray(sc.arange('x', 4.0), coords={'x': sc.arange('x', 4.0)})
+    assert content_hash(da) == content_hash(da.copy())
+    assert content_hash(da) != content_hash(da * 2.0)
+    assert content_hash(da) != content_hash(da.assign_coords(x=da.coords['x'] * 2))
+    other_unit = da.copy()
+    other_unit.unit = 'm'
+    assert content_hash(da) != content_hash(other_unit)
+    assert content_hash(da) != content_hash(da.bin(x=2))
+
+
+def test_apply_result_cache_reuses_results_if_only_downstream_changes(
+    tmp_path: Path,
+) -> None:
+    calls.clear()
+    cache = ResultCache(tmp_path, max_bytes=2**20)
+    first = apply_result_cache(_make_workflow(), [Fitted], cache)
+    assert calls == ['fit']
+    second = apply_result_cache(
+        _make_workflow(offset=3.0), [Fitted], ResultCache(tmp_path, max_bytes=2**20)
+    )
+    assert calls == ['fit']
+    assert_identical(first.compute(Result) + 2.0, second.compute(Result))
+    assert calls == ['fit']
+
+    apply_result_cache(_make_workflow(scale=3.0), [Fitted], cache)
+    assert calls == ['fit', 'fit']
+
+
+def test_result_cache_round_trips_transmission_function(tmp_path: Path) -> None:
+    transmission = He3TransmissionFunction(
+        opacity_function=He3OpacityFunction(sc.scalar(0.88, unit='1/angstrom')),
+        polarization_function=He3PolarizationFunction(
+            C=sc.scalar(0.7), T1=sc.scalar(100000.0, unit='s')
+        ),
+        transmission_empty_glass=sc.scalar(0.9),
+    )
+    cache = ResultCache(tmp_path, max_bytes=2**20)
+    digest = content_hash(transmission)
+    cache.store(digest, transmission)
+    loaded = cache.load(digest)
+    assert isinstance(loaded, He3TransmissionFunction)
+    assert content_hash(loaded) == digest
+    wavelength = sc.linspace('wavelength', 1.0, 5.0, 5, unit='angstrom')
+    time = sc.linspace('time', 0.0, 1000.0, 3, unit='s')
+    assert_identical(
+        loaded(time=time, wavelength=wavelength, plus_minus='plus'),
+        transmission(time=time, wavelength=wavelength, plus_minus='plus'),
+    )
+
+
+def test_result_cache_evicts_least_recently_used(tmp_path: Path) -> None:
+    value = sc.DataArray(sc.arange('x', 1000.0))
+    cache = ResultCache(tmp_path, max_bytes=2**40)
+    cache.store('a', value)
+    size = (tmp_path / 'a.h5').stat().st_size
+    cache = ResultCache(tmp_path, max_bytes=int(2.5 * size))
+    cache.store('b', value)
+    cache.load('a')
+    # Make sure modification times differ on file systems with coarse resolution.
+    os.utime(tmp_path / 'b.h5', ns=(0, 0))
+    cache.store('c', value)
+    assert 'a' in cache
+    assert 'b' not in cache
+    assert 'c' in cache
+    with pytest.raises(KeyError):
+        cache.load('b')
+
+
+def test_content_hash_of_filename_depends_on_file(tmp_path: Path) -> None:
+    filename = tmp_path / 'run.csv'
+    filename.write_text('1,2')
+    before = content_hash(filename)
+    assert content_hash(filename) == before
+    assert content_hash(str(filename)) != content_hash(str(tmp_path / 'other.csv'))
+    filename.write_text('1,2,3')
+    assert content_hash(filename) != before
+
+
+def test_result_cache_store_leaves_no_temporary_files(tmp_path: Path) -> None:
+    cache = ResultCache(tmp_path, max_bytes=2**40)
+    cache.store('a', sc.DataArray(sc.arange('x', 10.0)))
+    assert list(tmp_path.iterdir()) == [tmp_path / 'a.h5']
@@ -0,0 +1,226 @@
+# SPDX-License-Identifier: BSD-3-Clause
+# Copyright (c) 2025 Scipp contributors (https://github.com/scipp)
+import copy
+import functools
+import pickle
+
+import dask.multiprocessing
+import numpy as np
+import pytest
+import sciline
+import scipp as sc
+from sciline.scheduler import DaskScheduler
+from scipp.testing import assert_identical
+
+from ess.polarization import (
+    CorrectionWorkflow,
+    EfficiencyLookupTable,
+    He3OpacityFunction,
+    He3PolarizationFunction,
+    He3TransmissionFunction,
+    PiecewiseTransmissionFunction,
+)
+from ess.polarization.cluster import register_scipp_pickling
+from ess.polarization.supermirror import SupermirrorTransmissionFunction
+from ess.polarization.types import (
+    Analyzer,
+    Down,
+    Polarizer,
+    ReducedSampleDataBySpinChannel,
+    TotalPolarizationCorrectedData,
+    TransmissionFunction,
+    Up,
+)
+
+
+def make_he3(C: float = 0.7) -> He3TransmissionFunction:
+    return He3TransmissionFunction(
+        opacity_function=He3OpacityFunction(sc.scalar(0.88, unit='1/angstrom')),
+        polarization_function=He3PolarizationFunction(
+            C=sc.scalar(C), T1=sc.scalar(123456.0, unit='s')
+        ),
+        transmission_empty_glass=sc.scalar(0.9),
+    )
+
+
+def make_supermirror() -> SupermirrorTransmissionFunction:
+    table = sc.DataArray(
+        sc.array(dims=['wavelength'], values=[0.9, 0.95, 0.97]),
+        coords={
+            'wavelength': sc.array(
+                dims=['wavelength'], values=[1.0, 2.0, 4.0], unit='angstrom'
+            )
+        },
+    )
+    return SupermirrorTransmissionFunction(
+        EfficiencyLookupTable(table=table), memo_size=3
+    )
+
+
+def make_events(seed: int) -> sc.DataArray:
+    rng = np.random.default_rng(seed)
+    n = 100
+    events = sc.DataArray(
+        sc.ones(dims=['event'], shape=[n], with_variances=True),
+        coords={
+            'time': sc.array(dims=['event'], values=rng.uniform(0, 1e5, n), unit='s'),
+            'wavelength': sc.array(
+                dims=['event'], values=rng.uniform(1.0, 4.0, n), unit='angstrom'
+            ),
+        },
+    )
+    return events.bin(wavelength=sc.linspace('wavelength', 1.0, 4.0, 4, unit='Å'))
+
+
+def make_workflow() -> sciline.Pipeline:
+    workflow = CorrectionWorkflow()
+    workflow[TransmissionFunction[Polarizer]] = make_he3()
+    workflow[TransmissionFunction[Analyzer]] = make_supermirror()
+    return workflow
+
+
+def make_run(seed: int) -> dict:
+    return {
+        ReducedSampleDataBySpinChannel[Up, Up]: make_events(seed),
+        ReducedSampleDataBySpinChannel[Up, Down]: make_events(seed + 1),
+        ReducedSampleDataBySpinChannel[Down, Up]: make_events(seed + 2),
+        ReducedSampleDataBySpinChannel[Down, Down]: make_events(seed + 3),
+    }
+
+
+def with_run(workflow: sciline.Pipeline, run: dict) -> sciline.Pipeline:
+    workflow = workflow.copy()
+    for key, value in run.items():
+        workflow[key] = value
+    return workflow
+
+
+def roundtrip(obj):
+    return pickle.loads(pickle.dumps(obj))  # noqa: S301
+
+
+def assert_results_identical(a, b) -> None:
+    for field in ('upup', 'updown', 'downup', 'downdown'):
+        assert_identical(getattr(a, field), getattr(b, field))
+
+
+@pytest.mark.parametrize(
+    'transmission',
+    [
+        make_he3(),
+        make_supermirror(),
+        PiecewiseTransmissionFunction.from_intervals(
+            [(sc.scalar(0.0, unit='s'), sc.scalar(10.0, unit='s'), make_he3())]
+        ),
+    ],
+)
+def test_transmission_functions_can_be_pickled(transmission) -> None:
+    restored = roundtrip(transmission)
+    assert type(restored) is type(transmission)
+    data = make_events(0).bins.constituents['data']
+    assert_identical(restored.apply(data, 'plus'), transmission.apply(data, 'plus'))
+
+
+def test_pickled_supermirror_keeps_memo_size_but_not_memo() -> None:
+    transmission = make_supermirror()
+    transmission(wavelength=sc.linspace('x', 1, 2, 3, unit='Å'), plus_minus='plus')
+    restored = roundtrip(transmission)
+    assert restored.memo_size == 3
+    assert len(restored._memo._entries) == 0
+
+
+class ScaledHe3TransmissionFunction(He3TransmissionFunction):
+    def apply(self, data, plus_minus, out=None):
+        return 0.5 * super().apply(data, plus_minus, out)
+
+
+def test_subclass_of_transmission_function_is_pickled_as_subclass() -> None:
+    register_scipp_pickling()
+    base = make_he3()
+    transmission = ScaledHe3TransmissionFunction(
+        opacity_function=base.opacity_function,
+        polarization_function=base.polarization_function,
+        transmission_empty_glass=base.transmission_empty_glass,
+    )
+    restored = roundtrip(transmission)
+    assert type(restored) is ScaledHe3TransmissionFunction
+    data = make_events(0).bins.constituents['data']
+    assert_identical(restored.apply(data, 'plus'), transmission.apply(data, 'plus'))
+
+
+@pytest.mark.parametrize('copy_func', [copy.copy, copy.deepcopy])
+def test_transmission_functions_are_copied_without_hdf5(copy_func, monkeypatch):
+    from ess.polarization import io
+
+    def to_bytes(obj):
+        raise AssertionError('Copies must not go through HDF5')
+
+    monkeypatch.setattr(io, 'to_bytes', to_bytes)
+    transmission = make_supermirror()
+    wavelength = sc.linspace('x', 1, 2, 3, unit='Å')
+    transmission(wavelength=wavelength, plus_minus='plus')
+    copied = copy_func(transmission)
+    assert type(copied) is SupermirrorTransmissionFunction
+    if copy_func is copy.deepcopy:
+        assert copied.efficiency_function is not transmission.efficiency_function
+        assert len(copied._memo._entries) == 0
+    assert_identical(
+        copied(wavelength=wavelength, plus_minus='plus'),
+        transmission(wavelength=wavelength, plus_minus='plus'),
+    )
+
+
+def test_register_scipp_pickling_supports_binned_data() -> None:
+    register_scipp_pickling()
+    data = make_events(0)
+    assert_identical(roundtrip(data), data)
+
+
+def test_workflow_computed_in_worker_processes_matches_threaded() -> None:
+    # dask.multiprocessing pickles all tasks and results, like a distributed cluster.
+    register_scipp_pickling()
+    workflow = with_run(make_workflow(), make_run(0))
+    expected = workflow.compute(TotalPolarizationCorrectedData)
+    get = functools.partial(
+        dask.multiprocessing.get, initializer=register_scipp_pickling
+    )
+    result = workflow.compute(
+        TotalPolarizationCorrectedData, scheduler=DaskScheduler(get)
+    )
+    assert_results_identical(result, expected)
+
+
+@pytest.fixture(scope='module')
+def client():
+    distributed = pytest.importorskip('distributed')
+    with distributed.LocalCluster(
+        n_workers=2, threads_per_worker=1, processes=True, dashboard_address=None
+    ) as cluster:
+        with distributed.Client(cluster) as client:
+            yield client
+
+
+def test_cluster_scheduler_matches_local_computation(client) -> None:
+    from ess.polarization.cluster import cluster_scheduler
+
+    workflow = with_run(make_workflow(), make_run(0))
+    expected = workflow.compute(TotalPolarizationCorrectedData)
+    result = workflow.compute(
+        TotalPolarizationCorrectedData, scheduler=cluster_scheduler(client)
+    )
+    assert_results_identical(result, expected)
+
+
+def test_compute_runs_matches_local_computation(client) -> None:
+    from ess.polarization.cluster import compute_runs
+
+    workflow = make_workflow()
+    runs = {f'run{i}': make_run(10 * i) for i in range(3)}
+    results = compute_runs(client, workflow, TotalPolarizationCorrectedData, runs)
+
+    assert results.keys() == runs.keys()
+    for name, run in runs.items():
+        expected = with_run(workflow, run).compute(TotalPolarizationCorrectedData)
+        assert_results_identical(
+            results[name][TotalPolarizationCorrectedData], expected
+        )
@@ -12,6 +12,7 @@ from ess.polarization import (
     He3CellWorkflow,
     PolarizationAnalysisWorkflow,
     SupermirrorWorkflow,
+    correction,
 )
 from ess.polarization.correction import (
     FlipperEfficiency,
@@ -19,12 +20,16 @@ from ess.polarization.correction import (
 )
 from ess.polarization.types import (
     Analyzer,
+    CorrectionResolution,
+    CorrectionResolutionTolerance,
     Down,
     HalfPolarizedCorrectedData,
+    HistogramBins,
     PolarizationCorrectedData,
     Polarizer,
     ReducedSampleDataBySpinChannel,
     TotalPolarizationCorrectedData,
+    TotalPolarizationCorrectedHistogram,
     TransmissionFunction,
     Up,
 )
@@ -39,11 +44,16 @@ class SimpleTransmissionFunction:
         else:
             return 10 * time * (2 - wavelength)
 
-    def apply(self, da: sc.DataArray, plus_minus: str) -> float:
+    def apply(
+        self, da: sc.DataArray, plus_minus: str, out: sc.Variable | None = None
+    ) -> float:
         time = da.coords['time']
         wavelength = da.coords['wavelength']
         return self(time, wavelength, plus_minus)
 
+    def supports_out(self, da: sc.DataArray) -> bool:
+        return False
+
 
 def test_compute_polarizing_element_correction() -> None:
     time = sc.linspace('event', 1, 10, 10, unit='')
@@ -96,12 +106,17 @@ class FakeTransmissionFunction:
     def __init__(self, coeffs: np.ndarray) -> None:
         self.coeffs = coeffs
 
-    def apply(self, _: sc.DataArray, plus_minus: str) -> float:
+    def apply(
+        self, _: sc.DataArray, plus_minus: str, out: sc.Variable | None = None
+    ) -> float:
         if plus_minus == 'plus':
             return sc.scalar(self.coeffs[0][0])
         else:
             return sc.scalar(self.coeffs[0][1])
 
+    def supports_out(self, _: sc.DataArray) -> bool:
+        return False
+
 
 def test_correction_workflow_computes_and_applies_matrix_inverse() -> None:
     ground_truth = np.array([7.0, 11.0, 13.0, 17.0])
@@ -323,3 +338,419 @@ def test_half_polarized_with_flipper_computes_and_applies_matrix_inverse(
         contrib = sc.concat([contrib.up, contrib.down], 'dummy')
         result += contrib.values
     np.testing.assert_allclose(result, ground_truth)
+
+
+def _make_he3_transmission(C: float) -> pol.He3TransmissionFunction:
+    return pol.He3TransmissionFunction(
+        opacity_function=pol.He3OpacityFunction(sc.scalar(0.88, unit='1/angstrom')),
+        polarization_function=pol.He3PolarizationFunction(
+            C=sc.scalar(C), T1=sc.scalar(123456.0, unit='s')
+        ),
+        transmission_empty_glass=sc.scalar(0.9),
+    )
+
+
+def _make_channel_events(seed: int) -> sc.DataArray:
+    rng = np.random.default_rng(seed)
+    n = 1000
+    events = sc.DataArray(
+        sc.array(dims=['event'], values=rng.uniform(0.5, 1.5, n), variances=np.ones(n)),
+        coords={
+            'time': sc.array(dims=['event'], values=rng.uniform(0, 1e5, n), unit='s'),
+            'wavelength': sc.array(
+                dims=['event'], values=rng.uniform(1.0, 5.0, n), unit='angstrom'
+            ),
+            'Q': sc.array(
+                dims=['event'], values=rng.uniform(0.0, 0.3, n), unit='1/angstrom'
+            ),
+        },
+    )
+    return events.bin(wavelength=8)
+
+
+@pytest.mark.parametrize('f1', [0.9, 1.0])
+@pytest.mark.parametrize('f2', [0.95, 1.0])
+def test_fused_histogram_matches_histogram_of_corrected_events(
+    f1: float, f2: float
+) -> None:
+    workflow = CorrectionWorkflow()
+    workflow[TransmissionFunction[Polarizer]] = _make_he3_transmission(0.7)
+    workflow[TransmissionFunction[Analyzer]] = _make_he3_transmission(0.6)
+    workflow[ReducedSampleDataBySpinChannel[Up, Up]] = _make_channel_events(0)
+    workflow[ReducedSampleDataBySpinChannel[Up, Down]] = _make_channel_events(1)
+    workflow[ReducedSampleDataBySpinChannel[Down, Up]] = _make_channel_events(2)
+    workflow[ReducedSampleDataBySpinChannel[Down, Down]] = _make_channel_events(3)
+    workflow[FlipperEfficiency[Polarizer]] = FlipperEfficiency(f1)
+    workflow[FlipperEfficiency[Analyzer]] = FlipperEfficiency(f2)
+    bins = {
+        'Q': sc.linspace('Q', 0.0, 0.3, 11, unit='1/angstrom'),
+        'wavelength': sc.linspace('wavelength', 1.0, 5.0, 5, unit='angstrom'),
+    }
+    workflow[HistogramBins] = bins
+
+    results = workflow.compute(
+        (TotalPolarizationCorrectedData, TotalPolarizationCorrectedHistogram)
+    )
+    events = results[TotalPolarizationCorrectedData]
+    histogram = results[TotalPolarizationCorrectedHistogram]
+    for field in ('upup', 'updown', 'downup', 'downdown'):
+        expected = getattr(events, field).hist(bins)
+        actual = getattr(histogram, field)
+        expected.name = actual.name
+        assert_allclose(actual, expected)
+
+
+def test_fused_histogram_raises_for_dense_data() -> None:
+    workflow = CorrectionWorkflow()
+    workflow[TransmissionFunction[Polarizer]] = _make_he3_transmission(0.7)
+    workflow[TransmissionFunction[Analyzer]] = _make_he3_transmission(0.6)
+    for key in (
+        ReducedSampleDataBySpinChannel[Up, Up],
+        ReducedSampleDataBySpinChannel[Up, Down],
+        ReducedSampleDataBySpinChannel[Down, Up],
+        ReducedSampleDataBySpinChannel[Down, Down],
+    ):
+        workflow[key] = _make_channel_events(0).hist()
+    workflow[HistogramBins] = {'Q': sc.linspace('Q', 0.0, 0.3, 11, unit='1/angstrom')}
+    with pytest.raises(ValueError, match='binned event data'):
+        workflow.compute(TotalPolarizationCorrectedHistogram)
+
+
+def _make_scan_workflow(
+    *, opacity0: sc.Variable, T1: sc.Variable, efficiency: sc.Variable, C: sc.Variable
+) -> sciline.Pipeline:
+    workflow = CorrectionWorkflow()
+    for element, polarization in ((Polarizer, C), (Analyzer, sc.scalar(0.6))):
+        workflow[TransmissionFunction[element]] = pol.He3TransmissionFunction(
+            opacity_function=pol.He3OpacityFunction(opacity0),
+            polarization_function=pol.He3PolarizationFunction(C=polarization, T1=T1),
+            transmission_empty_glass=sc.scalar(0.9),
+        )
+    workflow[ReducedSampleDataBySpinChannel[Up, Up]] = _make_channel_events(0)
+    workflow[ReducedSampleDataBySpinChannel[Up, Down]] = _make_channel_events(1)
+    workflow[ReducedSampleDataBySpinChannel[Down, Up]] = _make_channel_events(2)
+    workflow[ReducedSampleDataBySpinChannel[Down, Down]] = _make_channel_events(3)
+    workflow[FlipperEfficiency[Polarizer]] = FlipperEfficiency(efficiency)
+    workflow[FlipperEfficiency[Analyzer]] = FlipperEfficiency(efficiency)
+    workflow[HistogramBins] = {
+        'Q': sc.linspace('Q', 0.0, 0.3, 4, unit='1/angstrom'),
+        'wavelength': sc.linspace('wavelength', 1.0, 5.0, 3, unit='angstrom'),
+    }
+    return workflow
+
+
+@pytest.mark.parametrize('scanned', ['opacity0', 'T1', 'efficiency', 'C'])
+def test_parameter_scan_matches_individual_workflows(scanned: str) -> None:
+    params = {
+        'opacity0': sc.scalar(0.88, unit='1/angstrom'),
+        'T1': sc.scalar(123456.0, unit='s'),
+        'efficiency': sc.scalar(0.95),
+        'C': sc.scalar(0.7),
+    }
+    scan = {
+        'opacity0': sc.array(dims=['scan'], values=[0.8, 0.9, 1.0], unit='1/angstrom'),
+        'T1': sc.array(dims=['scan'], values=[1e5, 2e5, 3e5], unit='s'),
+        'efficiency': sc.array(dims=['scan'], values=[0.9, 0.95, 1.0]),
+        'C': sc.array(dims=['scan'], values=[0.6, 0.7, 0.8]),
+    }[scanned]
+    workflow = _make_scan_workflow(**{**params, scanned: scan})
+    keys = (TotalPolarizationCorrectedData, TotalPolarizationCorrectedHistogram)
+    results = workflow.compute(keys)
+
+    for i in range(3):
+        single = _make_scan_workflow(**{**params, scanned: scan['scan', i]})
+        expected = single.compute(keys)
+        for field in ('upup', 'updown', 'downup', 'downdown'):
+            events = getattr(results[TotalPolarizationCorrectedData], field)
+            assert_allclose(
+                events['scan', i].bins.sum(),
+                getattr(expected[TotalPolarizationCorrectedData], field).bins.sum(),
+            )
+            histogram = getattr(results[TotalPolarizationCorrectedHistogram], field)
+            assert_allclose(
+                histogram['scan', i],
+                getattr(expected[TotalPolarizationCorrectedHistogram], field),
+            )
+
+
+def _make_resolution_events() -> sc.DataArray:
+    # A narrow and a wide wavelength bin.
+    rng = np.random.default_rng(1)
+    n = 100
+    wavelength = np.concatenate([rng.uniform(2.0, 2.001, n), rng.uniform(3.0, 5.0, n)])
+    events = sc.DataArray(
+        sc.ones(dims=['event'], shape=[2 * n]),
+        coords={
+            'time': sc.array(
+                dims=['event'], values=rng.uniform(0.0, 10.0, 2 * n), unit='s'
+            ),
+            'wavelength': sc.array(dims=['event'], values=wavelength, unit='angstrom'),
+        },
+    )
+    edges = sc.array(dims=['wavelength'], values=[2.0, 2.001, 5.0], unit='angstrom')
+    return events.bin(wavelength=edges)
+
+
+@pytest.mark.parametrize('resolution', ['bin-center', 'bin-mean'])
+def test_compute_polarizing_element_correction_per_bin(resolution: str) -> None:
+    channel = _make_resolution_events()
+    transmission = _make_he3_transmission(0.7)
+    result = compute_polarizing_element_correction(
+        channel, transmission, resolution=resolution
+    )
+    assert result.diag.bins is None
+    assert result.diag.sizes == {'wavelength': 2}
+    if resolution == 'bin-center':
+        wavelength = sc.midpoints(channel.coords['wavelength'])
+    else:
+        wavelength = channel.bins.coords['wavelength'].bins.mean()
+    points = sc.DataArray(
+        sc.ones(sizes=channel.sizes),
+        coords={
+            'wavelength': wavelength,
+            'time': channel.bins.coords['time'].bins.mean(),
+        },
+    )
+    assert_allclose(
+        result.diag, compute_polarizing_element_correction(points, transmission).diag
+    )
+
+
+def test_compute_polarizing_element_correction_auto_uses_events_in_wide_bins() -> None:
+    channel = _make_resolution_events()
+    transmission = _make_he3_transmission(0.7)
+    event = compute_polarizing_element_correction(channel, transmission)
+    per_bin = compute_polarizing_element_correction(
+        channel, transmission, resolution='bin-mean'
+    )
+    auto = compute_polarizing_element_correction(
+        channel, transmission, resolution='auto', tolerance=1e-2
+    )
+    for field in ('diag', 'off_diag'):
+        actual = getattr(auto, field)
+        assert actual.bins is not None
+        assert_allclose(
+            actual[0].values,
+            getattr(per_bin, field)[0].broadcast(sizes={'event': 100}),
+        )
+        assert_allclose(actual[1].values, getattr(event, field)[1].values)
+
+
+@pytest.mark.parametrize(('tolerance', 'binned'), [(0.0, True), (1.0, False)])
+def test_compute_polarizing_element_correction_auto_limits(
+    tolerance: float, binned: bool
+) -> None:
+    channel = _make_resolution_events()
+    transmission = _make_he3_transmission(0.7)
+    auto = compute_polarizing_element_correction(
+        channel, transmission, resolution='auto', tolerance=tolerance
+    )
+    assert (auto.diag.bins is not None) == binned
+
+
+def test_compute_polarizing_element_correction_auto_uses_events_if_not_monotonic() -> (
+    None
+):
+    channel = _make_resolution_events()
+    # Equal at the bounds of the wide bin, but not in between.
+    table = sc.DataArray(
+        sc.array(dims=['wavelength'], values=[0.5, 0.99, 0.5]),
+        coords={
+            'wavelength': sc.array(
+                dims=['wavelength'], values=[3.0, 4.0, 5.0], unit='angstrom'
+            )
+        },
+    )
+    transmission = pol.supermirror.SupermirrorTransmissionFunction(
+        pol.EfficiencyLookupTable(table=table)
+    )
+    assert not transmission.is_monotonic
+    event = compute_polarizing_element_correction(
+        channel['wavelength', 1:], transmission
+    )
+    auto = compute_polarizing_element_correction(
+        channel['wavelength', 1:], transmission, resolution='auto', tolerance=1.0
+    )
+    for field in ('diag', 'off_diag'):
+        assert_allclose(getattr(auto, field), getattr(event, field))
+
+
+@pytest.mark.parametrize(
+    ('a', 'b', 'monotonic'),
+    [(-0.01, -0.1, True), (0.0, 0.1, True), (-0.01, 0.1, False)],
+)
+def test_second_degree_polynomial_efficiency_is_monotonic_for_positive_wavelengths(
+    a: float, b: float, monotonic: bool
+) -> None:
+    efficiency = pol.SecondDegreePolynomialEfficiency(
+        a=sc.scalar(a, unit='1/angstrom**2'),
+        b=sc.scalar(b * 10, unit='1/nm'),
+        c=sc.scalar(1.0),
+    )
+    assert efficiency.is_monotonic == monotonic
+    assert (
+        pol.supermirror.SupermirrorTransmissionFunction(efficiency).is_monotonic
+        == monotonic
+    )
+
+
+def _flipper_efficiency(*, wavelength: sc.Variable, time: sc.Variable) -> sc.Variable:
+    return 0.99 - sc.scalar(0.02, unit='1/angstrom') * wavelength
+
+
+def _correct_with_flipper_efficiency(
+    channel: sc.DataArray, efficiency: FlipperEfficiency, resolution: str
+) -> PolarizationCorrectedData:
+    workflow = CorrectionWorkflow()
+    workflow[TransmissionFunction[Polarizer]] = _make_he3_transmission(0.7)
+    workflow[TransmissionFunction[Analyzer]] = _make_he3_transmission(0.6)
+    workflow[ReducedSampleDataBySpinChannel[Down, Down]] = channel
+    workflow[FlipperEfficiency[Polarizer]] = efficiency
+    workflow[FlipperEfficiency[Analyzer]] = efficiency
+    workflow[CorrectionResolution] = resolution
+    workflow[CorrectionResolutionTolerance] = 1e-2
+    return workflow.compute(PolarizationCorrectedData[Down, Down])
+
+
+def test_wavelength_dependent_flipper_efficiency_is_evaluated_per_event() -> None:
+    channel = _make_resolution_events()
+    result = _correct_with_flipper_efficiency(
+        channel, FlipperEfficiency(_flipper_efficiency), 'event'
+    )
+    events = channel.bins.concat().value
+    expected = _correct_with_flipper_efficiency(
+        events, FlipperEfficiency(_flipper_efficiency(**events.coords)), 'event'
+    )
+    for field in ('upup', 'updown', 'downup', 'downdown'):
+        assert_allclose(
+            getattr(result, field).bins.concat().value.data,
+            getattr(expected, field).data,
+        )
+
+
+def test_tabulated_flipper_efficiency_is_evaluated_per_bin() -> None:
+    channel = _make_resolution_events()
+    table = sc.DataArray(
+        sc.array(dims=['wavelength'], values=[0.9, 0.8]),
+        coords={'wavelength': channel.coords['wavelength']},
+    )
+    result = _correct_with_flipper_efficiency(
+        channel, FlipperEfficiency(table), 'bin-center'
+    )
+    expected = _correct_with_flipper_efficiency(
+        channel, FlipperEfficiency(table.data), 'bin-center'
+    )
+    for field in ('upup', 'updown', 'downup', 'downdown'):
+        assert_allclose(getattr(result, field), getattr(expected, field))
+
+
+def test_flipper_efficiency_uses_fine_bins_of_auto_resolution() -> None:
+    channel = _make_resolution_events()
+    sizes = []
+
+    def efficiency(*, wavelength: sc.Variable, time: sc.Variable) -> sc.Variable:
+        sizes.append(wavelength.size if wavelength.bins is None else None)
+        return _flipper_efficiency(wavelength=wavelength, time=time)
+
+    auto = _correct_with_flipper_efficiency(
+        channel, FlipperEfficiency(efficiency), 'auto'
+    )
+    # Bin means and the events of the wide bin, for the polarizer and the analyzer.
+    assert sizes == [2, 100, 2, 100]
+
+    per_bin = _correct_with_flipper_efficiency(
+        channel, FlipperEfficiency(_flipper_efficiency), 'bin-mean'
+    )
+    event = _correct_with_flipper_efficiency(
+        channel, FlipperEfficiency(_flipper_efficiency), 'event'
+    )
+    for field in ('upup', 'updown', 'downup', 'downdown'):
+        actual = getattr(auto, field)
+        assert_allclose(actual[0].values, getattr(per_bin, field)[0].values)
+        assert_allclose(actual[1].values, getattr(event, field)[1].values)
+
+
+def test_tabulated_flipper_efficiency_raises_outside_of_table() -> None:
+    channel = _make_resolution_events()
+    table = sc.DataArray(
+        sc.array(dims=['wavelength'], values=[0.9, 0.8]),
+        coords={
+            'wavelength': sc.array(
+                dims=['wavelength'], values=[2.0, 3.0, 4.0], unit='angstrom'
+            )
+        },
+    )
+    with pytest.raises(ValueError, match='outside of the flipper efficiency table'):
+        _correct_with_flipper_efficiency(channel, FlipperEfficiency(table), 'event')
+
+
+def test_event_buffers_are_only_allocated_for_transmissions_evaluated_in_place(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    requested = []
+    get = correction._EventBuffers.get
+
+    def recording_get(self, key, sizes):
+        requested.append(key)
+        return get(self, key, sizes)
+
+    monkeypatch.setattr(correction._EventBuffers, 'get', recording_get)
+    channel = _make_resolution_events()
+    table = sc.DataArray(
+        sc.array(dims=['wavelength'], values=[0.9, 0.95, 0.97]),
+        coords={
+            'wavelength': sc.array(
+                dims=['wavelength'], values=[1.0, 4.0, 6.0], unit='angstrom'
+            )
+        },
+    )
+    supermirror = pol.supermirror.SupermirrorTransmissionFunction(
+        pol.EfficiencyLookupTable(table=table)
+    )
+    assert not supermirror.supports_out(channel.bins)
+    compute_polarizing_element_correction(channel, supermirror)
+    assert requested == []
+
+    he3 = _make_he3_transmission(0.7)
+    assert he3.supports_out(channel.bins)
+    compute_polarizing_element_correction(channel, he3)
+    assert requested == ['plus', 'minus']
+
+
+def test_compute_polarizing_element_correction_raises_for_unknown_resolution() -> None:
+    with pytest.raises(ValueError, match='Unknown correction resolution'):
+        compute_polarizing_element_correction(
+            _make_resolution_events(),
+            _make_he3_transmission(0.7),
+            resolution='pixel',
+        )
+
+
+@pytest.mark.parametrize('resolution', ['bin-center', 'bin-mean', 'auto'])
+def test_workflow_with_per_bin_resolution_is_close_to_event_resolution(
+    resolution: str,
+) -> None:
+    workflow = CorrectionWorkflow()
+    workflow[TransmissionFunction[Polarizer]] = _make_he3_transmission(0.7)
+    workflow[TransmissionFunction[Analyzer]] = _make_he3_transmission(0.6)
+    for i, key in enumerate(
+        (
+            ReducedSampleDataBySpinChannel[Up, Up],
+            ReducedSampleDataBySpinChannel[Up, Down],
+            ReducedSampleDataBySpinChannel[Down, Up],
+            ReducedSampleDataBySpinChannel[Down, Down],
+        )
+    ):
+        workflow[key] = (
+            _make_channel_events(i).bins.concat().bin(time=200, wavelength=200)
+        )
+    expected = workflow.compute(TotalPolarizationCorrectedData)
+    workflow[CorrectionResolution] = resolution
+    workflow[CorrectionResolutionTolerance] = 0.05
+    result = workflow.compute(TotalPolarizationCorrectedData)
+    for field in ('upup', 'updown', 'downup', 'downdown'):
+        assert_allclose(
+            sc.values(getattr(result, field).bins.sum().sum()),
+            sc.values(getattr(expected, field).bins.sum().sum()),
+            rtol=sc.scalar(5e-3),
+        )
@@ -292,3 +292,100 @@ def test_direct_beam_raises_if_input_is_counts() -> None:
             q_range=q_range,
             background_q_range=background_q_range,
         )
+
+
+def _make_run_section() -> base.RunSectionLog:
+    return base.determine_run_section(
+        sample_in_beam=dummy_sample_in_beam(),
+        analyzer_in_beam=dummy_analyzer_in_beam(),
+        polarizer_in_beam=dummy_polarizer_in_beam(),
+        analyzer_spin=dummy_analyzer_spin(),
+        polarizer_spin=dummy_polarizer_spin(),
+    )
+
+
+def _make_he3_transmission(T1: sc.Variable) -> pol.He3TransmissionFunction:
+    return pol.He3TransmissionFunction(
+        opacity_function=pol.He3OpacityFunction(sc.scalar(0.8, unit='1/angstrom')),
+        polarization_function=pol.He3PolarizationFunction(C=sc.scalar(0.9), T1=T1),
+        transmission_empty_glass=sc.scalar(0.9),
+    )
+
+
+def test_subdivide_sample_sections_preserves_bounds_and_bounds_error() -> None:
+    run_section = _make_run_section()
+    transmission = _make_he3_transmission(T1=sc.scalar(2000.0, unit='s'))
+    wavelength = sc.linspace('wavelength', 1.0, 5.0, num=10, unit='angstrom')
+    tolerance = 0.01
+
+    result = base.subdivide_sample_sections(
+        run_section,
+        transmission_functions=[transmission],
+        wavelength=wavelength,
+        tolerance=tolerance,
+    )
+    time = result.coords['time']
+    assert result.sizes['time'] > run_section.sizes['time']
+    assert np.all(np.isin(run_section.coords['time'].values, time.values))
+    assert np.all(np.diff(time.values) > 0)
+    # Log values are inherited from the section a new bound was inserted into.
+    original = run_section[
+        'time',
+        np.searchsorted(run_section.coords['time'].values, time.values, side='right')
+        - 1,
+    ]
+    for name in run_section:
+        assert_identical(result[name].data, original[name].data)
+
+    sample = result['sample_in_beam'].values[:-1]
+    for plus_minus in ('plus', 'minus'):
+        t = transmission(
+            time=time, wavelength=wavelength.max(), plus_minus=plus_minus
+        ).values
+        change = np.abs(t[1:] / t[:-1] - 1)
+        assert np.all(change[sample] <= tolerance * (1 + 1e-12))
+
+
+def test_subdivide_sample_sections_does_not_cut_slowly_changing_sections() -> None:
+    run_section = _make_run_section()
+    transmission = _make_he3_transmission(T1=sc.scalar(1e9, unit='s'))
+    wavelength = sc.linspace('wavelength', 1.0, 5.0, num=10, unit='angstrom')
+
+    result = base.subdivide_sample_sections(
+        run_section,
+        transmission_functions=[transmission],
+        wavelength=wavelength,
+        tolerance=0.01,
+    )
+    assert_identical(result, run_section)
+
+
+def test_run_section_index_selects_views_of_reduced_data() -> None:
+    run_section = _make_run_section()
+    index = base.build_run_section_index(run_section)
+    wavelength = sc.linspace('wavelength', 1.0, 5.0, num=10, unit='angstrom')
+    data = base.run_reduction_workflow(
+        run_section=run_section, wavelength_bands=wavelength, index=index
+    )
+    # Each of the 4 sections has one direct-beam run per cell and 4 sample runs. The
+    # last sample run of the last section is open-ended and thus not included.
+    assert data.sizes['time'] == 1 + 4 * (2 + 4) - 1
+    assert index.ranges['direct_beam'] == slice(0, 1)
+    assert index.ranges['polarizer'] == slice(1, 5)
+    assert index.ranges['analyzer'] == slice(5, 9)
+
+    polarizer = base.extract_polarizer_direct_beam_polarized(data, index)
+    assert sc.all(polarizer.coords['polarizer_in_beam']).value
+    assert not sc.any(polarizer.coords['analyzer_in_beam']).value
+    assert np.all(np.diff(polarizer.coords['time'].values) > 0)
+
+    upup = base.extract_sample_data_up_up(data, index)
+    updown = base.extract_sample_data_up_down(data, index)
+    assert upup.sizes['time'] == 4
+    assert updown.sizes['time'] == 3
+    assert sc.all(upup.coords['polarizer_spin'] == base.spin_up).value
+    assert sc.all(updown.coords['analyzer_spin'] == base.spin_down).value
+
+    # Selections are views into the reduced data
+    upup.values[...] = -1.0
+    assert sc.all(data['time', index.ranges['sample_up_up']].data == -1.0).value
@@ -0,0 +1,85 @@
+# SPDX-License-Identifier: BSD-3-Clause
+# Copyright (c) 2025 Scipp contributors (https://github.com/scipp)
+import numpy as np
+import pytest
+import scipp as sc
+
+from ess.polarization import he3
+from ess.polarization.bootstrap import bootstrap_he3_fit
+
+C = sc.scalar(1.3)
+T1 = sc.scalar(123456.0, unit='s')
+OPACITY0 = sc.scalar(0.88, unit='1/angstrom')
+GLASS = sc.scalar(0.9)
+
+
+def make_data(noise: float) -> tuple[sc.DataArray, sc.DataArray]:
+    rng = np.random.default_rng(seed=1234)
+    wavelength = sc.linspace('wavelength', 0.5, 5.0, num=20, unit='angstrom')
+    time = sc.linspace('time', 0.0, 500000.0, num=12, unit='s')
+    opacity_function = he3.He3OpacityFunction(OPACITY0)
+    depolarized = sc.DataArray(
+        GLASS * sc.exp(-opacity_function(wavelength)),
+        coords={'wavelength': wavelength},
+    )
+    polarized = sc.DataArray(
+        he3.transmission_incoming_unpolarized(
+            transmission_empty_glass=GLASS,
+            opacity=opacity_function(wavelength),
+            polarization=he3.He3PolarizationFunction(C=C, T1=T1)(time),
+        ),
+        coords={'time': time, 'wavelength': wavelength},
+    )
+    for da in (depolarized, polarized):
+        da.values *= 1 + rng.normal(0.0, noise, da.shape)
+    return depolarized, polarized
+
+
+def fit(method: str, **kwargs) -> he3.He3TransmissionFunction:
+    depolarized, polarized = make_data(noise=0.01)
+    return bootstrap_he3_fit(
+        transmission_empty_glass=GLASS,
+        depolarized=depolarized,
+        polarized=polarized,
+        opacity0_initial_guess=sc.scalar(0.5, unit='1/angstrom'),
+        method=method,
+        **kwargs,
+    )
+
+
+@pytest.mark.parametrize('method', ['bootstrap', 'jackknife'])
+def test_bootstrap_he3_fit_std_is_consistent_with_true_parameters(method) -> None:
+    result = fit(method, samples=50)
+    std = result.std()
+    polarization_function = result.transmission_function.polarization_function
+    fitted = {
+        'opacity0': result.transmission_function.opacity_function.opacity0,
+        'C': polarization_function.C,
+        'T1': polarization_function.T1,
+    }
+    for name, true in {'opacity0': OPACITY0, 'C': C, 'T1': T1}.items():
+        assert std[name].unit == true.unit
+        assert 0 < std[name].value < 0.05 * abs(true.value)
+        assert abs((fitted[name] - true).value) < 5 * std[name].value
+        assert sc.allclose(
+            result.samples[name].data.mean(), fitted[name], rtol=sc.scalar(0.05)
+        )
+
+
+def test_bootstrap_he3_fit_returns_requested_number_of_samples() -> None:
+    result = fit('bootstrap', samples=7)
+    assert result.samples['C'].sizes == {'sample': 7}
+    result = fit('jackknife')
+    # One sample per wavelength of the opacity fit and per time of the polarized fit
+    assert result.samples['C'].sizes == {'sample': 20 + 12}
+
+
+def test_bootstrap_he3_fit_parallel_matches_serial() -> None:
+    serial = fit('bootstrap', samples=6, seed=3)
+    parallel = fit('bootstrap', samples=6, seed=3, max_workers=2)
+    assert sc.identical(serial.samples, parallel.samples)
+
+
+def test_bootstrap_he3_fit_raises_for_unknown_method() -> None:
+    with pytest.raises(ValueError, match='method'):
+        fit('bayesian')
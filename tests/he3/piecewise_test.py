@@ -0,0 +1,155 @@
+# SPDX-License-Identifier: BSD-3-Clause
+# Copyright (c) 2025 Scipp contributors (https://github.com/scipp)
+import numpy as np
+import pytest
+import scipp as sc
+from scipp.testing import assert_allclose
+
+from ess.polarization import he3
+
+
+def make_cell(C: float) -> he3.He3TransmissionFunction:
+    return he3.He3TransmissionFunction(
+        opacity_function=he3.He3OpacityFunction(sc.scalar(0.88, unit='1/angstrom')),
+        polarization_function=he3.He3PolarizationFunction(
+            C=sc.scalar(C), T1=sc.scalar(100000.0, unit='s')
+        ),
+        transmission_empty_glass=sc.scalar(0.9),
+    )
+
+
+def make_piecewise() -> he3.PiecewiseTransmissionFunction:
+    return he3.PiecewiseTransmissionFunction.from_intervals(
+        [
+            # Deliberately unsorted, with a gap between the second and third cell.
+            (sc.scalar(2000.0, unit='s'), sc.scalar(3000.0, unit='s'), make_cell(0.5)),
+            (sc.scalar(0.0, unit='s'), sc.scalar(1.0, unit='ks'), make_cell(0.7)),
+            (sc.scalar(1000.0, unit='s'), sc.scalar(1500.0, unit='s'), make_cell(0.6)),
+        ]
+    )
+
+
+def expected(time: np.ndarray, wavelength: np.ndarray, sign: float) -> np.ndarray:
+    cells = {0.7: (0, 1000), 0.6: (1000, 1500), 0.5: (2000, 3000)}
+    result = np.full(time.shape, np.nan)
+    for C, (start, stop) in cells.items():
+        inside = (time >= start) & ((time < stop) | (time == 3000))
+        polarization = C * np.exp(-time / 100000.0)
+        transmission = 0.9 * np.exp(-0.88 * wavelength * (1 + sign * polarization))
+        result[inside] = transmission[inside]
+    return result
+
+
+def test_from_intervals_sorts_and_fills_gaps() -> None:
+    piecewise = make_piecewise()
+    assert sc.identical(
+        piecewise.edges,
+        sc.array(dims=['time'], values=[0.0, 1000, 1500, 2000, 3000], unit='s'),
+    )
+    assert [f is None for f in piecewise.functions] == [False, False, True, False]
+
+
+def test_from_intervals_raises_if_intervals_overlap() -> None:
+    with pytest.raises(ValueError, match='overlaps'):
+        he3.PiecewiseTransmissionFunction.from_intervals(
+            [
+                (sc.scalar(0.0, unit='s'), sc.scalar(10.0, unit='s'), make_cell(0.7)),
+                (sc.scalar(5.0, unit='s'), sc.scalar(20.0, unit='s'), make_cell(0.6)),
+            ]
+        )
+
+
+def test_segment_index() -> None:
+    piecewise = make_piecewise()
+    time = sc.array(
+        dims=['event'], values=[-1.0, 0, 999, 1000, 1700, 2500, 3000, 3001], unit='s'
+    )
+    np.testing.assert_array_equal(
+        piecewise.segment_index(time), [-1, 0, 0, 1, 2, 3, 3, -1]
+    )
+
+
+@pytest.mark.parametrize('unit', ['s', 'ks'])
+def test_segment_index_does_not_truncate_times_for_integer_edges(unit: str) -> None:
+    piecewise = he3.PiecewiseTransmissionFunction.from_intervals(
+        [(sc.scalar(0, unit=unit), sc.scalar(100, unit=unit), make_cell(0.7))]
+    )
+    assert piecewise.edges.dtype == 'int64'
+    time = sc.array(dims=['event'], values=[-0.5, 50, 100.5, 100.9], unit=unit).to(
+        unit='s'
+    )
+    np.testing.assert_array_equal(piecewise.segment_index(time), [-1, 0, -1, -1])
+
+
+@pytest.mark.parametrize('sort', [True, False])
+def test_apply_to_events_matches_per_segment_evaluation(sort: bool) -> None:
+    rng = np.random.default_rng(seed=1234)
+    time = rng.uniform(-100.0, 3100.0, size=1000)
+    if sort:
+        time.sort()
+    events = sc.DataArray(
+        sc.ones(dims=['event'], shape=[1000]),
+        coords={
+            'time': sc.array(dims=['event'], values=time, unit='s'),
+            'wavelength': sc.array(
+                dims=['event'], values=rng.uniform(1.0, 5.0, 1000), unit='angstrom'
+            ),
+        },
+    )
+    binned = events.bin(wavelength=4)
+
+    result = make_piecewise().apply(binned.bins, 'plus')
+
+    assert result.bins is not None
+    assert sc.identical(result.bins.size(), binned.bins.size().data)
+    flat = binned.bins.constituents['data']
+    np.testing.assert_allclose(
+        result.bins.constituents['data'].values,
+        expected(flat.coords['time'].values, flat.coords['wavelength'].values, -1),
+    )
+
+
+def test_apply_to_dense_data_matches_per_segment_evaluation() -> None:
+    time = sc.linspace('time', 0.0, 3000.0, num=31, unit='s')
+    wavelength = sc.linspace('wavelength', 1.0, 5.0, num=5, unit='angstrom')
+    data = sc.DataArray(
+        sc.ones(sizes={'wavelength': 5, 'time': 31}),
+        coords={'time': time, 'wavelength': wavelength},
+    )
+
+    result = make_piecewise().apply(data, 'minus')
+
+    assert result.sizes == data.sizes
+    np.testing.assert_allclose(
+        result.values,
+        expected(
+            time.broadcast(sizes=data.sizes).values,
+            wavelength.broadcast(sizes=data.sizes).values,
+            1,
+        ),
+    )
+    single = make_cell(0.7).apply(data['time', :10], 'minus')
+    assert_allclose(result['time', :10], single.transpose(result.dims).copy())
+
+
+@pytest.mark.parametrize(
+    ('start', 'stop', 'error'),
+    [
+        (
+            sc.datetime('2025-01-01T00:00:00', unit='s'),
+            sc.datetime('2025-01-01T00:01:00', unit='s'),
+            ValueError,
+        ),
+        (sc.scalar(-10.0, unit='s'), sc.scalar(10.0, unit='s'), ValueError),
+        (sc.scalar(10.0, unit='s'), sc.scalar(10.0, unit='s'), ValueError),
+        (sc.scalar(20.0, unit='s'), sc.scalar(10.0, unit='s'), ValueError),
+        (sc.scalar(0.0, unit='m'), sc.scalar(10.0, unit='m'), sc.UnitError),
+    ],
+)
+def test_from_intervals_raises_if_interval_is_not_relative_to_time_origin(
+    start, stop, error
+) -> None:
+    with pytest.raises(error):
+        he3.PiecewiseTransmissionFunction.from_intervals(
+            [(start, stop, make_cell(0.7))]
+        )
@@ -172,3 +172,143 @@ def test_incoming_polarized_raises_if_plus_minus_coord_is_bad() -> None:
             opacity_function=opacity_function,
             transmission_empty_glass=transmission_empty_glass,
         )
+
+
+@pytest.mark.parametrize('pulses', [1, 7, 1000])
+def test_transmission_function_factorized_over_pulses_matches_direct(pulses) -> None:
+    rng = np.random.default_rng(seed=1234)
+    pulse_time = sc.linspace('pulse', 0.0, 100000.0, num=pulses, unit='s')
+    time = sc.array(
+        dims=['event'],
+        values=np.sort(rng.choice(pulse_time.values, size=1000)),
+        unit='s',
+    )
+    events = sc.DataArray(
+        sc.ones(sizes=time.sizes),
+        coords={
+            'time': time,
+            'wavelength': sc.array(
+                dims=['event'], values=rng.uniform(1.0, 5.0, 1000), unit='angstrom'
+            ),
+        },
+    )
+    polarization_function = he3.He3PolarizationFunction(
+        C=sc.scalar(0.7), T1=sc.scalar(123456.0, unit='s')
+    )
+    opacity_function = he3.He3OpacityFunction(sc.scalar(0.88, unit='1/angstrom'))
+    transmission_function = he3.He3TransmissionFunction(
+        transmission_empty_glass=sc.scalar(0.9),
+        opacity_function=opacity_function,
+        polarization_function=polarization_function,
+    )
+    binned = events.bin(wavelength=10)
+
+    for data in (events, binned.bins):
+        for plus_minus in ('plus', 'minus'):
+            result = transmission_function.apply(data, plus_minus)
+            polarization = polarization_function(data.coords['time'])
+            if plus_minus == 'plus':
+                polarization = -polarization
+            opacity = opacity_function(data.coords['wavelength'])
+            expected = sc.scalar(0.9) * sc.exp(-opacity * (1.0 + polarization))
+            assert sc.allclose(result, expected)
+
+
+def _make_binned_events() -> sc.DataArray:
+    rng = np.random.default_rng(seed=1234)
+    events = sc.DataArray(
+        sc.ones(dims=['event'], shape=[1000]),
+        coords={
+            # Events share the time of their pulse.
+            'time': sc.array(
+                dims=['event'], values=np.repeat(np.arange(100.0), 10), unit='s'
+            ),
+            'wavelength': sc.array(
+                dims=['event'], values=rng.uniform(0.1, 0.8, 1000), unit='nm'
+            ),
+        },
+    )
+    return events.bin(wavelength=4)
+
+
+@pytest.mark.parametrize('plus_minus', ['plus', 'minus'])
+def test_transmission_function_evaluates_into_out(plus_minus: str) -> None:
+    transmission = he3.He3TransmissionFunction(
+        opacity_function=he3.He3OpacityFunction(sc.scalar(0.88, unit='1/angstrom')),
+        polarization_function=he3.He3PolarizationFunction(
+            C=sc.scalar(0.7), T1=sc.scalar(1000.0, unit='s')
+        ),
+        transmission_empty_glass=sc.scalar(0.9),
+    )
+    data = _make_binned_events()
+    buffer = sc.empty(dims=['event'], shape=[1200])
+    out = buffer['event', :1000]
+
+    result = transmission.apply(data.bins, plus_minus, out=out)
+
+    expected = transmission.apply(data.bins, plus_minus)
+    assert sc.allclose(result.bins.concat().value, expected.bins.concat().value)
+    np.testing.assert_array_equal(
+        buffer.values[:1000], result.bins.constituents['data'].values
+    )
+
+
+def test_transmission_function_ignores_out_for_parameter_scan() -> None:
+    transmission = he3.He3TransmissionFunction(
+        opacity_function=he3.He3OpacityFunction(sc.scalar(0.88, unit='1/angstrom')),
+        polarization_function=he3.He3PolarizationFunction(
+            C=sc.array(dims=['scan'], values=[0.6, 0.7]),
+            T1=sc.scalar(1000.0, unit='s'),
+        ),
+        transmission_empty_glass=sc.scalar(0.9),
+    )
+    data = _make_binned_events()
+    out = sc.empty(dims=['event'], shape=[1000])
+    result = transmission.apply(data.bins, 'plus', out=out)
+    assert result.sizes == {'scan': 2, 'wavelength': 4}
+    assert sc.identical(result, transmission.apply(data.bins, 'plus'))
+
+
+def test_polarization_is_evaluated_once_per_pulse_for_wavelength_binned_events():
+    rng = np.random.default_rng(seed=1234)
+    pulse_time = sc.linspace('pulse', 0.0, 100000.0, num=20, unit='s')
+    time = sc.array(
+        dims=['event'],
+        values=np.sort(rng.choice(pulse_time.values, size=10000)),
+        unit='s',
+    )
+    events = sc.DataArray(
+        sc.ones(sizes=time.sizes),
+        coords={
+            'time': time,
+            'wavelength': sc.array(
+                dims=['event'], values=rng.uniform(1.0, 5.0, 10000), unit='angstrom'
+            ),
+        },
+    )
+    # Each wavelength bin repeats the sequence of pulse times.
+    binned = events.bin(wavelength=50)
+    sizes = []
+
+    class CountingPolarizationFunction(he3.He3PolarizationFunction):
+        def __call__(self, time: sc.Variable) -> sc.Variable:
+            sizes.append(time.size)
+            return super().__call__(time)
+
+    polarization_function = CountingPolarizationFunction(
+        C=sc.scalar(0.7), T1=sc.scalar(123456.0, unit='s')
+    )
+    transmission_function = he3.He3TransmissionFunction(
+        transmission_empty_glass=sc.scalar(0.9),
+        opacity_function=he3.He3OpacityFunction(sc.scalar(0.88, unit='1/angstrom')),
+        polarization_function=polarization_function,
+    )
+    result = transmission_function.apply(binned.bins, 'plus')
+    assert sizes == [20]
+
+    polarization = he3.He3PolarizationFunction(
+        C=sc.scalar(0.7), T1=sc.scalar(123456.0, unit='s')
+    )(binned.bins.coords['time'])
+    opacity = transmission_function.opacity_function(binned.bins.coords['wavelength'])
+    expected = sc.scalar(0.9) * sc.exp(-opacity * (1.0 - polarization))
+    assert sc.allclose(result, expected)
@@ -0,0 +1,152 @@
+# SPDX-License-Identifier: BSD-3-Clause
+# Copyright (c) 2025 Scipp contributors (https://github.com/scipp)
+import json
+from pathlib import Path
+
+import h5py
+import pytest
+import scipp as sc
+from scipp.testing import assert_allclose, assert_identical
+
+from ess.polarization import (
+    EfficiencyLookupTable,
+    He3OpacityFunction,
+    He3PolarizationFunction,
+    He3TransmissionFunction,
+    PiecewiseTransmissionFunction,
+    SecondDegreePolynomialEfficiency,
+)
+from ess.polarization.io import load_transmission_function, save_transmission_function
+from ess.polarization.supermirror import SupermirrorTransmissionFunction
+
+
+def _make_he3() -> He3TransmissionFunction:
+    return He3TransmissionFunction(
+        opacity_function=He3OpacityFunction(sc.scalar(0.88, unit='1/angstrom')),
+        polarization_function=He3PolarizationFunction(
+            C=sc.scalar(0.7, variance=0.01), T1=sc.scalar(100000.0, unit='s')
+        ),
+        transmission_empty_glass=sc.scalar(0.9),
+    )
+
+
+def test_save_and_load_he3_transmission_function(tmp_path: Path) -> None:
+    transmission = _make_he3()
+    filename = tmp_path / 'analyzer.h5'
+    save_transmission_function(transmission, filename)
+    loaded = load_transmission_function(filename)
+
+    assert isinstance(loaded, He3TransmissionFunction)
+    assert_identical(
+        loaded.opacity_function.opacity0, transmission.opacity_function.opacity0
+    )
+    # Uncertainties are stored as standard deviations, as is common in NeXus.
+    assert_allclose(
+        loaded.polarization_function.C, transmission.polarization_function.C
+    )
+    assert_identical(
+        loaded.polarization_function.T1, transmission.polarization_function.T1
+    )
+    assert_identical(
+        loaded.transmission_empty_glass, transmission.transmission_empty_glass
+    )
+
+
+@pytest.mark.parametrize('uniform_grid', [False, True])
+def test_save_and_load_supermirror_with_lookup_table(
+    tmp_path: Path, uniform_grid: bool
+) -> None:
+    table = sc.DataArray(
+        sc.array(dims=['wavelength'], values=[0.9, 0.95, 0.97, 0.96]),
+        coords={
+            'wavelength': sc.array(
+                dims=['wavelength'], values=[1.0, 2.0, 4.0, 8.0], unit='angstrom'
+            )
+        },
+    )
+    transmission = SupermirrorTransmissionFunction(
+        EfficiencyLookupTable(table=table, uniform_grid=uniform_grid)
+    )
+    filename = tmp_path / 'polarizer.h5'
+    save_transmission_function(transmission, filename)
+    loaded = load_transmission_function(filename)
+
+    efficiency = loaded.efficiency_function
+    assert isinstance(efficiency, EfficiencyLookupTable)
+    assert efficiency.uniform_grid == uniform_grid
+    assert_identical(efficiency.table.data, table.data)
+    assert_identical(efficiency.table.coords['wavelength'], table.coords['wavelength'])
+    wavelength = sc.linspace('event', 1.0, 8.0, 11, unit='angstrom')
+    assert_identical(
+        loaded(wavelength=wavelength, plus_minus='plus'),
+        transmission(wavelength=wavelength, plus_minus='plus'),
+    )
+
+
+def test_save_and_load_piecewise_transmission_function(tmp_path: Path) -> None:
+    transmission = PiecewiseTransmissionFunction.from_intervals(
+        [
+            (sc.scalar(0.0, unit='s'), sc.scalar(100.0, unit='s'), _make_he3()),
+            (sc.scalar(200.0, unit='s'), sc.scalar(300.0, unit='s'), _make_he3()),
+        ]
+    )
+    filename = tmp_path / 'analyzer.h5'
+    save_transmission_function(transmission, filename)
+    loaded = load_transmission_function(filename)
+
+    assert isinstance(loaded, PiecewiseTransmissionFunction)
+    assert_identical(loaded.edges, transmission.edges)
+    assert [f is None for f in loaded.functions] == [False, True, False]
+
+
+def test_sidecar_lists_parameters_with_units(tmp_path: Path) -> None:
+    filename = tmp_path / 'polarizer.h5'
+    efficiency = SecondDegreePolynomialEfficiency(
+        a=sc.scalar(-0.001, unit='1/angstrom**2'),
+        b=sc.scalar(0.01, unit='1/angstrom'),
+        c=sc.scalar(0.95),
+    )
+    save_transmission_function(SupermirrorTransmissionFunction(efficiency), filename)
+
+    sidecar = json.loads(filename.with_suffix('.json').read_text())
+    assert sidecar['format_version'] == 1
+    content = sidecar['transmission_function']
+    assert content['type'] == 'SupermirrorTransmissionFunction'
+    coefficients = content['efficiency_function']
+    assert coefficients['a'] == {'value': -0.001, 'unit': str(efficiency.a.unit)}
+    assert coefficients['c'] == {'value': 0.95, 'unit': 'dimensionless'}
+
+
+def test_load_rejects_newer_format_version(tmp_path: Path) -> None:
+    filename = tmp_path / 'analyzer.h5'
+    save_transmission_function(_make_he3(), filename)
+    with h5py.File(filename, 'r+') as f:
+        f['transmission_function'].attrs['format_version'] = 99
+    with pytest.raises(ValueError, match='format version 99'):
+        load_transmission_function(filename)
+
+
+def test_save_and_load_parameters_with_scan_dim(tmp_path: Path) -> None:
+    transmission = He3TransmissionFunction(
+        opacity_function=He3OpacityFunction(
+            sc.array(dims=['scan'], values=[0.8, 0.9], unit='1/angstrom')
+        ),
+        polarization_function=He3PolarizationFunction(
+            C=sc.array(dims=['scan'], values=[0.6, 0.7], variances=[0.01, 0.01]),
+            T1=sc.scalar(100000.0, unit='s'),
+        ),
+        transmission_empty_glass=sc.scalar(0.9),
+    )
+    filename = tmp_path / 'analyzer.h5'
+    save_transmission_function(transmission, filename)
+    loaded = load_transmission_function(filename)
+
+    assert_identical(
+        loaded.opacity_function.opacity0, transmission.opacity_function.opacity0
+    )
+    assert_allclose(
+        loaded.polarization_function.C, transmission.polarization_function.C
+    )
+    assert_identical(
+        loaded.polarization_function.T1, transmission.polarization_function.T1
+    )
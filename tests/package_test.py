@@ -7,6 +7,9 @@ Note that additional imports need to be added for repositories that
 contain multiple packages.
 """
 
+import subprocess
+import sys
+
 from ess import polarization as pkg
 
 
@@ -14,7 +17,29 @@ def test_has_version():
     assert hasattr(pkg, '__version__')
 
 
+def test_all_public_names_can_be_accessed():
+    for name in pkg.__all__:
+        assert getattr(pkg, name) is not None
+    assert set(pkg.__all__) <= set(dir(pkg))
+
+
+def test_import_does_not_load_submodules():
+    # Regression guard for import time, run in a fresh interpreter since other tests
+    # have already imported everything.
+    heavy = ['ess.polarization.he3', 'ess.reduce', 'scipy', 'dask']
+    code = (
+        'import sys, ess.polarization; '
+        f'print([m for m in {heavy!r} if m in sys.modules])'
+    )
+    result = subprocess.run(  # noqa: S603
+        [sys.executable, '-c', code], capture_output=True, text=True, check=True
+    )
+    assert result.stdout.strip() == '[]'
+
+
 # This is for CI package tests. They need to run tests with minimal dependencies,
 # that is, without installing pytest. This code does not affect pytest.
 if __name__ == '__main__':
     test_has_version()
+    test_all_public_names_can_be_accessed()
+    test_import_does_not_load_submodules()
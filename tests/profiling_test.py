@@ -0,0 +1,86 @@
+# SPDX-License-Identifier: BSD-3-Clause
+# Copyright (c) 2025 Scipp contributors (https://github.com/scipp)
+import json
+from pathlib import Path
+
+import pytest
+import sciline
+import scipp as sc
+from sciline.scheduler import NaiveScheduler
+
+from ess.polarization import (
+    He3OpacityFunction,
+    He3PolarizationFunction,
+    He3TransmissionEmptyGlass,
+    He3TransmissionFunction,
+    Polarized,
+    he3,
+    synthetic,
+)
+from ess.polarization.profiling import ProviderProfiler
+from ess.polarization.types import Analyzer, TransmissionFunction
+
+
+def _make_workflow() -> sciline.Pipeline:
+    transmission = He3TransmissionFunction(
+        opacity_function=He3OpacityFunction(sc.scalar(0.88, unit='1/angstrom')),
+        polarization_function=He3PolarizationFunction(
+            C=sc.scalar(0.7), T1=sc.scalar(100000.0, unit='s')
+        ),
+        transmission_empty_glass=sc.scalar(0.9),
+    )
+    no_cell, with_cell = synthetic.make_direct_beam_runs(
+        transmission,
+        time=sc.linspace('time', 0.0, 100000.0, 20, unit='s'),
+        wavelength=sc.linspace('wavelength', 1.0, 5.0, 30, unit='angstrom'),
+    )
+    workflow = sciline.Pipeline(
+        (
+            he3.compute_transmission_fraction_from_direct_beam,
+            he3.get_he3_transmission_incoming_unpolarized_from_fit_to_direct_beam,
+        )
+    )
+    workflow[he3.DirectBeamNoCell] = no_cell
+    workflow[he3.He3DirectBeam[Analyzer, Polarized]] = with_cell
+    workflow[He3OpacityFunction[Analyzer]] = transmission.opacity_function
+    workflow[He3TransmissionEmptyGlass[Analyzer]] = sc.scalar(0.9)
+    return workflow
+
+
+@pytest.mark.parametrize('scheduler', [None, NaiveScheduler()])
+def test_profiler_records_each_provider_call(scheduler) -> None:
+    profiler = ProviderProfiler()
+    _make_workflow().compute(
+        TransmissionFunction[Analyzer], reporter=profiler, scheduler=scheduler
+    )
+    calls = {call.name.rsplit('.', 1)[-1]: call for call in profiler.calls}
+    assert set(calls) == {
+        'compute_transmission_fraction_from_direct_beam',
+        'get_he3_transmission_incoming_unpolarized_from_fit_to_direct_beam',
+    }
+    fraction = calls['compute_transmission_fraction_from_direct_beam']
+    assert fraction.output_bytes > 20 * 30 * 8
+    assert fraction.fit_evaluations == 0
+    fit = calls['get_he3_transmission_incoming_unpolarized_from_fit_to_direct_beam']
+    assert fit.fit_evaluations > 0
+    assert fit.output_bytes > 0
+    assert fit.start >= fraction.start + fraction.wall_time
+    for call in profiler.calls:
+        assert call.wall_time > 0
+        assert call.cpu_time >= 0
+
+
+def test_profiler_exports_table_and_chrome_trace(tmp_path: Path) -> None:
+    profiler = ProviderProfiler()
+    _make_workflow().compute(TransmissionFunction[Analyzer], reporter=profiler)
+    rows = profiler.as_table()
+    assert len(rows) == 2
+    assert 'fit_evaluations' in rows[0]
+    assert 'get_he3_transmission' in profiler.summary()
+
+    filename = tmp_path / 'trace.json'
+    profiler.save_chrome_trace(filename)
+    trace = json.loads(filename.read_text())
+    events = trace['traceEvents']
+    assert [event['ph'] for event in events] == ['X', 'X']
+    assert events[1]['args']['fit_evaluations'] == rows[1]['fit_evaluations']
@@ -0,0 +1,243 @@
+# SPDX-License-Identifier: BSD-3-Clause
+# Copyright (c) 2025 Scipp contributors (https://github.com/scipp)
+import json
+import threading
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+import pytest
+import scipp as sc
+from scipp.testing import assert_identical
+
+from ess.polarization import (
+    CorrectionWorkflow,
+    He3OpacityFunction,
+    He3PolarizationFunction,
+    He3TransmissionFunction,
+    synthetic,
+)
+from ess.polarization.io import save_transmission_function
+from ess.polarization.service import CorrectionService
+from ess.polarization.supermirror import (
+    EfficiencyLookupTable,
+    SupermirrorTransmissionFunction,
+)
+from ess.polarization.types import (
+    Analyzer,
+    Down,
+    Polarizer,
+    ReducedSampleDataBySpinChannel,
+    TotalPolarizationCorrectedData,
+    TransmissionFunction,
+    Up,
+)
+
+CHANNELS = {
+    'up_up': (Up, Up),
+    'up_down': (Up, Down),
+    'down_up': (Down, Up),
+    'down_down': (Down, Down),
+}
+
+
+def make_he3(C: float) -> He3TransmissionFunction:
+    return He3TransmissionFunction(
+        opacity_function=He3OpacityFunction(sc.scalar(0.88, unit='1/angstrom')),
+        polarization_function=He3PolarizationFunction(
+            C=sc.scalar(C), T1=sc.scalar(100000.0, unit='s')
+        ),
+        transmission_empty_glass=sc.scalar(0.9),
+    )
+
+
+def make_supermirror() -> SupermirrorTransmissionFunction:
+    table = sc.DataArray(
+        sc.array(dims=['wavelength'], values=[0.9, 0.95, 0.97, 0.98]),
+        coords={
+            'wavelength': sc.array(
+                dims=['wavelength'], values=[0.5, 2.0, 5.0, 9.0], unit='angstrom'
+            )
+        },
+    )
+    return SupermirrorTransmissionFunction(EfficiencyLookupTable(table=table))
+
+
+@pytest.fixture
+def files(tmp_path: Path) -> dict[str, str]:
+    files = {}
+    for channel, spins in CHANNELS.items():
+        data = synthetic.make_spin_channel_data(
+            *spins,
+            time_bins=sc.linspace('time', 0.0, 100000.0, num=3, unit='s'),
+            wavelength_bins=sc.linspace('wavelength', 1.0, 8.0, num=4, unit='Å'),
+            polarizer=make_he3(0.7),
+            analyzer=make_supermirror(),
+            events=200,
+        )
+        data.save_hdf5(tmp_path / f'{channel}.h5')
+        files[channel] = f'{channel}.h5'
+    return files
+
+
+@pytest.fixture
+def service(tmp_path: Path) -> CorrectionService:
+    return CorrectionService(
+        {'polarizer': make_he3(0.7), 'analyzer': make_supermirror()},
+        base_dir=tmp_path,
+    )
+
+
+@pytest.fixture
+def url(service: CorrectionService):
+    server = service.server(port=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    host, port = server.server_address
+    yield f'http://{host}:{port}'
+    server.shutdown()
+    server.server_close()
+    thread.join()
+
+
+def request(url: str, content: dict | None = None) -> dict:
+    data = None if content is None else json.dumps(content).encode()
+    with urllib.request.urlopen(url, data=data, timeout=60) as response:  # noqa: S310
+        return json.loads(response.read())
+
+
+def expected_result(
+    tmp_path: Path, files: dict[str, str], polarizer: He3TransmissionFunction
+) -> TotalPolarizationCorrectedData:
+    workflow = CorrectionWorkflow()
+    workflow[TransmissionFunction[Polarizer]] = polarizer
+    workflow[TransmissionFunction[Analyzer]] = make_supermirror()
+    for channel, spins in CHANNELS.items():
+        workflow[ReducedSampleDataBySpinChannel[spins]] = sc.io.load_hdf5(
+            tmp_path / files[channel]
+        )
+    return workflow.compute(TotalPolarizationCorrectedData)
+
+
+def assert_output_matches(
+    output: Path, expected: TotalPolarizationCorrectedData
+) -> None:
+    result = sc.io.load_hdf5(output)
+    for field in ('upup', 'updown', 'downup', 'downdown'):
+        assert_identical(result[field], getattr(expected, field))
+
+
+def test_status_lists_cells(url: str) -> None:
+    status = request(f'{url}/status')
+    assert status['cells'] == {
+        'polarizer': 'He3TransmissionFunction',
+        'analyzer': 'SupermirrorTransmissionFunction',
+    }
+    assert status['served'] == 0
+
+
+def test_correct_writes_corrected_run(
+    url: str, files: dict[str, str], tmp_path: Path
+) -> None:
+    response = request(f'{url}/correct', {'files': files, 'output': 'out.h5'})
+    assert response['events'] == 4 * 200
+    assert Path(response['output']) == tmp_path / 'out.h5'
+    assert_output_matches(
+        tmp_path / 'out.h5', expected_result(tmp_path, files, make_he3(0.7))
+    )
+    assert request(f'{url}/status')['served'] == 1
+
+
+def test_concurrent_requests_are_served(
+    url: str, files: dict[str, str], tmp_path: Path
+) -> None:
+    threads = [
+        threading.Thread(
+            target=request,
+            args=(f'{url}/correct', {'files': files, 'output': f'out{i}.h5'}),
+        )
+        for i in range(4)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    expected = expected_result(tmp_path, files, make_he3(0.7))
+    for i in range(4):
+        assert_output_matches(tmp_path / f'out{i}.h5', expected)
+
+
+def test_refresh_cell_is_used_for_subsequent_corrections(
+    url: str, files: dict[str, str], tmp_path: Path
+) -> None:
+    save_transmission_function(make_he3(0.5), tmp_path / 'polarizer.h5')
+    request(f'{url}/cells/polarizer', {'kind': 'file', 'path': 'polarizer.h5'})
+    request(f'{url}/correct', {'files': files, 'output': 'out.h5'})
+    assert_output_matches(
+        tmp_path / 'out.h5', expected_result(tmp_path, files, make_he3(0.5))
+    )
+
+
+def test_refresh_cell_fits_new_direct_beam_data(
+    service: CorrectionService, tmp_path: Path
+) -> None:
+    no_cell, with_cell = synthetic.make_direct_beam_runs(
+        make_he3(0.6),
+        time=sc.linspace('time', 0.0, 200000.0, num=8, unit='s'),
+        wavelength=sc.linspace('wavelength', 1.0, 8.0, num=20, unit='angstrom'),
+    )
+    no_cell.save_hdf5(tmp_path / 'no_cell.h5')
+    with_cell.save_hdf5(tmp_path / 'polarized.h5')
+    service.refresh_cell(
+        'polarizer',
+        {
+            'kind': 'he3',
+            'direct_beam_no_cell': 'no_cell.h5',
+            'polarized': 'polarized.h5',
+            'transmission_empty_glass': 0.9,
+            'opacity0': {'value': 0.88, 'unit': '1/angstrom'},
+        },
+    )
+    C = service.cells['polarizer'].polarization_function.C
+    assert sc.allclose(C, sc.scalar(0.6), rtol=sc.scalar(1e-3))
+
+
+@pytest.mark.parametrize(
+    ('path', 'content', 'status'),
+    [
+        ('/correct', {'files': {}, 'output': 'out.h5'}, 400),
+        ('/correct', {'files': {'up_up': 'missing.h5'}}, 400),
+        ('/cells/sample', {'kind': 'file', 'path': 'cell.h5'}, 400),
+        ('/cells/polarizer', {'kind': 'he3'}, 400),
+        ('/cells/polarizer', {'kind': 'file', 'path': ['cell.h5']}, 400),
+        ('/unknown', {}, 404),
+    ],
+)
+def test_bad_requests_return_error(
+    url: str, path: str, content: dict, status: int
+) -> None:
+    with pytest.raises(urllib.error.HTTPError) as info:
+        request(f'{url}{path}', content)
+    assert info.value.code == status
+    assert 'error' in json.loads(info.value.read())
+    assert request(f'{url}/status')['served'] == 0
+
+
+def test_bad_data_returns_error(
+    url: str, files: dict[str, str], tmp_path: Path
+) -> None:
+    sc.scalar(1.0).save_hdf5(tmp_path / 'scalar.h5')
+    files = {**files, 'up_up': 'scalar.h5'}
+    with pytest.raises(urllib.error.HTTPError) as info:
+        request(f'{url}/correct', {'files': files, 'output': 'out.h5'})
+    assert info.value.code == 400
+    assert 'error' in json.loads(info.value.read())
+
+
+@pytest.mark.parametrize('output', ['../out.h5', '/out.h5', 'sub/../../out.h5'])
+def test_correct_rejects_output_outside_base_dir(
+    service: CorrectionService, files: dict[str, str], tmp_path: Path, output: str
+) -> None:
+    with pytest.raises(ValueError, match='outside'):
+        service.correct(files, output)
+    assert not (tmp_path.parent / 'out.h5').exists()
@@ -1,13 +1,20 @@
 # SPDX-License-Identifier: BSD-3-Clause
 # Copyright (c) 2024 Scipp contributors (https://github.com/scipp)
 import io
+from concurrent.futures import ThreadPoolExecutor
 
+import numpy as np
 import pytest
 import scipp as sc
-from scipp.testing import assert_allclose
+from scipp.testing import assert_allclose, assert_identical
 
 import ess.polarization as pol
 from ess.polarization.data import example_polarization_efficiency_table
+from ess.polarization.supermirror import (
+    SupermirrorTransmissionFunction,
+    _write_atomic,
+    build_efficiency_table_cache,
+)
 
 
 def test_SecondDegreePolynomialEfficiency_raises_if_units_incompatible():
@@ -107,3 +114,252 @@ def test_EfficiencyLookupTable_load_from_example_file():
     assert elt.table.size == 120
     assert elt.table.coords['wavelength'].min() == sc.scalar(3.05, unit='angstrom')
     assert elt.table.coords['wavelength'].max() == sc.scalar(14.95, unit='angstrom')
+
+
+class CountingEfficiency(pol.SupermirrorEfficiencyFunction):
+    def __init__(self) -> None:
+        self.calls = 0
+
+    def __call__(self, *, wavelength: sc.Variable) -> sc.Variable:
+        self.calls += 1
+        return wavelength * sc.scalar(0.1, unit='1/angstrom')
+
+
+def test_SupermirrorTransmissionFunction_memoizes_efficiency_per_wavelength_array():
+    efficiency = CountingEfficiency()
+    transmission = SupermirrorTransmissionFunction(efficiency_function=efficiency)
+    da = sc.DataArray(
+        sc.ones(sizes={'event': 4}),
+        coords={'wavelength': sc.linspace('event', 1.0, 4.0, 4, unit='angstrom')},
+    )
+    plus = transmission.apply(da, 'plus')
+    minus = transmission.apply(da, 'minus')
+    assert efficiency.calls == 1
+    assert_allclose(plus + minus, sc.ones(sizes={'event': 4}))
+
+    other = da.copy()
+    transmission.apply(other, 'plus')
+    assert efficiency.calls == 2
+    # The memo is bounded, the original array was evicted.
+    transmission.apply(da, 'plus')
+    assert efficiency.calls == 3
+
+
+def test_SupermirrorTransmissionFunction_memo_is_bounded_by_bytes():
+    efficiency = CountingEfficiency()
+    arrays = [
+        sc.DataArray(
+            sc.ones(sizes={'event': 100}),
+            coords={'wavelength': sc.linspace('event', 1.0, 4.0, 100, unit='Å')},
+        )
+        for _ in range(3)
+    ]
+    # Entries reference the wavelength and the efficiency.
+    entry = 2 * arrays[0].coords['wavelength'].underlying_size()
+    transmission = SupermirrorTransmissionFunction(
+        efficiency_function=efficiency, memo_size=10, memo_bytes=2 * entry
+    )
+    for da in arrays:
+        transmission.apply(da, 'plus')
+    assert transmission._memo.nbytes == 2 * entry
+    transmission.apply(arrays[2], 'plus')
+    assert efficiency.calls == 3
+    # The oldest entry was evicted to stay within the bound.
+    transmission.apply(arrays[0], 'plus')
+    assert efficiency.calls == 4
+
+    large = sc.DataArray(
+        sc.ones(sizes={'event': 1000}),
+        coords={'wavelength': sc.linspace('event', 1.0, 4.0, 1000, unit='Å')},
+    )
+    transmission.apply(large, 'plus')
+    transmission.apply(large, 'minus')
+    # Arrays exceeding the bound are not memoized.
+    assert efficiency.calls == 6
+    assert transmission._memo.nbytes == 2 * entry
+
+
+def test_SupermirrorTransmissionFunction_memoizes_binned_wavelength():
+    efficiency = CountingEfficiency()
+    transmission = SupermirrorTransmissionFunction(efficiency_function=efficiency)
+    events = sc.DataArray(
+        sc.ones(sizes={'event': 4}),
+        coords={'wavelength': sc.linspace('event', 1.0, 4.0, 4, unit='angstrom')},
+    )
+    binned = sc.DataArray(
+        sc.bins(
+            data=events,
+            dim='event',
+            begin=sc.array(dims=['Q'], values=[0, 2], unit=None),
+        )
+    )
+    transmission.apply(binned.bins, 'plus')
+    transmission.apply(binned.bins, 'minus')
+    assert efficiency.calls == 1
+    transmission.apply(binned['Q', 1:].bins, 'plus')
+    assert efficiency.calls == 2
+
+
+def test_SecondDegreePolynomialEfficiency_supports_binned_wavelength():
+    f = pol.SecondDegreePolynomialEfficiency(
+        a=sc.scalar(1.0, unit='1/angstrom**2'),
+        b=sc.scalar(20.0, unit='1/nm'),
+        c=sc.scalar(3.0),
+    )
+    wavelength = sc.array(dims=['event'], values=[0.0, 1.0, 2.0], unit='angstrom')
+    binned = sc.bins(
+        data=sc.DataArray(wavelength),
+        dim='event',
+        begin=sc.array(dims=['Q'], values=[0, 1], unit=None),
+    ).bins.data
+    result = f(wavelength=binned)
+    assert_allclose(
+        result.bins.concat().value, sc.array(dims=['event'], values=[3.0, 6.0, 11.0])
+    )
+
+
+def _make_point_table() -> sc.DataArray:
+    wavelength = sc.array(
+        dims=['wavelength'],
+        values=np.sort(np.random.default_rng(1).uniform(3.0, 15.0, 120)),
+        unit='angstrom',
+    )
+    efficiency = sc.sin(wavelength * sc.scalar(1.0 / 3.0, unit='rad/angstrom'))
+    return sc.DataArray(efficiency, coords={'wavelength': wavelength})
+
+
+def _make_histogram_table() -> sc.DataArray:
+    table = _make_point_table()
+    return sc.DataArray(
+        table.data[1:], coords={'wavelength': table.coords['wavelength']}
+    )
+
+
+@pytest.mark.parametrize('make_table', [_make_point_table, _make_histogram_table])
+def test_EfficiencyLookupTable_uniform_grid_reproduces_lookup(make_table):
+    table = make_table()
+    coord = table.coords['wavelength']
+    # Random wavelengths, table coords, and the midpoints where nearest switches.
+    x = sc.concat(
+        [
+            sc.array(
+                dims=['event'],
+                values=np.random.default_rng(2).uniform(0.0, 20.0, 100_000),
+                unit='angstrom',
+            ),
+            coord.rename_dims(wavelength='event'),
+            sc.midpoints(coord).rename_dims(wavelength='event'),
+        ],
+        'event',
+    )
+    tab = pol.EfficiencyLookupTable(table, uniform_grid=True)
+    assert_identical(tab(wavelength=x), pol.EfficiencyLookupTable(table)(wavelength=x))
+
+
+def test_EfficiencyLookupTable_uniform_grid_uses_nearest_point():
+    table = sc.DataArray(
+        sc.array(dims=['wavelength'], values=[0.0, 1.0, 0.0, 1.0]),
+        coords={'wavelength': sc.linspace('wavelength', 1.0, 4.0, 4, unit='angstrom')},
+    )
+    x = sc.array(dims=['event'], values=[1.4, 1.6, 2.5], unit='angstrom')
+    tab = pol.EfficiencyLookupTable(table, uniform_grid=True)
+    assert_identical(
+        tab(wavelength=x), sc.array(dims=['event'], values=[0.0, 1.0, 0.0])
+    )
+    # The grid size follows from the spacing of the table.
+    assert len(tab._grid.first) == 3
+
+
+def test_EfficiencyLookupTable_uniform_grid_converts_wavelength_unit():
+    table = _make_point_table()
+    x = sc.linspace('event', 3.0, 15.0, 1000, unit='angstrom')
+    tab = pol.EfficiencyLookupTable(table, uniform_grid=True)
+    assert_identical(
+        tab(wavelength=x.to(unit='nm')), pol.EfficiencyLookupTable(table)(wavelength=x)
+    )
+
+
+def test_EfficiencyLookupTable_uniform_grid_supports_binned_wavelength():
+    table = _make_point_table()
+    events = sc.DataArray(
+        sc.ones(sizes={'event': 5}),
+        coords={'wavelength': sc.linspace('event', 4.0, 12.0, 5, unit='angstrom')},
+    )
+    binned = sc.DataArray(
+        sc.bins(
+            data=events,
+            dim='event',
+            begin=sc.array(dims=['Q'], values=[0, 2], unit=None),
+        )
+    )
+    tab = pol.EfficiencyLookupTable(table, uniform_grid=True)
+    result = tab(wavelength=binned.bins.coords['wavelength'])
+    expected = pol.EfficiencyLookupTable(table)(wavelength=events.coords['wavelength'])
+    assert_identical(result.bins.concat().value, expected)
+
+
+def test_EfficiencyLookupTable_load_from_file_with_cache(tmp_path):
+    fname = tmp_path / 'table.csv'
+    fname.write_text('a,b,c\n1.0,2,3\n4,5,6')
+    cache_dir = tmp_path / 'cache'
+    expected = pol.EfficiencyLookupTable.from_file(
+        fname, wavelength_colname='a', efficiency_colname='b'
+    )
+    first = pol.EfficiencyLookupTable.from_file(
+        fname, wavelength_colname='a', efficiency_colname='b', cache_dir=cache_dir
+    )
+    assert len(list(cache_dir.iterdir())) == 1
+    cached = pol.EfficiencyLookupTable.from_file(
+        fname, wavelength_colname='a', efficiency_colname='b', cache_dir=cache_dir
+    )
+    assert_identical(first.table, expected.table)
+    assert_identical(cached.table, expected.table)
+
+    pol.EfficiencyLookupTable.from_file(
+        fname, wavelength_colname='a', efficiency_colname='c', cache_dir=cache_dir
+    )
+    assert len(list(cache_dir.iterdir())) == 2
+
+
+def test_write_atomic_concurrent_writers_do_not_collide(tmp_path):
+    table = sc.DataArray(
+        sc.linspace('wavelength', 0.5, 1.0, 100),
+        coords={
+            'wavelength': sc.linspace('wavelength', 1.0, 5.0, 100, unit='angstrom')
+        },
+    )
+    filename = tmp_path / 'cache' / 'table.h5'
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        list(pool.map(lambda _: _write_atomic(table, filename), range(16)))
+    assert_identical(sc.io.load_hdf5(filename), table)
+    assert list(filename.parent.iterdir()) == [filename]
+
+
+def test_EfficiencyLookupTable_cache_is_invalidated_if_file_changes(tmp_path):
+    fname = tmp_path / 'table.csv'
+    fname.write_text('a,b\n1.0,2\n4,5')
+    cache_dir = tmp_path / 'cache'
+    pol.EfficiencyLookupTable.from_file(
+        fname, wavelength_colname='a', efficiency_colname='b', cache_dir=cache_dir
+    )
+    fname.write_text('a,b\n1.0,2\n4,5\n7,8')
+    elt = pol.EfficiencyLookupTable.from_file(
+        fname, wavelength_colname='a', efficiency_colname='b', cache_dir=cache_dir
+    )
+    assert elt.table.sizes == {'wavelength': 3}
+
+
+def test_build_efficiency_table_cache(tmp_path, monkeypatch):
+    fname = tmp_path / 'table.csv'
+    fname.write_text('a,b\n1.0,2\n4,5')
+    cache_dir = tmp_path / 'cache'
+    (cache_file,) = build_efficiency_table_cache(
+        cache_dir, {'path': fname, 'wavelength_colname': 'a', 'efficiency_colname': 'b'}
+    )
+    assert cache_file.exists()
+    # The CSV is not parsed again when loading from the cache
+    monkeypatch.setattr(sc.io, 'load_csv', None)
+    elt = pol.EfficiencyLookupTable.from_file(
+        fname, wavelength_colname='a', efficiency_colname='b', cache_dir=cache_dir
+    )
+    assert elt.table.sizes == {'wavelength': 2}
@@ -0,0 +1,205 @@
+# SPDX-License-Identifier: BSD-3-Clause
+# Copyright (c) 2025 Scipp contributors (https://github.com/scipp)
+import numpy as np
+import pytest
+import scipp as sc
+
+from ess.polarization import (
+    CorrectionWorkflow,
+    He3OpacityFunction,
+    He3PolarizationFunction,
+    He3TransmissionFunction,
+    SecondDegreePolynomialEfficiency,
+    synthetic,
+)
+from ess.polarization.base import (
+    CellInBeamLog,
+    CellSpinLog,
+    SampleInBeamLog,
+    build_run_section_index,
+    determine_run_section,
+)
+from ess.polarization.correction import FlipperEfficiency
+from ess.polarization.he3 import (
+    get_he3_transmission_incoming_unpolarized_from_fit_to_direct_beam,
+)
+from ess.polarization.supermirror import SupermirrorTransmissionFunction
+from ess.polarization.types import (
+    Analyzer,
+    Down,
+    Polarizer,
+    ReducedSampleDataBySpinChannel,
+    TotalPolarizationCorrectedData,
+    TransmissionFunction,
+    Up,
+)
+
+
+def _make_he3() -> He3TransmissionFunction:
+    return He3TransmissionFunction(
+        opacity_function=He3OpacityFunction(sc.scalar(0.88, unit='1/angstrom')),
+        polarization_function=He3PolarizationFunction(
+            C=sc.scalar(0.7), T1=sc.scalar(100000.0, unit='s')
+        ),
+        transmission_empty_glass=sc.scalar(0.9),
+    )
+
+
+def _make_supermirror() -> SupermirrorTransmissionFunction:
+    return SupermirrorTransmissionFunction(
+        SecondDegreePolynomialEfficiency(
+            a=sc.scalar(-0.001, unit='1/angstrom**2'),
+            b=sc.scalar(0.01, unit='1/angstrom'),
+            c=sc.scalar(0.95),
+        )
+    )
+
+
+def test_iter_spin_channel_events_yields_time_sorted_chunks() -> None:
+    chunks = list(
+        synthetic.iter_spin_channel_events(
+            Up,
+            Down,
+            polarizer=_make_supermirror(),
+            analyzer=_make_he3(),
+            events=1000,
+            chunk_size=300,
+            time_range=sc.array(dims=['time'], values=[0.0, 100.0], unit='s'),
+            wavelength_range=sc.array(
+                dims=['wavelength'], values=[1.0, 8.0], unit='angstrom'
+            ),
+        )
+    )
+    assert [chunk.sizes['event'] for chunk in chunks] == [250, 250, 250, 250]
+    times = np.concatenate([chunk.coords['time'].values for chunk in chunks])
+    assert np.all(np.diff(times) >= 0)
+    assert np.all(np.concatenate([chunk.values for chunk in chunks]) > 0)
+
+
+@pytest.mark.parametrize('chunk_size', [3000, 100_000])
+def test_correction_of_generated_data_recovers_cross_sections(
+    chunk_size: int,
+) -> None:
+    polarizer = _make_supermirror()
+    analyzer = _make_he3()
+    cross_sections = (1.0, 0.2, 0.3, 0.5)
+    workflow = CorrectionWorkflow()
+    workflow[TransmissionFunction[Polarizer]] = polarizer
+    workflow[TransmissionFunction[Analyzer]] = analyzer
+    workflow[FlipperEfficiency[Polarizer]] = FlipperEfficiency(0.9)
+    workflow[FlipperEfficiency[Analyzer]] = FlipperEfficiency(0.95)
+    for pola in (Up, Down):
+        for ana in (Up, Down):
+            workflow[ReducedSampleDataBySpinChannel[pola, ana]] = (
+                synthetic.make_spin_channel_data(
+                    pola,
+                    ana,
+                    time_bins=sc.linspace('time', 0.0, 10000.0, 11, unit='s'),
+                    wavelength_bins=sc.linspace(
+                        'wavelength', 1.0, 8.0, 21, unit='angstrom'
+                    ),
+                    polarizer=polarizer,
+                    analyzer=analyzer,
+                    events=10000,
+                    chunk_size=chunk_size,
+                    cross_sections=cross_sections,
+                    polarizer_flipper_efficiency=0.9,
+                    analyzer_flipper_efficiency=0.95,
+                )
+            )
+    result = workflow.compute(TotalPolarizationCorrectedData)
+    for name, expected in zip(
+        ('upup', 'updown', 'downup', 'downdown'), cross_sections, strict=True
+    ):
+        corrected = getattr(result, name)
+        assert corrected.bins.size().sum().value == 40000
+        np.testing.assert_allclose(corrected.bins.sum().sum().value, 10000 * expected)
+
+
+def test_correction_with_wavelength_dependent_flipper_efficiency() -> None:
+    polarizer = _make_supermirror()
+    analyzer = _make_he3()
+    cross_sections = (1.0, 0.2, 0.3, 0.5)
+    table = sc.DataArray(
+        sc.array(dims=['wavelength'], values=[0.8, 0.85, 0.9, 0.95]),
+        coords={'wavelength': sc.linspace('wavelength', 1.0, 8.0, 5, unit='angstrom')},
+    )
+
+    def analyzer_efficiency(*, wavelength: sc.Variable, **_: sc.Variable):
+        return 0.99 - sc.scalar(0.01, unit='1/angstrom') * wavelength
+
+    workflow = CorrectionWorkflow()
+    workflow[TransmissionFunction[Polarizer]] = polarizer
+    workflow[TransmissionFunction[Analyzer]] = analyzer
+    workflow[FlipperEfficiency[Polarizer]] = FlipperEfficiency(table)
+    workflow[FlipperEfficiency[Analyzer]] = FlipperEfficiency(analyzer_efficiency)
+    for pola in (Up, Down):
+        for ana in (Up, Down):
+            workflow[ReducedSampleDataBySpinChannel[pola, ana]] = (
+                synthetic.make_spin_channel_data(
+                    pola,
+                    ana,
+                    time_bins=sc.linspace('time', 0.0, 10000.0, 11, unit='s'),
+                    wavelength_bins=sc.linspace(
+                        'wavelength', 1.0, 8.0, 21, unit='angstrom'
+                    ),
+                    polarizer=polarizer,
+                    analyzer=analyzer,
+                    events=10000,
+                    cross_sections=cross_sections,
+                    polarizer_flipper_efficiency=table,
+                    analyzer_flipper_efficiency=analyzer_efficiency,
+                )
+            )
+    result = workflow.compute(TotalPolarizationCorrectedData)
+    for name, expected in zip(
+        ('upup', 'updown', 'downup', 'downdown'), cross_sections, strict=True
+    ):
+        corrected = getattr(result, name)
+        np.testing.assert_allclose(corrected.bins.sum().sum().value, 10000 * expected)
+
+
+def _logs_by_name(logs: dict) -> dict[str, sc.DataArray]:
+    return {
+        'sample_in_beam': logs[SampleInBeamLog],
+        'polarizer_in_beam': logs[CellInBeamLog[Polarizer]],
+        'analyzer_in_beam': logs[CellInBeamLog[Analyzer]],
+        'polarizer_spin': logs[CellSpinLog[Polarizer]],
+        'analyzer_spin': logs[CellSpinLog[Analyzer]],
+    }
+
+
+def test_make_run_section_logs_yields_sections_of_given_kinds() -> None:
+    sections = ['direct_beam', 'polarizer', 'analyzer', 'sample_up_up']
+    sections += ['sample_down_up', 'sample_up_up', 'sample_down_down']
+    logs = synthetic.make_run_section_logs(
+        sections, section_duration=sc.scalar(60.0, unit='s')
+    )
+    index = build_run_section_index(determine_run_section(**_logs_by_name(logs)))
+    sizes = {kind: r.stop - r.start for kind, r in index.ranges.items()}
+    assert sizes == {
+        'direct_beam': 1,
+        'polarizer': 1,
+        'analyzer': 1,
+        'sample_up_up': 2,
+        'sample_up_down': 0,
+        'sample_down_up': 1,
+        'sample_down_down': 1,
+    }
+
+
+def test_make_direct_beam_runs_fit_recovers_polarization_function() -> None:
+    transmission = _make_he3()
+    no_cell, with_cell = synthetic.make_direct_beam_runs(
+        transmission,
+        time=sc.linspace('time', 0.0, 100000.0, 50, unit='s'),
+        wavelength=sc.linspace('wavelength', 1.0, 5.0, 30, unit='angstrom'),
+    )
+    result = get_he3_transmission_incoming_unpolarized_from_fit_to_direct_beam(
+        transmission_fraction=with_cell / no_cell,
+        opacity_function=transmission.opacity_function,
+        transmission_empty_glass=transmission.transmission_empty_glass,
+    )
+    polarization = transmission.polarization_function
+    assert sc.isclose(result.polarization_function.C, polarization.C)
+    assert sc.isclose(result.polarization_function.T1, polarization.T1)
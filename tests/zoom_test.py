@@ -0,0 +1,277 @@
+# SPDX-License-Identifier: BSD-3-Clause
+# Copyright (c) 2025 Scipp contributors (https://github.com/scipp)
+import multiprocessing
+from pathlib import Path
+
+import h5py
+import numpy as np
+import pytest
+import sciline as sl
+import scipp as sc
+from scipp.testing import assert_identical
+
+pytest.importorskip('ess.isissans')
+
+from scippnexus import NXsource  # noqa: E402
+
+import ess.isissans as isis  # noqa: E402
+from ess.isissans.io import LoadedFileContents  # noqa: E402
+from ess.isissans.mantidio import (  # noqa: E402
+    CalibrationWorkspace,
+    DataWorkspace,
+    Period,
+)
+from ess.polarization import zoom  # noqa: E402
+from ess.reduce.nexus.types import Position  # noqa: E402
+from ess.sans.types import (  # noqa: E402
+    Filename,
+    Incident,
+    NeXusComponent,
+    RunType,
+    SampleRun,
+    Transmission,
+    TransmissionRun,
+)
+
+
+def _make_monitor(minute: int, scale: float) -> sc.DataGroup:
+    position = sc.vector([0.0, 0.0, 1.0], unit='m')
+    data = sc.DataArray(
+        scale * sc.ones(dims=['tof'], shape=[5], unit='counts', with_variances=True),
+        coords={
+            'tof': sc.arange('tof', 6.0, unit='us'),
+            'position': position,
+            'spectrum': sc.index(3),
+            'detector_id': sc.index(1),
+            'datetime': sc.datetime(f'2024-01-01T00:{minute:02d}:00'),
+        },
+    )
+    return sc.DataGroup(data=data, position=position)
+
+
+def test_time_dependent_transmission_store_matches_concat_of_all_runs() -> None:
+    source_position = sc.vector([0.0, 0.0, -10.0], unit='m')
+    incident = [_make_monitor(minute, 1.0 + minute) for minute in range(7)]
+    transmission = [_make_monitor(minute, 0.5 * minute) for minute in range(7)]
+    store = zoom.TimeDependentTransmissionStore(capacity=2)
+    for inc, trans in zip(incident, transmission, strict=True):
+        store.append(inc, trans, source_position)
+    assert len(store) == 7
+    assert_identical(
+        store.monitor(Incident), zoom._get_time_dependent_monitor(*incident)
+    )
+    assert_identical(
+        store.monitor(Transmission), zoom._get_time_dependent_monitor(*transmission)
+    )
+
+
+def test_time_dependent_transmission_store_rejects_different_tof() -> None:
+    source_position = sc.vector([0.0, 0.0, -10.0], unit='m')
+    store = zoom.TimeDependentTransmissionStore()
+    store.append(_make_monitor(0, 1.0), _make_monitor(0, 1.0), source_position)
+    other = _make_monitor(1, 1.0)
+    other['data'].coords['tof'] = other['data'].coords['tof'] * 2.0
+    with pytest.raises(ValueError, match='tof'):
+        store.append(other, _make_monitor(1, 1.0), source_position)
+    assert len(store) == 1
+
+
+def _fake_load_run(
+    filename: Filename[RunType], period: Period
+) -> DataWorkspace[RunType]:
+    # Stands in for the Mantid workspace, the data is generated from the run number.
+    with h5py.File(filename, 'r') as f:
+        return DataWorkspace[RunType](int(f['raw_data_1/run_number'][()]))
+
+
+def _fake_from_data_workspace(
+    ws: DataWorkspace[RunType], calibration: CalibrationWorkspace
+) -> LoadedFileContents[RunType]:
+    spectra = sc.arange('spectrum', 1, 5, unit=None)
+    counts = sc.arange('tof', 5.0, unit='counts') * sc.arange('spectrum', 1.0, 5.0)
+    counts = counts.transpose(['spectrum', 'tof']).copy() + sc.scalar(ws, unit='counts')
+    if calibration is not None:
+        counts *= calibration
+    counts.variances = counts.values
+    data = sc.DataArray(
+        counts,
+        coords={
+            'spectrum': spectra,
+            'detector_id': spectra.copy(),
+            'tof': sc.arange('tof', 6.0, unit='us'),
+            'position': sc.vectors(
+                dims=['spectrum'], values=[[0.0, 0.0, z] for z in range(4)], unit='m'
+            ),
+            'source_position': sc.vector([0.0, 0.0, -10.0], unit='m'),
+        },
+    )
+    return LoadedFileContents[RunType](
+        sc.DataGroup(
+            data=data,
+            run_start=sc.scalar(f'2024-01-01T00:{ws:02d}:00'),
+            run_end=sc.scalar(f'2024-01-01T00:{ws:02d}:30'),
+        )
+    )
+
+
+@pytest.fixture
+def fake_mantid(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(isis.mantidio, 'load_run', _fake_load_run)
+    monkeypatch.setattr(isis.mantidio, 'from_data_workspace', _fake_from_data_workspace)
+    monkeypatch.setattr(
+        isis.mantidio, 'load_calibration', lambda filename: float(filename.read_text())
+    )
+    zoom_workflow = isis.zoom.ZoomWorkflow
+
+    def workflow_with_fake_loader():
+        workflow = zoom_workflow()
+        workflow.insert(_fake_load_run)
+        workflow.insert(_fake_from_data_workspace)
+        return workflow
+
+    monkeypatch.setattr(isis.zoom, 'ZoomWorkflow', workflow_with_fake_loader)
+
+
+def _write_raw_nexus(filename: str | Path, run: int) -> None:
+    # Layout of ISIS raw NeXus files, with the same data as the fake Mantid loader.
+    # Spectrum 4 is stored in the detector group, the others in monitor groups.
+    with h5py.File(filename, 'w') as f:
+        entry = f.create_group('raw_data_1')
+        entry['run_number'] = run
+        entry['start_time'] = np.array([f'2024-01-01T00:{run:02d}:00'.encode()])
+        entry['end_time'] = np.array([f'2024-01-01T00:{run:02d}:30'.encode()])
+        groups = {spectrum: f'monitor_{spectrum}' for spectrum in (1, 2, 3)}
+        groups[4] = 'detector_1'
+        for spectrum, name in groups.items():
+            group = entry.create_group(name)
+            group.attrs['NX_class'] = 'NXmonitor' if spectrum < 4 else 'NXdetector'
+            counts = np.arange(5) * spectrum + run
+            if spectrum < 4:
+                group['spectrum_index'] = spectrum
+                group['data'] = counts.reshape(1, 1, 5).astype('int32')
+            else:
+                group['spectrum_index'] = np.array([spectrum, 5])
+                group['counts'] = np.stack([counts, counts])[None].astype('int32')
+            tof = group.create_dataset('time_of_flight', data=np.arange(6.0))
+            tof.attrs['units'] = 'microsecond'
+
+
+@pytest.fixture
+def fake_runs(tmp_path) -> list[str]:
+    runs = []
+    for i in range(4):
+        run = tmp_path / f'ZOOM{i}.nxs'
+        _write_raw_nexus(run, i)
+        runs.append(str(run))
+    return runs
+
+
+def _compute_monitors(
+    runs: list[str], calibration_workspace: float | None = None, **kwargs: object
+) -> sc.DataGroup:
+    workflow = zoom.ZoomTransmissionFractionWorkflow(runs, **kwargs)
+    workflow[isis.MonitorSpectrumNumber[Incident]] = isis.MonitorSpectrumNumber[
+        Incident
+    ](3)
+    workflow[isis.MonitorSpectrumNumber[Transmission]] = isis.MonitorSpectrumNumber[
+        Transmission
+    ](4)
+    workflow[CalibrationWorkspace] = calibration_workspace
+    keys = (
+        NeXusComponent[Incident, TransmissionRun[SampleRun]],
+        NeXusComponent[Transmission, TransmissionRun[SampleRun]],
+        Position[NXsource, TransmissionRun[SampleRun]],
+    )
+    return sc.DataGroup(
+        {str(i): value for i, value in enumerate(workflow.compute(keys).values())}
+    )
+
+
+def test_cached_loading_matches_mapped_workflow(fake_mantid, fake_runs, tmp_path):
+    expected = _compute_monitors(fake_runs)
+    cache_dir = tmp_path / 'cache'
+    assert_identical(_compute_monitors(fake_runs, cache_dir=cache_dir), expected)
+    assert len(list(cache_dir.iterdir())) == len(fake_runs)
+    assert_identical(_compute_monitors(fake_runs, cache_dir=cache_dir), expected)
+
+    # Changing a run invalidates its cache entry
+    _write_raw_nexus(fake_runs[0], 10)
+    result = _compute_monitors(fake_runs, cache_dir=cache_dir)
+    assert len(list(cache_dir.iterdir())) == len(fake_runs) + 1
+    assert not sc.identical(result, expected)
+    assert_identical(
+        result['1']['data'].data['time', 1:], expected['1']['data'].data['time', 1:]
+    )
+
+
+@pytest.mark.skipif(
+    multiprocessing.get_context().get_start_method() != 'fork',
+    reason='Monkeypatched loader is only available in forked worker processes',
+)
+def test_parallel_loading_matches_mapped_workflow(fake_mantid, fake_runs, tmp_path):
+    expected = _compute_monitors(fake_runs)
+    assert_identical(_compute_monitors(fake_runs, max_workers=2), expected)
+    assert_identical(_compute_monitors(fake_runs, max_workers=2, lazy=True), expected)
+    assert_identical(
+        _compute_monitors(fake_runs, max_workers=2, cache_dir=tmp_path / 'cache'),
+        expected,
+    )
+
+
+def test_calibration_is_applied_when_loading_runs(fake_mantid, fake_runs, tmp_path):
+    expected = _compute_monitors(fake_runs, calibration_workspace=2.0)
+    calibration = tmp_path / 'calibration.nxs'
+    calibration.write_text('2.0')
+    cache_dir = tmp_path / 'cache'
+    for _ in range(2):
+        assert_identical(
+            _compute_monitors(fake_runs, calibration=calibration, cache_dir=cache_dir),
+            expected,
+        )
+    assert not sc.identical(_compute_monitors(fake_runs, cache_dir=cache_dir), expected)
+
+
+def test_lazy_loading_matches_mapped_workflow(
+    fake_mantid, fake_runs, tmp_path, monkeypatch
+):
+    expected = _compute_monitors(fake_runs)
+    assert_identical(_compute_monitors(fake_runs, lazy=True), expected)
+    cache_dir = tmp_path / 'cache'
+    result = _compute_monitors(fake_runs, lazy=True, cache_dir=cache_dir)
+    assert_identical(result, expected)
+    assert len(list(cache_dir.iterdir())) == len(fake_runs)
+
+    def read_monitor_spectra(*args, **kwargs):
+        raise AssertionError('Cached runs must not be read again')
+
+    monkeypatch.setattr(zoom, '_read_monitor_spectra', read_monitor_spectra)
+    result = _compute_monitors(fake_runs, lazy=True, cache_dir=cache_dir)
+    assert_identical(result, expected)
+
+
+def test_read_monitor_spectra_raises_if_spectrum_missing(tmp_path):
+    filename = tmp_path / 'ZOOM0.nxs'
+    _write_raw_nexus(filename, 0)
+    with pytest.raises(KeyError, match='lazy=False'):
+        zoom._read_monitor_spectra(filename, spectra=(7,), period=None)
+
+
+def test_store_append_run_matches_workflow_with_calibration(
+    fake_mantid, fake_runs, tmp_path
+):
+    calibration = tmp_path / 'calibration.nxs'
+    calibration.write_text('2.0')
+    expected = _compute_monitors(fake_runs, calibration=calibration, max_workers=1)
+    store = zoom.TimeDependentTransmissionStore()
+    for run in fake_runs:
+        store.append_run(
+            run, incident_spectrum=3, transmission_spectrum=4, calibration=calibration
+        )
+    workflow = sl.Pipeline()
+    store.update(workflow)
+    for i, mon_type in enumerate((Incident, Transmission)):
+        key = NeXusComponent[mon_type, TransmissionRun[SampleRun]]
+        assert_identical(workflow.compute(key), expected[str(i)])
+    assert_identical(
+        workflow.compute(Position[NXsource, TransmissionRun[SampleRun]]), expected['2']
+    )